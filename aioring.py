@@ -0,0 +1,347 @@
+import asyncio
+import logging
+import socket
+import struct
+import threading
+import time
+
+from typing import Dict
+
+from metrics import Metrics
+from ring import (MAX_MACHINES, Message, MessageType, Move, Reorderer, SOCKET_TIMEOUT,
+    TYPE_OFFSET, next_seq, receipt_bit)
+
+
+class RingProtocol(asyncio.DatagramProtocol):
+    def __init__(self, ring: 'AsyncRing'):
+        self.ring = ring
+
+    def datagram_received(self, data, addr):
+        self.ring.frame_received(data)
+
+    def error_received(self, exc):
+        logging.warning(f'[ASYNC] Socket error: {exc}')
+
+
+class AsyncRing():
+    """Ring transport driven by an asyncio event loop.
+
+    Frames are forwarded to the next machine as soon as they arrive, from
+    the protocol callback, so forwarding never waits for the game. Frames
+    from other machines are queued for ``recv_message`` (or ``async for``)
+    in the order their origin sent them, and a frame sent by this machine
+    resolves the future returned by ``send_message_nowait`` when it comes
+    back around the ring, so any number of them may be in flight.
+
+    ``metrics`` counts traffic like ``Ring`` does, except for the time
+    blocked, as nothing here blocks.
+    """
+
+    def __init__(
+        self,
+        num_machines: int,
+        machine_id: int,
+        send_port: int,
+        recv_port: int,
+        send_address,
+        recv_address = None
+    ):
+        if num_machines > MAX_MACHINES:
+            raise ValueError(f'A ring has at most {MAX_MACHINES} machines, got {num_machines}')
+
+        self.num_machines = num_machines
+        self.machine_id = machine_id
+
+        self.send_port = send_port
+        self.recv_port = recv_port
+
+        self.send_address = send_address
+        self.recv_address = recv_address
+
+        self.metrics = Metrics(
+            machine_id,
+            {type.value: type.name for type in MessageType}
+        )
+
+        self.has_token = False
+
+        if machine_id == 1:
+            self.has_token = True
+            self.metrics.token_acquired()
+
+        self.transport = None
+        self.inbox: asyncio.Queue = None
+        self.seq = 0
+        self.pending: Dict[int, tuple] = {}
+        self.reorderer = Reorderer()
+
+        pass
+
+    async def setup(self):
+        if self.recv_address is None:
+            self.recv_address = socket.gethostbyname(socket.gethostname())
+
+        loop = asyncio.get_running_loop()
+        self.inbox = asyncio.Queue()
+
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: RingProtocol(self),
+            local_addr=(self.recv_address, self.recv_port)
+        )
+        logging.debug(f'Binded to {self.recv_address} on {self.recv_port}')
+
+        return
+
+    def cleanup(self):
+        if self.transport is not None:
+            self.transport.close()
+
+        for (_, future, _) in self.pending.values():
+            future.cancel()
+
+        return
+
+    def send(self, data):
+        self.transport.sendto(data, (self.send_address, self.send_port))
+        self.metrics.bytes_sent[data[TYPE_OFFSET]] += len(data)
+
+        return
+
+    def frame_received(self, data):
+        try:
+            message = Message.decode(data)
+        except (ValueError, struct.error) as e:
+            logging.warning(f'[ASYNC] Discarding invalid frame: {e}')
+            self.metrics.invalid_frames += 1
+            return
+
+        self.metrics.received[message.type] += 1
+        self.metrics.bytes_received[message.type] += len(data)
+
+        if message.origin == self.machine_id and message.type != MessageType.TOKEN.value:
+            self.__complete(message)
+            return
+
+        if message.type == MessageType.TOKEN.value:
+            id = message.move[0][0]
+
+            if id == self.machine_id:
+                logging.debug('[ASYNC] Received TOKEN')
+                self.has_token = True
+                self.metrics.token_acquired()
+            else:
+                self.give_token(id)
+
+            self.inbox.put_nowait(message)
+            return
+
+        ready = self.reorderer.push(message)
+
+        if ready is None:
+            # Passed on anyway, the origin may still be waiting for it
+            ready = [message]
+            self.metrics.duplicates[message.type] += 1
+        else:
+            for message in ready:
+                self.inbox.put_nowait(message)
+
+        for message in ready:
+            message = self.set_received(message)
+
+            if not self.has_token:
+                self.send(message.encode())
+                self.metrics.forwarded[message.type] += 1
+
+        return
+
+    def __complete(self, message: Message):
+        pending = self.pending.pop(message.seq, None)
+
+        if pending is None:
+            logging.debug('[ASYNC] Duplicate of a completed frame')
+            self.metrics.duplicates[message.type] += 1
+            return
+
+        (_, future, sent_at) = pending
+
+        self.metrics.circuits[message.type] += 1
+        self.metrics.circuit_seconds[message.type] += time.perf_counter() - sent_at
+
+        if not future.done():
+            future.set_result(self.set_received(message))
+
+        return
+
+    def send_message_nowait(self, type: MessageType, move: Move = None) -> asyncio.Future:
+        self.seq = next_seq(self.seq)
+
+        message = Message(self.machine_id, type, move, self.seq)
+        data = message.encode()
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.seq] = (data, future, time.perf_counter())
+
+        self.send(data)
+        self.metrics.sent[message.type] += 1
+
+        return future
+
+    async def send_message(self, type: MessageType, move: Move = None) -> Message:
+        future = self.send_message_nowait(type, move)
+        (data, _, _) = self.pending[self.seq]
+
+        loop = asyncio.get_running_loop()
+        timer = loop.call_later(SOCKET_TIMEOUT, self.__resend, data, future)
+
+        try:
+            return await future
+        finally:
+            timer.cancel()
+
+    def __resend(self, data: bytes, future: asyncio.Future):
+        if future.done():
+            return
+
+        logging.warning('[ASYNC] Did not received the sent message')
+        self.send(data)
+
+        self.metrics.timeouts += 1
+        self.metrics.retransmitted[data[TYPE_OFFSET]] += 1
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(SOCKET_TIMEOUT, self.__resend, data, future)
+
+        return
+
+    async def flush(self):
+        futures = [future for (_, future, _) in self.pending.values()]
+
+        if futures:
+            await asyncio.gather(*futures)
+
+        return
+
+    async def recv_message(self) -> Message:
+        return await self.inbox.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Message:
+        return await self.recv_message()
+
+    async def wait_token_settle(self):
+        while True:
+            message = await self.recv_message()
+
+            if self.has_token:
+                await self.send_message(MessageType.TOKEN_SETTLED)
+                break
+            elif message.type == MessageType.TOKEN_SETTLED.value:
+                break
+
+        return
+
+    def give_token(self, machine_id = -1):
+        if machine_id == -1:
+            machine_id = self.machine_id % self.num_machines + 1
+
+        if machine_id == self.machine_id:
+            # Matches Ring: announcing the settled token needs a circuit
+            return asyncio.ensure_future(self.send_message(MessageType.TOKEN_SETTLED))
+
+        message = Message(self.machine_id, MessageType.TOKEN, [(machine_id, [])])
+
+        self.send(message.encode())
+        self.has_token = False
+
+        self.metrics.token_released()
+        self.metrics.sent[message.type] += 1
+
+        return None
+
+    def set_received(self, message: Message):
+        message.recv_confirm |= receipt_bit(self.machine_id)
+        return message
+
+    pass
+
+
+class ThreadedRing():
+    """Blocking facade over ``AsyncRing`` with the interface of ``Ring``.
+
+    The event loop runs in a background thread, which keeps forwarding
+    frames while the game thread blocks on input, so ``Game`` runs on it
+    unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.ring = AsyncRing(*args, **kwargs)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+        pass
+
+    @property
+    def num_machines(self):
+        return self.ring.num_machines
+
+    @property
+    def machine_id(self):
+        return self.ring.machine_id
+
+    @property
+    def metrics(self):
+        return self.ring.metrics
+
+    @property
+    def has_token(self):
+        return self.ring.has_token
+
+    def __call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def setup(self):
+        self.thread.start()
+        self.__call(self.ring.setup())
+
+        return
+
+    def cleanup(self):
+        self.loop.call_soon_threadsafe(self.ring.cleanup)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+        return
+
+    def send_message(self, type: MessageType, move: Move = None):
+        self.__call(self.ring.send_message(type, move))
+        return
+
+    def recv_message(self) -> Message:
+        return self.__call(self.ring.recv_message())
+
+    def flush(self):
+        self.__call(self.ring.flush())
+        return
+
+    def recv_and_send_message(self) -> Message:
+        # Forwarding already happened when the frame arrived
+        return self.recv_message()
+
+    def wait_token_settle(self):
+        self.__call(self.ring.wait_token_settle())
+        return
+
+    def give_token(self, machine_id = -1):
+        async def give():
+            await self.ring.flush()
+            settled = self.ring.give_token(machine_id)
+
+            if settled is not None:
+                await settled
+
+        self.__call(give())
+        return
+
+    pass
@@ -0,0 +1,294 @@
+import numpy as np
+
+from cards import Card
+from moves import EMPTY_TABLE, JESTER, NUM_RANKS, num_decks, tax_tiers
+
+
+# One 80-card deck as card values
+DECK = np.array(
+    [c.value for c in Card for _ in range(2 if c == Card.JESTER else c.value)],
+    dtype=np.int8
+)
+
+BATCH_POLICIES = ['greedy', 'random', 'pass']
+
+
+def take_best(hands: np.ndarray, n: int) -> np.ndarray:
+    """Counts of the ``n`` best cards of every hand in a (..., 13) array."""
+    before = np.cumsum(hands, axis=-1) - hands
+    return np.minimum(hands, np.maximum(n - before, 0))
+
+
+def take_worst(hands: np.ndarray, n: int) -> np.ndarray:
+    """Like ``engine.worst_cards``: the highest natural cards, Jesters last."""
+    naturals = hands[..., JESTER - 2::-1]
+    taken = take_best(naturals, n)[..., ::-1]
+
+    jesters = np.minimum(hands[..., JESTER - 1:], n - taken.sum(axis=-1, keepdims=True))
+    return np.concatenate([taken, jesters], axis=-1)
+
+
+class BatchSimulator():
+    """Plays K rounds in lockstep with every game held in NumPy arrays.
+
+    ``hands`` is a K x players x 13 count tensor indexed by position in the
+    order, position 0 being the Greater Dalmuti, so machine ids and the
+    initial card draw are left out. Revolutions are checked from position 0
+    down, while ``engine.Round`` checks them in machine id order, so when
+    two players could call one the batch may pick another; results only
+    match the engine when ids are given in seat order. Taxes are paid with
+    the worst cards like ``engine.Policy``.
+    Each ``step`` advances every unfinished game by one turn.
+
+    Policies are vectorized versions of those in ``policy``: ``greedy`` and
+    ``pass`` play exactly like their scalar counterparts, giving natural
+    cards before Jesters like ``engine.worst_cards``, so a deal finishes in
+    the same order as in ``engine.Round``. ``random`` picks a legal rank (or
+    passing) uniformly and then a size and Jester split, instead of drawing
+    uniformly from the list of legal plays.
+    """
+
+    def __init__(
+        self,
+        num_games: int,
+        num_players: int,
+        policy: str,
+        seed: int = None
+    ):
+        if policy not in BATCH_POLICIES:
+            raise ValueError(
+                f'Unknown policy {policy}, choose from {BATCH_POLICIES}'
+            )
+
+        self.num_games = num_games
+        self.num_players = num_players
+        self.policy = policy
+        self.rng = np.random.default_rng(seed)
+        self.deck = np.tile(DECK, num_decks(num_players))
+
+        self.hands = np.zeros((num_games, num_players, NUM_RANKS), dtype=np.int16)
+        self.num_cards = np.zeros((num_games, num_players), dtype=np.int16)
+        self.table_rank = np.full(num_games, EMPTY_TABLE, dtype=np.int16)
+        self.table_count = np.zeros(num_games, dtype=np.int16)
+        self.table_owner = np.full(num_games, -1, dtype=np.int16)
+        self.turn = np.zeros(num_games, dtype=np.int16)
+
+        self.finish_order = np.full((num_games, num_players), -1, dtype=np.int16)
+        self.num_finished = np.zeros(num_games, dtype=np.int16)
+        self.revolution = np.zeros(num_games, dtype=bool)
+        self.active = np.ones(num_games, dtype=bool)
+        self.steps = 0
+
+        return
+
+    def run(self) -> np.ndarray:
+        self.deal()
+        self.check_revolution()
+        self.pay_taxes()
+
+        while self.active.any():
+            self.step()
+
+        return self.finish_order
+
+    def deal(self):
+        k, p = self.num_games, self.num_players
+
+        # One permutation per game, all drawn at once
+        deck = self.deck
+        perm = np.argsort(self.rng.random((k, len(deck))), axis=1)
+        cards = deck[perm].astype(np.int64) - 1
+
+        position = np.arange(len(deck)) % p
+        flat = (np.arange(k)[:, None] * p + position[None, :]) * NUM_RANKS + cards
+
+        counts = np.bincount(flat.ravel(), minlength=k * p * NUM_RANKS)
+        self.hands[:] = counts.reshape(k, p, NUM_RANKS)
+        self.num_cards[:] = self.hands.sum(axis=2)
+
+        return
+
+    def check_revolution(self):
+        p = self.num_players
+        jesters = self.hands[:, :, JESTER - 1] >= 2
+
+        if self.policy == 'greedy':
+            wants = jesters & (np.arange(p) >= p // 2)[None, :]
+        elif self.policy == 'random':
+            wants = jesters & (self.rng.random(jesters.shape) < 0.5)
+        else:
+            wants = np.zeros_like(jesters)
+
+        self.revolution = wants.any(axis=1)
+        first = np.argmax(wants, axis=1)
+
+        great = self.revolution & (first == p - 1)
+        self.hands[great] = self.hands[great, ::-1]
+        self.num_cards[great] = self.num_cards[great, ::-1]
+
+        return
+
+    def pay_taxes(self):
+        taxed = ~self.revolution
+        hands = self.hands[taxed]
+
+        for (tier, n) in enumerate(tax_tiers(self.num_players)):
+            dalmuti, peon = hands[:, tier], hands[:, -1 - tier]
+
+            peon_cards = take_best(peon, n)
+            dalmuti_cards = take_worst(dalmuti, n)
+
+            hands[:, tier] += peon_cards - dalmuti_cards
+            hands[:, -1 - tier] += dalmuti_cards - peon_cards
+
+        self.hands[taxed] = hands
+        return
+
+    def step(self):
+        games = np.nonzero(self.active)[0]
+        rows = np.arange(len(games))
+        player = self.turn[games]
+
+        # Work on gathered copies and scatter them back once at the end
+        table_rank = self.table_rank[games]
+        table_count = self.table_count[games]
+        table_owner = self.table_owner[games]
+
+        cleared = table_owner == player
+        table_rank[cleared] = EMPTY_TABLE
+        table_count[cleared] = 0
+        table_owner[cleared] = -1
+
+        hand = self.hands[games, player]
+        num_cards = self.num_cards[games, player]
+
+        rank, naturals, jesters = self.__choose(
+            hand,
+            num_cards > 0,
+            table_rank,
+            table_count
+        )
+
+        size = naturals + jesters
+        plays = size > 0
+
+        hand[rows, np.minimum(rank, JESTER) - 1] -= naturals
+        hand[:, JESTER - 1] -= jesters
+        num_cards -= size
+
+        self.hands[games, player] = hand
+        self.num_cards[games, player] = num_cards
+
+        self.table_rank[games] = np.where(plays, rank, table_rank)
+        self.table_count[games] = np.where(plays, size, table_count)
+        self.table_owner[games] = np.where(plays, player, table_owner)
+
+        emptied = plays & (num_cards == 0)
+        g, pl = games[emptied], player[emptied]
+        self.finish_order[g, self.num_finished[g]] = pl
+        self.num_finished[g] += 1
+
+        self.turn[games] = (player + 1) % self.num_players
+        self.__finish_games()
+
+        self.steps += 1
+        return
+
+    def __finish_games(self):
+        done = self.active & (self.num_finished == self.num_players - 1)
+        games = np.nonzero(done)[0]
+
+        if len(games) == 0:
+            return
+
+        remaining = np.argmax(self.num_cards[games] > 0, axis=1)
+        self.finish_order[games, self.num_players - 1] = remaining
+        self.num_finished[games] += 1
+        self.active[games] = False
+
+        return
+
+    def __uniform(self, high: np.ndarray) -> np.ndarray:
+        """Uniform integers in [0, high) for every game."""
+        return (self.rng.random(len(high)) * high).astype(np.int16)
+
+    def __choose(self, hand, has_cards, table_rank, table_count):
+        n = len(hand)
+        rows = np.arange(n)
+
+        natural = hand[:, :JESTER - 1]
+        jester = hand[:, JESTER - 1]
+        need = table_count
+        lead = need == 0
+
+        ranks = np.arange(1, JESTER)
+        held = natural > 0
+        follow_ok = (
+            held
+            & (ranks[None, :] < table_rank[:, None])
+            & (natural + jester[:, None] >= need[:, None])
+        )
+        ok = np.where(lead[:, None], held, follow_ok)
+        any_ok = ok.any(axis=1)
+
+        # Highest rank index among the allowed ones, i.e. the worst cards
+        worst = JESTER - 2 - np.argmax(ok[:, ::-1], axis=1)
+
+        if self.policy == 'random':
+            # The last option is leading with Jesters only, or passing
+            extra = (lead & (jester > 0)) | ~lead
+            options = np.concatenate([ok, extra[:, None]], axis=1)
+            scores = np.where(options, self.rng.random(options.shape), -1.0)
+            index = np.argmax(scores, axis=1)
+
+            pick_jesters = lead & (index == JESTER - 1)
+            passes = ~lead & (index == JESTER - 1)
+            index = np.minimum(index, JESTER - 2)
+            count = natural[rows, index]
+
+            size = np.where(lead, 1 + self.__uniform(count + jester), need)
+            size = np.where(pick_jesters, 1 + self.__uniform(jester), size)
+
+            low = np.maximum(1, size - jester)
+            high = np.minimum(count, size)
+            naturals = low + self.__uniform(np.maximum(high - low + 1, 1))
+            naturals = np.where(pick_jesters, 0, naturals)
+
+            rank = np.where(pick_jesters, JESTER, index + 1)
+            jesters = size - naturals
+        else:
+            count = natural[rows, worst]
+
+            if self.policy == 'greedy':
+                naturals = np.where(lead, count, np.minimum(count, need))
+                jesters = np.where(lead, 0, need - naturals)
+            else:
+                naturals = np.where(lead, 1, 0)
+                jesters = np.zeros(n, dtype=np.int16)
+
+            pick_jesters = lead & ~any_ok
+            passes = ~lead & (~any_ok | (self.policy == 'pass'))
+
+            rank = np.where(pick_jesters, JESTER, worst + 1)
+            naturals = np.where(pick_jesters, 0, naturals)
+
+            if self.policy == 'greedy':
+                jesters = np.where(pick_jesters, jester, jesters)
+            else:
+                jesters = np.where(pick_jesters, 1, jesters)
+
+        skip = passes | ~has_cards
+        naturals = np.where(skip, 0, naturals)
+        jesters = np.where(skip, 0, jesters)
+
+        return rank, naturals, jesters
+
+
+def simulate(
+    num_games: int,
+    num_players: int,
+    policy: str,
+    seed: int = None
+) -> np.ndarray:
+    simulator = BatchSimulator(num_games, num_players, policy, seed)
+    return simulator.run()
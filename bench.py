@@ -0,0 +1,745 @@
+import argparse
+import math
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from cards import Card, Deck
+from config import load_config, local_addresses, resolve
+from engine import Phase, Round, play_round
+from mcts import MCTSPolicy
+from game import CountHand, Hand
+from launch import write_config
+from localring import play_local_game
+from moves import EMPTY_TABLE, cache_clear, counts_of, legal_plays, validate_play
+from policy import POLICIES, make_policy
+from ring import END_MARKER, START_MARKER, Message, MessageType
+from solver import TABLE_SIZE, Solver
+from tournament import run_tournament
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Microbenchmarks for the ring-dalmuti hot paths.'
+    )
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    wire = subparsers.add_parser(
+        'wire',
+        help='compare the binary wire format against the pickle path'
+    )
+    wire.add_argument(
+        '-n',
+        '--iterations',
+        type=int,
+        default=100000,
+        help='number of encode/decode operations per frame'
+    )
+    wire.set_defaults(func=bench_wire)
+
+    hand = subparsers.add_parser(
+        'hand',
+        help='compare the list and count-vector Hand representations'
+    )
+    hand.add_argument(
+        '-n',
+        '--games',
+        type=int,
+        default=2000,
+        help='number of random deal-and-play sequences'
+    )
+    hand.add_argument(
+        '-s',
+        '--seed',
+        type=int,
+        default=0,
+        help='seed for the random sequences'
+    )
+    hand.set_defaults(func=bench_hand)
+
+    engine = subparsers.add_parser(
+        'engine',
+        help='measure headless rounds per second'
+    )
+    engine.add_argument(
+        '-n',
+        '--games',
+        type=int,
+        default=5000,
+        help='number of rounds to play on the headless engine'
+    )
+    engine.add_argument(
+        '-l',
+        '--local-games',
+        type=int,
+        default=20,
+        help='number of rounds to play over the in-memory ring'
+    )
+    engine.add_argument(
+        '-p',
+        '--players',
+        type=int,
+        default=4,
+        help='number of players'
+    )
+    engine.add_argument(
+        '--policy',
+        choices=list(POLICIES),
+        default='greedy',
+        help='policy used by every player'
+    )
+    engine.set_defaults(func=bench_engine)
+
+    batch = subparsers.add_parser(
+        'batch',
+        help='compare the NumPy batch simulator against the engine'
+    )
+    batch.add_argument(
+        '-n',
+        '--games',
+        type=int,
+        default=20000,
+        help='number of rounds played in lockstep'
+    )
+    batch.add_argument(
+        '-s',
+        '--scalar-games',
+        type=int,
+        default=2000,
+        help='number of rounds played one at a time on the engine'
+    )
+    batch.add_argument(
+        '-p',
+        '--players',
+        type=int,
+        default=4,
+        help='number of players'
+    )
+    batch.add_argument(
+        '--policy',
+        choices=['greedy', 'random', 'pass'],
+        default='greedy',
+        help='policy used by every player'
+    )
+    batch.set_defaults(func=bench_batch)
+
+    moves = subparsers.add_parser(
+        'moves',
+        help='measure legal move enumeration and validation'
+    )
+    moves.add_argument(
+        '-n',
+        '--positions',
+        type=int,
+        default=20000,
+        help='number of random hand and table positions'
+    )
+    moves.set_defaults(func=bench_moves)
+
+    mcts = subparsers.add_parser(
+        'mcts',
+        help='playouts/s and decision latency of the mcts bot against another policy'
+    )
+    mcts.add_argument(
+        '-n',
+        '--games',
+        type=int,
+        default=12,
+        help='number of rounds per budget, the mcts seat goes around the order'
+    )
+    mcts.add_argument(
+        '-p',
+        '--players',
+        type=int,
+        default=6,
+        help='number of players'
+    )
+    mcts.add_argument(
+        '-b',
+        '--budgets',
+        type=float,
+        nargs='+',
+        default=[0.01, 0.05, 0.1],
+        help='seconds per decision to compare'
+    )
+    mcts.add_argument(
+        '--opponent',
+        choices=[name for name in POLICIES if name != 'mcts'],
+        default='greedy',
+        help='policy of the other players'
+    )
+    mcts.set_defaults(func=bench_mcts)
+
+    solver = subparsers.add_parser(
+        'solver',
+        help='endgame positions solved per second, with a new and a shared table'
+    )
+    solver.add_argument(
+        '-n',
+        '--positions',
+        type=int,
+        default=200,
+        help='number of endgame positions, taken from greedy rounds'
+    )
+    solver.add_argument(
+        '-p',
+        '--players',
+        type=int,
+        default=6,
+        help='number of players'
+    )
+    solver.add_argument(
+        '-c',
+        '--cards',
+        type=int,
+        nargs='+',
+        default=[8, 12, 16],
+        help='cards left in the hands of the positions to compare'
+    )
+    solver.add_argument(
+        '--table',
+        type=int,
+        default=TABLE_SIZE,
+        help='entries of the transposition table'
+    )
+    solver.set_defaults(func=bench_solver)
+
+    startup = subparsers.add_parser(
+        'startup',
+        help='time a node takes to read its configuration, with and without --id'
+    )
+    startup.add_argument(
+        '-n',
+        '--repeat',
+        type=int,
+        default=1000,
+        help='number of times the configuration is read'
+    )
+    startup.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=8,
+        help='number of machines in the configuration'
+    )
+    startup.set_defaults(func=bench_startup)
+
+    tournament = subparsers.add_parser(
+        'tournament',
+        help='measure tournament games per second against the number of workers'
+    )
+    tournament.add_argument(
+        '-p',
+        '--policies',
+        nargs='+',
+        choices=list(POLICIES),
+        default=['greedy', 'random', 'pass', 'greedy'],
+        help='policy of each seat'
+    )
+    tournament.add_argument(
+        '-n',
+        '--games',
+        type=int,
+        default=4000,
+        help='number of games played with every number of workers'
+    )
+    tournament.add_argument(
+        '-r',
+        '--rounds',
+        type=int,
+        default=4,
+        help='rounds per game'
+    )
+    tournament.add_argument(
+        '-c',
+        '--chunk',
+        type=int,
+        default=100,
+        help='games played by a worker per task'
+    )
+    tournament.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        nargs='+',
+        default=worker_counts(os.cpu_count()),
+        help='numbers of worker processes to try'
+    )
+    tournament.set_defaults(func=bench_tournament)
+
+    return parser.parse_args()
+
+
+def worker_counts(cpus: int) -> list:
+    """Powers of two up to ``cpus``, and ``cpus`` itself."""
+    counts = [1]
+    while counts[-1] * 2 < cpus:
+        counts.append(counts[-1] * 2)
+
+    if counts[-1] != cpus:
+        counts.append(cpus)
+
+    return counts
+
+
+def timed(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+
+    return iterations / (time.perf_counter() - start)
+
+
+def legacy_move(move) -> str:
+    # The string payloads game.py used to build before the binary format
+    if len(move) == 0:
+        return ''
+
+    if len(move) == 1 and len(move[0][1]) == 0:
+        return str(move[0][0])
+
+    return ';'.join(f'{id}:{cards}' for id, cards in move)
+
+
+def legacy_parse(move: str):
+    if move == '':
+        return []
+
+    if ':' not in move:
+        return [(int(move), [])]
+
+    groups = []
+    for item in move.split(';'):
+        id, cards = item.split(':')
+        groups.append((int(id), [int(c) for c in cards.strip('[]').split(',')]))
+
+    return groups
+
+
+def legacy_buffer(message: Message) -> list:
+    # The list game.py used to pickle, markers around a string payload
+    return [
+        START_MARKER,
+        message.origin,
+        message.type,
+        legacy_move(message.move),
+        message.recv_confirm,
+        END_MARKER,
+    ]
+
+
+def legacy_message(buffer: list) -> Message:
+    message = Message(buffer[1], buffer[2], legacy_parse(buffer[3]))
+    message.recv_confirm = buffer[4]
+
+    return message
+
+
+def sample_frames():
+    deal = [(id, [(id + i) % 13 + 1 for i in range(20)]) for id in range(1, 5)]
+
+    return {
+        'TOKEN': Message(1, MessageType.TOKEN, [(2, [])]),
+        'PASS': Message(3, MessageType.PASS),
+        'PLAY_CARDS': Message(2, MessageType.PLAY_CARDS, [(2, [7, 7, 13])]),
+        'DEAL': Message(1, MessageType.DEAL, deal),
+    }
+
+
+def bench_wire(args):
+    print(f'{"frame":<12}{"path":<8}{"bytes":>7}{"encode/s":>14}{"decode/s":>14}')
+
+    for name, message in sample_frames().items():
+        def pickle_encode():
+            return pickle.dumps(legacy_buffer(message))
+
+        pickled = pickle_encode()
+
+        def pickle_decode():
+            return legacy_message(pickle.loads(pickled)).move
+
+        encoded = message.encode()
+
+        def binary_encode():
+            return Message(message.origin, message.type, message.move).encode()
+
+        def binary_decode():
+            return Message.decode(encoded).move
+
+        results = [
+            ('pickle', len(pickled), pickle_encode, pickle_decode),
+            ('binary', len(encoded), binary_encode, binary_decode),
+        ]
+
+        for path, size, encode, decode in results:
+            encode_rate = timed(encode, args.iterations)
+            decode_rate = timed(decode, args.iterations)
+            print(f'{name:<12}{path:<8}{size:>7}{encode_rate:>14,.0f}{decode_rate:>14,.0f}')
+
+    return
+
+
+def hand_sequences(games: int, seed: int):
+    # Each sequence is a deal followed by the hand operations Game performs:
+    # revolution check, taxes, then repeatedly playing a group of one rank
+    # and refreshing the interface
+    rng = random.Random(seed)
+    sequences = []
+
+    for _ in range(games):
+        deck = Deck().get_cards().copy()
+        rng.shuffle(deck)
+        dealt = [(p + 1, [c.value for c in deck[p::4]]) for p in range(4)]
+
+        cards = sorted(dealt[0][1])
+        plays = []
+        while cards:
+            value = rng.choice(cards)
+            size = rng.randint(1, cards.count(value))
+            for _ in range(size):
+                cards.remove(value)
+            plays.append(size * [Card(value)])
+
+        given = [Card(rng.randint(1, 13)) for _ in range(2)]
+        sequences.append((dealt, dealt[0][0], given, plays))
+
+    return sequences
+
+
+def run_hand_sequence(hand, dealt, id, given, plays):
+    hand.parse_deal(dealt, id)
+    hand.has_two_jesters()
+
+    best = hand.get_n_best_cards(2)
+    hand.use_cards(best)
+    hand.add_cards(given)
+    hand.get_cards()
+
+    for cards in plays:
+        hand.use_cards(cards)
+        hand.get_cards()
+        hand.is_empty()
+
+    return
+
+
+def bench_hand(args):
+    sequences = hand_sequences(args.games, args.seed)
+
+    print(f'{"hand":<12}{"sequences/s":>14}{"ops/s":>14}')
+
+    for name, cls in [('Hand', Hand), ('CountHand', CountHand)]:
+        ops = 0
+        start = time.perf_counter()
+        for (dealt, id, given, plays) in sequences:
+            run_hand_sequence(cls(), dealt, id, given, plays)
+            ops += 6 + 3 * len(plays)
+
+        elapsed = time.perf_counter() - start
+        print(f'{name:<12}{len(sequences) / elapsed:>14,.0f}{ops / elapsed:>14,.0f}')
+
+    return
+
+
+def bench_engine(args):
+    def policies(seed):
+        rng = random.Random(seed)
+        return {id: make_policy(args.policy, rng) for id in range(1, args.players + 1)}
+
+    print(f'{"runner":<12}{"games":>8}{"games/s":>14}')
+
+    start = time.perf_counter()
+    for seed in range(args.games):
+        play_round(args.players, policies(seed), seed)
+
+    elapsed = time.perf_counter() - start
+    print(f'{"engine":<12}{args.games:>8}{args.games / elapsed:>14,.1f}')
+
+    start = time.perf_counter()
+    for seed in range(args.local_games):
+        play_local_game(args.players, policies(seed), seed)
+
+    elapsed = time.perf_counter() - start
+    print(f'{"local ring":<12}{args.local_games:>8}{args.local_games / elapsed:>14,.1f}')
+
+    return
+
+
+def bench_batch(args):
+    # NumPy is only needed by the batch simulator
+    try:
+        from batch import simulate
+    except ImportError as e:
+        print(f'Error: the batch benchmark needs NumPy, pip install -r requirements.txt ({e})')
+        exit(1)
+
+    order = list(range(1, args.players + 1))
+
+    print(f'{"runner":<12}{"games":>8}{"games/s":>14}')
+
+    start = time.perf_counter()
+    for seed in range(args.scalar_games):
+        rng = random.Random(seed)
+        policies = {id: make_policy(args.policy, rng) for id in order}
+        play_round(args.players, policies, seed, order)
+
+    scalar = args.scalar_games / (time.perf_counter() - start)
+    print(f'{"engine":<12}{args.scalar_games:>8}{scalar:>14,.1f}')
+
+    start = time.perf_counter()
+    simulate(args.games, args.players, args.policy, 0)
+
+    batched = args.games / (time.perf_counter() - start)
+    print(f'{"batch":<12}{args.games:>8}{batched:>14,.1f}')
+    print(f'speedup: {batched / scalar:.1f}x')
+    print('revolutions: batch checks seats from the Greater Dalmuti down, '
+        'the engine checks machine ids, given here in seat order')
+
+    return
+
+
+def move_positions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    cards = [c.value for c in Deck(rng).get_cards()]
+    positions = []
+
+    for _ in range(count):
+        hand = counts_of(rng.sample(cards, rng.randint(1, 20)))
+
+        if rng.random() < 0.3:
+            table = (EMPTY_TABLE, 0)
+        else:
+            table = (rng.randint(2, 13), rng.randint(1, 4))
+
+        positions.append((hand, table))
+
+    return positions
+
+
+def bench_moves(args):
+    positions = move_positions(args.positions)
+
+    print(f'{"operation":<22}{"positions/s":>14}{"moves/s":>14}')
+
+    for name in ['enumerate (cold)', 'enumerate (cached)']:
+        if name == 'enumerate (cold)':
+            cache_clear()
+
+        moves = 0
+        start = time.perf_counter()
+        for (hand, (rank, count)) in positions:
+            moves += len(legal_plays(hand, rank, count))
+
+        elapsed = time.perf_counter() - start
+        print(f'{name:<22}{len(positions) / elapsed:>14,.0f}{moves / elapsed:>14,.0f}')
+
+    plays = [
+        (hand, rank, count, play)
+        for (hand, (rank, count)) in positions
+        for play in legal_plays(hand, rank, count)[:4]
+    ]
+
+    start = time.perf_counter()
+    for (hand, rank, count, play) in plays:
+        validate_play(hand, play, rank, count)
+
+    elapsed = time.perf_counter() - start
+    print(f'{"validate":<22}{"":>14}{len(plays) / elapsed:>14,.0f}')
+
+    return
+
+
+class TimedPolicy():
+    """Delegates to ``policy`` and records how long every decision took."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.latencies = []
+
+    def __timed(self, decide, state, player):
+        start = time.perf_counter()
+        decision = decide(state, player)
+        self.latencies.append(time.perf_counter() - start)
+
+        return decision
+
+    def revolution(self, state, player):
+        return self.__timed(self.policy.revolution, state, player)
+
+    def gd_taxes(self, state, player):
+        return self.__timed(self.policy.gd_taxes, state, player)
+
+    def ld_taxes(self, state, player):
+        return self.__timed(self.policy.ld_taxes, state, player)
+
+    def play(self, state, player):
+        return self.__timed(self.policy.play, state, player)
+
+
+def bench_mcts(args):
+    print(f'{"budget ms":>10}{"decisions":>11}{"playouts/s":>12}{"p50 ms":>9}'
+        f'{"p99 ms":>9}{"max ms":>9}{"position":>10}')
+
+    for budget in args.budgets:
+        positions = []
+        latencies = []
+        playouts = 0
+        seconds = 0.0
+
+        for seed in range(args.games):
+            rng = random.Random(seed)
+            seat = seed % args.players + 1
+
+            mcts = MCTSPolicy(rng, budget)
+            timed = TimedPolicy(mcts)
+
+            policies = {id: make_policy(args.opponent, rng) for id in range(1, args.players + 1)}
+            policies[seat] = timed
+
+            round = play_round(args.players, policies, seed)
+
+            positions.append(round.state.finish_order.index(seat))
+            latencies += timed.latencies
+            playouts += mcts.playouts
+            seconds += mcts.seconds
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+
+        print(f'{budget * 1e3:>10.0f}{len(latencies):>11}{playouts / seconds:>12,.0f}'
+            f'{p50 * 1e3:>9.1f}{p99 * 1e3:>9.1f}{latencies[-1] * 1e3:>9.1f}'
+            f'{sum(positions) / len(positions):>10.2f}')
+
+    print(f'mean finish position of the other players: {(args.players - 1) / 2:.2f}')
+    return
+
+
+def endgame_positions(count: int, num_players: int, cards: int):
+    """States of greedy rounds once at most ``cards`` cards are left to play."""
+    positions = []
+    seed = 0
+
+    while len(positions) < count:
+        policies = {id: make_policy('greedy') for id in range(1, num_players + 1)}
+        round = Round(num_players, policies, random.Random(seed))
+        seed += 1
+
+        while round.phase != Phase.FINISHED:
+            state = round.state
+            if round.phase == Phase.PLAY and sum(state.num_cards.values()) <= cards:
+                break
+
+            round.step()
+
+        # Rounds a single player would end anyway have nothing to solve
+        if round.phase != Phase.FINISHED:
+            positions.append(round.state)
+
+    return positions
+
+
+def bench_solver(args):
+    print(f'{"cards":>6}{"table":>8}{"positions/s":>13}{"nodes/s":>11}'
+        f'{"nodes":>9}{"hit rate":>10}{"evicted":>9}')
+
+    for cards in args.cards:
+        positions = endgame_positions(args.positions, args.players, cards)
+
+        for shared in [False, True]:
+            solver = Solver(args.table)
+            nodes = hits = evictions = 0
+            start = time.perf_counter()
+
+            for state in positions:
+                if not shared:
+                    solver = Solver(args.table)
+
+                solver.solve(state)
+                nodes += solver.nodes
+                hits += solver.hits
+                evictions += solver.evictions
+
+                if shared:
+                    solver.nodes = solver.hits = solver.evictions = 0
+
+            elapsed = time.perf_counter() - start
+            name = 'shared' if shared else 'new'
+            print(f'{cards:>6}{name:>8}{len(positions) / elapsed:>13,.0f}'
+                f'{nodes / elapsed:>11,.0f}{nodes / len(positions):>9,.0f}'
+                f'{hits / max(nodes, 1):>10.1%}{evictions:>9}')
+
+    return
+
+
+def bench_startup(args):
+    directory = tempfile.mkdtemp(prefix='dalmuti-')
+    path = os.path.join(directory, 'config.txt')
+    write_config(path, args.machines)
+
+    print(f'{"step":<24}{"us":>10}')
+
+    def timed(name, read, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            read()
+
+        print(f'{name:<24}{(time.perf_counter() - start) / repeat * 1e6:>10.1f}')
+        return
+
+    def by_id():
+        machine = load_config(path).machine(args.machines)
+        return (resolve(machine.address), resolve(machine.send_address))
+
+    timed('read and check', lambda: load_config(path), args.repeat)
+    timed('read with --id', by_id, args.repeat)
+    timed('local host lookup', local_addresses, min(args.repeat, 20))
+    timed('read by address', lambda: load_config(path).machine(), min(args.repeat, 20))
+
+    os.remove(path)
+    os.rmdir(directory)
+
+    return
+
+
+def bench_tournament(args):
+    print(f'{"workers":<10}{"games":>8}{"games/s":>12}{"speedup":>10}{"efficiency":>12}')
+
+    base = None
+    for workers in args.workers:
+        run = argparse.Namespace(
+            policies=args.policies,
+            games=args.games,
+            rounds=args.rounds,
+            workers=workers,
+            chunk=args.chunk,
+            seed=0,
+            output=None,
+            interval=math.inf
+        )
+
+        start = time.perf_counter()
+        run_tournament(run, show=False)
+        rate = args.games / (time.perf_counter() - start)
+
+        if base is None:
+            base = rate / workers
+
+        print(f'{workers:<10}{args.games:>8}{rate:>12,.0f}'
+            f'{rate / base:>9.2f}x{rate / base / workers:>12.0%}')
+
+    return
+
+
+def main():
+    args = get_args()
+    args.func(args)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
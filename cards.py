@@ -0,0 +1,59 @@
+from enum import Enum
+from random import Random
+from typing import List
+
+
+class Card(Enum):
+    DALMUTI = 1
+    ARCHBISHOP = 2
+    EARL_MARSHAL = 3
+    BARONESS = 4
+    ABBESS = 5
+    KNIGHT = 6
+    SEAMSTRESS = 7
+    MASON = 8
+    COOK = 9
+    SHEPHERDESS = 10
+    STONECUTTER = 11
+    PEASANT = 12
+    JESTER = 13
+
+    def __repr__(self) -> str:
+        return f'{self.value}'
+
+    def __lt__(self, other) -> bool:
+        return self.value < other.value
+
+
+CARDS: List[Card] = list(Card)
+
+
+class Deck():
+    def __init__(self, rng: Random = None, decks: int = 1):
+        self.__rng = rng if rng is not None else Random()
+
+        self.__cards = []
+        for card_type in Card:
+            if card_type != Card.JESTER:
+                self.__cards += decks * card_type.value * [card_type]
+            else:
+                self.__cards += decks * 2 * [card_type]
+
+        self.shuffle()
+        pass
+
+    def shuffle(self):
+        # Sorting on random keys runs in C, unlike the per-card Python loop
+        # of Random.shuffle, and is just as uniform
+        random = self.__rng.random
+        keyed = [(random(), card) for card in self.__cards]
+        keyed.sort()
+
+        self.__cards[:] = [card for (_, card) in keyed]
+        return
+    
+    def get_n_cards(self, n: int) -> List[Card]:
+        return self.__cards[0:n]
+    
+    def get_cards(self):
+        return self.__cards
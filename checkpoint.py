@@ -0,0 +1,283 @@
+import os
+import struct
+import time
+import zlib
+
+from typing import Dict, List, Sequence, Tuple
+
+
+CHECKPOINT_VERSION = 3
+
+# File layout: magic | version u8 | machine u8 | num_players u8 |
+#   num_ranks u8 | game_id u32 | phase u8 | table u16 | seq u16 |
+#   generation u8 | token_holder u8 | has_token u8 | handoff u8 |
+#   had_revolution u8 | settled u8 | taxes_paid u8 | table_owner u8 |
+#   current_player u8 | num_table_cards u8 | num_finished u8 |
+#   num_pending u8 | num_outgoing u8 | num_received u16, then the player
+#   order, the finish order, the table cards and the pending cards, a byte
+#   each, the next seq expected from every machine as u16, the card counts
+#   of this machine and of every player in the order of their ids, a byte
+#   per rank, and the outgoing and received frames, each after its u16 size
+MAGIC = b'DLCP'
+HEADER = struct.Struct('!4sBBBBIBHHBBBBBBBBBBBBBH')
+SEQ = struct.Struct('!H')
+FRAME_SIZE = struct.Struct('!H')
+
+
+def game_id_of(order: Sequence[int], deal: Sequence[Tuple[int, Sequence[int]]]) -> int:
+    """Identifies a round by its player order and the hands dealt.
+
+    Every machine sees both in SETUP and DEAL, so they all get the same id.
+    """
+    data = bytearray(order)
+    for (id, cards) in deal:
+        data += bytes([id, len(cards)]) + bytes(cards)
+
+    return zlib.crc32(data)
+
+
+class Checkpoint():
+    """What a ``Game`` and its ``Ring`` need to go on with a round.
+
+    ``game_id`` tells which round it belongs to and ``phase`` the
+    ``engine.Phase`` value the round was in: REVOLUTION, TAXES or PLAY.
+    ``settled`` tells whether the token settled at the Greater Dalmuti
+    after ROUND_READY, ``taxes_paid`` whether this machine paid its taxes
+    and ``pending`` holds the cards it was given but has not taken yet.
+
+    ``outgoing`` are the encoded frames this machine was about to send,
+    saved with the state they lead to, and ``handoff`` the machine it
+    was about to give the token to, 0 to keep it. ``received`` are the
+    frames the ring received that the game had not taken yet.
+
+    ``expected`` is the next sequence number the ring expects from every
+    origin and ``seq`` the last one it sent, so the other machines take
+    the frames of a restarted machine as new. Hands are count vectors as
+    in ``engine.RoundState``.
+    """
+
+    def __init__(self, machine_id: int, num_players: int):
+        self.machine_id = machine_id
+        self.num_players = num_players
+        self.game_id = 0
+        self.phase = 0
+
+        self.table = 0
+        self.seq = 0
+        self.expected: Dict[int, int] = {}
+        self.generation = 0
+        self.token_holder = 1
+        self.has_token = False
+        self.handoff = 0
+        self.outgoing: List[bytes] = []
+        self.received: List[bytes] = []
+
+        self.player_order: List[int] = []
+        self.had_revolution = False
+        self.settled = False
+        self.taxes_paid = False
+        self.pending: List[int] = []
+        self.table_owner = 0
+        self.table_cards: List[int] = []
+        self.finish_order: List[int] = []
+        self.current_player_index = 0
+        self.hand: List[int] = []
+        self.hands: Dict[int, List[int]] = {}
+
+        pass
+
+    def encode(self) -> bytes:
+        ids = range(1, self.num_players + 1)
+
+        data = bytearray(HEADER.pack(
+            MAGIC,
+            CHECKPOINT_VERSION,
+            self.machine_id,
+            self.num_players,
+            len(self.hand),
+            self.game_id,
+            self.phase,
+            self.table,
+            self.seq,
+            self.generation,
+            self.token_holder,
+            self.has_token,
+            self.handoff,
+            self.had_revolution,
+            self.settled,
+            self.taxes_paid,
+            self.table_owner,
+            self.current_player_index,
+            len(self.table_cards),
+            len(self.finish_order),
+            len(self.pending),
+            len(self.outgoing),
+            len(self.received)
+        ))
+
+        data += bytes(self.player_order)
+        data += bytes(self.finish_order)
+        data += bytes(self.table_cards)
+        data += bytes(self.pending)
+
+        for id in ids:
+            data += SEQ.pack(self.expected.get(id, 1))
+
+        data += bytes(self.hand)
+        for id in ids:
+            data += bytes(self.hands[id])
+
+        for frame in self.outgoing + self.received:
+            data += FRAME_SIZE.pack(len(frame)) + frame
+
+        return bytes(data)
+
+    @staticmethod
+    def decode(data: bytes) -> 'Checkpoint':
+        if len(data) == 0:
+            raise ValueError('No round was checkpointed')
+
+        if len(data) < HEADER.size:
+            raise ValueError('Checkpoint is too short')
+
+        (magic, version, machine_id, num_players, num_ranks, game_id, phase, table,
+            seq, generation, token_holder, has_token, handoff, had_revolution, settled,
+            taxes_paid, table_owner, current_player_index, num_table_cards,
+            num_finished, num_pending, num_outgoing,
+            num_received) = HEADER.unpack_from(data, 0)
+
+        if magic != MAGIC:
+            raise ValueError('Not a checkpoint')
+
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f'Unsupported checkpoint version {version}')
+
+        size = (HEADER.size + num_players + num_finished + num_table_cards + num_pending
+            + num_players * SEQ.size + (num_players + 1) * num_ranks)
+
+        # Frames are as long as their sizes say
+        frames = []
+        offset = size
+        for _ in range(num_outgoing + num_received):
+            if offset + FRAME_SIZE.size > len(data):
+                raise ValueError(f'Checkpoint is {len(data)} bytes, expected more')
+
+            (frame_size,) = FRAME_SIZE.unpack_from(data, offset)
+            offset += FRAME_SIZE.size
+
+            frames.append(bytes(data[offset:offset + frame_size]))
+            offset += frame_size
+
+        if len(data) != offset:
+            raise ValueError(f'Checkpoint is {len(data)} bytes, expected {offset}')
+
+        checkpoint = Checkpoint(machine_id, num_players)
+        checkpoint.game_id = game_id
+        checkpoint.phase = phase
+        checkpoint.table = table
+        checkpoint.seq = seq
+        checkpoint.generation = generation
+        checkpoint.token_holder = token_holder
+        checkpoint.has_token = bool(has_token)
+        checkpoint.handoff = handoff
+        checkpoint.outgoing = frames[:num_outgoing]
+        checkpoint.received = frames[num_outgoing:]
+        checkpoint.had_revolution = bool(had_revolution)
+        checkpoint.settled = bool(settled)
+        checkpoint.taxes_paid = bool(taxes_paid)
+        checkpoint.table_owner = table_owner
+        checkpoint.current_player_index = current_player_index
+
+        offset = HEADER.size
+
+        checkpoint.player_order = list(data[offset:offset + num_players])
+        offset += num_players
+
+        checkpoint.finish_order = list(data[offset:offset + num_finished])
+        offset += num_finished
+
+        checkpoint.table_cards = list(data[offset:offset + num_table_cards])
+        offset += num_table_cards
+
+        checkpoint.pending = list(data[offset:offset + num_pending])
+        offset += num_pending
+
+        for id in range(1, num_players + 1):
+            (checkpoint.expected[id],) = SEQ.unpack_from(data, offset)
+            offset += SEQ.size
+
+        checkpoint.hand = list(data[offset:offset + num_ranks])
+        offset += num_ranks
+
+        for id in range(1, num_players + 1):
+            checkpoint.hands[id] = list(data[offset:offset + num_ranks])
+            offset += num_ranks
+
+        return checkpoint
+
+    pass
+
+
+def read_checkpoint(path: str) -> Checkpoint:
+    with open(path, 'rb') as f:
+        return Checkpoint.decode(f.read())
+
+
+class Checkpointer():
+    """Keeps the latest checkpoint of a game in ``path``.
+
+    Every checkpoint is written to a file aside and renamed over the
+    previous one, so a process that dies while saving leaves either the
+    old checkpoint or the new one, never a mix of both. Checkpoints equal
+    to the last one are not written again. ``writes`` and ``seconds``
+    tell how much saving cost.
+
+    Opening empties the file and ``clear`` empties it once the round is
+    over, so it never holds a round other than the one being played. A
+    checkpoint to restore must be read before its file is opened again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp = f'{path}.tmp'
+        self.last = b''
+
+        self.writes = 0
+        self.seconds = 0.0
+
+        self.__write(b'')
+
+        pass
+
+    def save(self, checkpoint: Checkpoint):
+        start = time.perf_counter()
+
+        data = checkpoint.encode()
+        if data == self.last:
+            return
+
+        self.__write(data)
+        self.last = data
+
+        self.writes += 1
+        self.seconds += time.perf_counter() - start
+
+        return
+
+    def clear(self):
+        self.__write(b'')
+        self.last = b''
+
+        return
+
+    def close(self):
+        return
+
+    def __write(self, data: bytes):
+        with open(self.tmp, 'wb') as f:
+            f.write(data)
+
+        os.replace(self.tmp, self.path)
+        return
+
+    pass
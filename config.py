@@ -0,0 +1,223 @@
+import socket
+import time
+
+from typing import Dict, List, Optional, Tuple
+
+from ring import MAX_MACHINES
+
+
+MIN_MACHINES = 4
+
+MACHINE_KEYS = ['ADDRESS', 'SEND_ADDRESS', 'SEND_PORT', 'RECV_PORT']
+
+
+class ConfigError(ValueError):
+    pass
+
+
+# Addresses by host name, every name is looked up once per process
+_resolved: Dict[str, str] = {}
+
+
+def resolve(host: str) -> str:
+    """The IPv4 address of ``host``, without a lookup when it already is one."""
+    address = _resolved.get(host)
+    if address is not None:
+        return address
+
+    try:
+        socket.inet_pton(socket.AF_INET, host)
+        address = host
+    except OSError:
+        try:
+            address = socket.gethostbyname(host)
+        except OSError as e:
+            raise ConfigError(f'Cannot resolve {host}: {e}')
+
+    _resolved[host] = address
+    return address
+
+
+def local_addresses() -> List[str]:
+    """Addresses of this host, found from its name, which may take a DNS lookup."""
+    addresses = ['127.0.0.1']
+
+    try:
+        addresses += socket.gethostbyname_ex(socket.gethostname())[2]
+    except OSError:
+        pass
+
+    return addresses
+
+
+class MachineConfig():
+    def __init__(self, id: int):
+        self.id = id
+        self.address = None
+        self.send_address = None
+        self.send_port = None
+        self.recv_port = None
+
+        pass
+
+    pass
+
+
+class RingConfig():
+    """Every machine of a ring configuration, parsed and checked at once.
+
+    The file starts with ``NUM_MACHINES n`` and has a ``MACHINE id`` block
+    for each machine, with one ``KEY value`` line per ``MACHINE_KEYS``, in
+    any order. Blank lines and ``#`` comments are skipped. The ring must
+    be closed: every machine sends to the address and receive port of the
+    machine with the next id, and the last one to the first.
+
+    An optional ``MULTICAST group:port`` line gives the group the hybrid
+    transport broadcasts to, which sends to every machine in turn without
+    it. ``seconds`` is how long parsing and checking took. Addresses are
+    resolved by ``resolve``, and the local host is only looked up when a
+    machine must be found by its address.
+    """
+
+    def __init__(self, path: str):
+        start = time.perf_counter()
+
+        self.path = path
+        self.num_machines = 0
+        self.machines: Dict[int, MachineConfig] = {}
+        self.multicast: Optional[Tuple[str, int]] = None
+
+        try:
+            with open(path) as f:
+                self.__parse(f.read())
+        except OSError as e:
+            raise ConfigError(f'Cannot read {path}: {e.strerror}')
+
+        self.__validate()
+        self.seconds = time.perf_counter() - start
+
+        pass
+
+    def machine(self, id: Optional[int] = None) -> MachineConfig:
+        """Machine ``id``, or the one whose address is one of this host."""
+        if id is not None:
+            if id not in self.machines:
+                raise ConfigError(f'Machine {id} is not in {self.path}')
+
+            return self.machines[id]
+
+        local = set(local_addresses())
+        for machine in self.machines.values():
+            if resolve(machine.address) in local:
+                return machine
+
+        raise ConfigError(f'No machine of {self.path} has an address of this host')
+
+    def peers(self) -> Dict[int, Tuple[str, int]]:
+        """The resolved address and receive port of every machine, by id."""
+        return {
+            id: (resolve(machine.address), machine.recv_port)
+            for (id, machine) in self.machines.items()
+        }
+
+    def __parse(self, text: str):
+        machine = None
+
+        for (number, line) in enumerate(text.split('\n'), 1):
+            words = line.split('#', 1)[0].split()
+            if not words:
+                continue
+
+            if len(words) != 2:
+                raise ConfigError(f'{self.path}:{number}: expected KEY value, got {line.strip()!r}')
+
+            (key, value) = words
+
+            if key == 'NUM_MACHINES':
+                self.num_machines = self.__int(value, number)
+            elif key == 'MACHINE':
+                id = self.__int(value, number)
+                if id in self.machines:
+                    raise ConfigError(f'{self.path}:{number}: machine {id} is repeated')
+
+                machine = MachineConfig(id)
+                self.machines[id] = machine
+            elif key == 'MULTICAST':
+                self.multicast = self.__group(value, number)
+            elif key in MACHINE_KEYS:
+                if machine is None:
+                    raise ConfigError(f'{self.path}:{number}: {key} outside of a MACHINE')
+
+                if key.endswith('PORT'):
+                    port = self.__int(value, number)
+                    if port < 1 or port > 65535:
+                        raise ConfigError(f'{self.path}:{number}: port {port} is out of range')
+
+                    setattr(machine, key.lower(), port)
+                else:
+                    setattr(machine, key.lower(), value)
+            else:
+                raise ConfigError(f'{self.path}:{number}: unknown key {key}')
+
+        return
+
+    def __int(self, value: str, number: int) -> int:
+        try:
+            return int(value)
+        except ValueError:
+            raise ConfigError(f'{self.path}:{number}: {value!r} is not a number')
+
+    def __group(self, value: str, number: int) -> Tuple[str, int]:
+        (group, _, port) = value.rpartition(':')
+
+        try:
+            first = socket.inet_aton(group)[0]
+        except OSError:
+            raise ConfigError(f'{self.path}:{number}: expected MULTICAST group:port, got {value!r}')
+
+        if first < 224 or first > 239:
+            raise ConfigError(f'{self.path}:{number}: {group} is not a multicast group')
+
+        port = self.__int(port, number)
+        if port < 1 or port > 65535:
+            raise ConfigError(f'{self.path}:{number}: port {port} is out of range')
+
+        return (group, port)
+
+    def __validate(self):
+        n = self.num_machines
+
+        if n < MIN_MACHINES or n > MAX_MACHINES:
+            raise ConfigError(
+                f'NUM_MACHINES must be between {MIN_MACHINES} and {MAX_MACHINES}, got {n}'
+            )
+
+        if sorted(self.machines) != list(range(1, n + 1)):
+            raise ConfigError(
+                f'Expected machines 1 to {n}, got {sorted(self.machines)}'
+            )
+
+        for machine in self.machines.values():
+            for key in MACHINE_KEYS:
+                if getattr(machine, key.lower()) is None:
+                    raise ConfigError(f'Machine {machine.id} has no {key}')
+
+        for machine in self.machines.values():
+            next = self.machines[machine.id % n + 1]
+
+            # Names are only looked up when they are not written the same
+            if (machine.send_port != next.recv_port
+                    or (machine.send_address != next.address
+                        and resolve(machine.send_address) != resolve(next.address))):
+                raise ConfigError(
+                    f'Machine {machine.id} sends to {machine.send_address}:{machine.send_port}, '
+                    f'not to machine {next.id} at {next.address}:{next.recv_port}'
+                )
+
+        return
+
+    pass
+
+
+def load_config(path: str) -> RingConfig:
+    return RingConfig(path)
@@ -0,0 +1,455 @@
+from enum import Enum
+from random import Random
+from typing import Dict, List, Sequence
+
+from cards import Deck
+from moves import (EMPTY_TABLE, JESTER, NUM_RANKS, Play, is_legal_play, legal_plays, num_decks,
+    play_rank, tax_tiers)
+
+
+class Phase(Enum):
+    SETUP = 1
+    DEAL = 2
+    REVOLUTION = 3
+    TAXES = 4
+    PLAY = 5
+    FINISHED = 6
+
+
+class RoundState():
+    """What is known about a round while it is being played.
+
+    Hands are count vectors: ``hands[id][value - 1]`` is how many cards of
+    that ``Card`` value player ``id`` holds, and ``played`` counts the cards
+    played in the round so far. ``table_count`` is 0 while the table is
+    empty, and then the next player must lead.
+    """
+
+    def __init__(self, num_players: int):
+        self.num_players = num_players
+        self.order: List[int] = []
+        self.hands: Dict[int, List[int]] = {}
+        self.num_cards: Dict[int, int] = {}
+        self.table_rank = EMPTY_TABLE
+        self.table_count = 0
+        self.table_owner = 0
+        self.turn = 0
+        self.finish_order: List[int] = []
+        self.played: List[int] = [0] * NUM_RANKS
+
+    def clear_table(self):
+        self.table_rank = EMPTY_TABLE
+        self.table_count = 0
+        self.table_owner = 0
+
+        return
+
+
+def best_cards(hand: List[int], n: int) -> List[int]:
+    cards = []
+    for (i, count) in enumerate(hand):
+        if len(cards) + count >= n:
+            return cards + (n - len(cards)) * [i + 1]
+
+        cards += count * [i + 1]
+
+    return cards
+
+
+def worst_cards(hand: List[int], n: int) -> List[int]:
+    """The ``n`` highest natural cards, then Jesters when they run out.
+
+    Jesters beat anything they join, so they are only given away or led
+    alone when the hand holds nothing else.
+    """
+    cards = []
+    for i in list(range(JESTER - 2, -1, -1)) + [JESTER - 1]:
+        count = hand[i]
+        if len(cards) + count >= n:
+            return cards + (n - len(cards)) * [i + 1]
+
+        cards += count * [i + 1]
+
+    return cards
+
+
+def has_cards(hand: List[int], cards: List[int]) -> bool:
+    for card in set(cards):
+        if hand[card - 1] < cards.count(card):
+            return False
+
+    return True
+
+
+def tax_transfers(
+    order: List[int],
+    hands: Dict[int, List[int]],
+    chosen: Dict[int, List[int]] = None
+) -> List[tuple]:
+    """The ``(giver, receiver, cards)`` of every tier of taxes.
+
+    Peons pay their best cards first, then the Dalmutis give back the cards
+    in ``chosen`` by their id, their worst cards if they chose none.
+    """
+    tiers = tax_tiers(len(order))
+    chosen = chosen if chosen is not None else {}
+
+    transfers = [
+        (order[-1 - tier], order[tier], best_cards(hands[order[-1 - tier]], n))
+        for (tier, n) in enumerate(tiers)
+    ]
+
+    for (tier, n) in enumerate(tiers):
+        dalmuti = order[tier]
+        cards = chosen.get(dalmuti)
+        transfers.append((
+            dalmuti,
+            order[-1 - tier],
+            cards if cards is not None else worst_cards(hands[dalmuti], n)
+        ))
+
+    return transfers
+
+
+class Policy():
+    """Takes the decisions of one player.
+
+    Every method gets the ``RoundState`` and the id of the player deciding,
+    and must only look at that player's hand and the public fields of the
+    state. Cards are ``Card`` values; ``play`` returns an empty list to pass,
+    which is not allowed while the table is empty. ``gd_taxes`` chooses the
+    taxes of the Greater Dalmuti and ``ld_taxes`` those of every other tier
+    of ``moves.tax_tiers``.
+    """
+
+    def revolution(self, state: RoundState, player: int) -> bool:
+        return False
+
+    def gd_taxes(self, state: RoundState, player: int) -> List[int]:
+        return worst_cards(state.hands[player], 2)
+
+    def ld_taxes(self, state: RoundState, player: int) -> List[int]:
+        return worst_cards(state.hands[player], 1)
+
+    def play(self, state: RoundState, player: int) -> List[int]:
+        raise NotImplementedError
+
+
+PASS: Play = ()
+
+
+class PlayState():
+    """The tricks of a round, with moves that are made and taken back in place.
+
+    Only players who still hold cards are ever to move: ``make`` skips the
+    others, clearing the table when the turn comes back to its owner, and
+    ends the round once a single player holds cards. ``unmake`` takes back
+    the last move, so a playout runs on one state without copying it.
+    """
+
+    def __init__(
+        self,
+        order: List[int],
+        hands: Dict[int, List[int]],
+        table_rank: int = EMPTY_TABLE,
+        table_count: int = 0,
+        table_owner: int = 0,
+        turn: int = 0,
+        finish_order: List[int] = None
+    ):
+        self.order = order
+        self.num_players = len(order)
+        self.hands = hands
+        self.num_cards = {id: sum(hand) for id, hand in hands.items()}
+
+        self.table_rank = table_rank
+        self.table_count = table_count
+        self.table_owner = table_owner
+        self.turn = turn
+        self.finish_order = finish_order if finish_order is not None else []
+
+        self.undo: List[tuple] = []
+        self.__settle()
+
+        pass
+
+    @property
+    def player(self) -> int:
+        return self.order[self.turn]
+
+    def is_over(self) -> bool:
+        return len(self.finish_order) == self.num_players
+
+    def actions(self) -> List[Play]:
+        plays = list(legal_plays(self.hands[self.player], self.table_rank, self.table_count))
+
+        if self.table_count != 0:
+            plays.append(PASS)
+
+        return plays
+
+    def make(self, play: Sequence[int]):
+        player = self.order[self.turn]
+
+        self.undo.append((
+            self.turn,
+            self.table_rank,
+            self.table_count,
+            self.table_owner,
+            len(self.finish_order),
+            play
+        ))
+
+        if play:
+            hand = self.hands[player]
+            for card in play:
+                hand[card - 1] -= 1
+
+            self.num_cards[player] -= len(play)
+            self.table_rank = play_rank(play)
+            self.table_count = len(play)
+            self.table_owner = player
+
+            if self.num_cards[player] == 0:
+                self.finish_order.append(player)
+
+                if len(self.finish_order) == self.num_players - 1:
+                    self.finish_order += [id for id in self.order if self.num_cards[id] != 0]
+                    return
+
+        self.turn = (self.turn + 1) % self.num_players
+        self.__settle()
+
+        return
+
+    def unmake(self):
+        (self.turn, self.table_rank, self.table_count, self.table_owner,
+            finished, play) = self.undo.pop()
+
+        del self.finish_order[finished:]
+
+        if play:
+            player = self.order[self.turn]
+            hand = self.hands[player]
+            for card in play:
+                hand[card - 1] += 1
+
+            self.num_cards[player] += len(play)
+
+        return
+
+    def unmake_all(self):
+        while self.undo:
+            self.unmake()
+
+        return
+
+    def rewards(self) -> Dict[int, float]:
+        """1 for the first to finish down to 0 for the last."""
+        last = self.num_players - 1
+        return {id: (last - i) / last for (i, id) in enumerate(self.finish_order)}
+
+    def __settle(self):
+        while not self.is_over():
+            player = self.order[self.turn]
+
+            if self.table_owner == player:
+                self.table_rank = EMPTY_TABLE
+                self.table_count = 0
+                self.table_owner = 0
+
+            if self.num_cards[player] != 0:
+                return
+
+            self.turn = (self.turn + 1) % self.num_players
+
+        return
+
+    pass
+
+
+class Round():
+    """One round of The Great Dalmuti played without a ring or a terminal.
+
+    Follows the rules of ``game.Game``: the initial card draw sets the order
+    (unless ``order`` is given, e.g. the finish order of a previous round),
+    the deck is dealt starting from the Greater Dalmuti, players holding two
+    Jesters may call a revolution in machine id order, taxes are paid in
+    every tier of ``moves.tax_tiers`` when there was none, and tricks are played until every player has emptied
+    their hand. Decisions are taken by ``policies``, one per player id.
+
+    Every call to ``step`` advances one phase, or one turn while playing.
+    """
+
+    def __init__(
+        self,
+        num_players: int,
+        policies: Dict[int, Policy],
+        rng: Random = None,
+        order: List[int] = None
+    ):
+        self.num_players = num_players
+        self.policies = policies
+        self.rng = rng if rng is not None else Random()
+        self.deck = Deck(self.rng, num_decks(num_players))
+        self.state = RoundState(num_players)
+        self.phase = Phase.SETUP
+
+        self.initial_order = order
+        self.revolution = 0
+        self.great_revolution = False
+        self.transfers: List[tuple] = []
+
+        return
+
+    def run(self) -> List[int]:
+        while self.phase != Phase.FINISHED:
+            self.step()
+
+        return self.state.finish_order
+
+    def step(self):
+        if self.phase == Phase.PLAY:
+            self.__play_turn()
+        elif self.phase == Phase.SETUP:
+            self.__setup()
+        elif self.phase == Phase.DEAL:
+            self.__deal()
+        elif self.phase == Phase.REVOLUTION:
+            self.__check_revolution()
+        elif self.phase == Phase.TAXES:
+            self.__pay_taxes()
+
+        return
+
+    def __setup(self):
+        if self.initial_order is not None:
+            self.state.order = list(self.initial_order)
+        else:
+            cards = self.deck.get_n_cards(self.num_players)
+            self.state.order = sorted(
+                range(1, self.num_players + 1),
+                key=lambda id: cards[id - 1].value
+            )
+
+        self.phase = Phase.DEAL
+        return
+
+    def __deal(self):
+        state = self.state
+        order = state.order
+
+        self.deck.shuffle()
+
+        hands = {id: [0] * NUM_RANKS for id in order}
+        for (i, card) in enumerate(self.deck.get_cards()):
+            hands[order[i % self.num_players]][card.value - 1] += 1
+
+        state.hands = hands
+        state.num_cards = {id: sum(hand) for id, hand in hands.items()}
+
+        self.phase = Phase.REVOLUTION
+        return
+
+    def __check_revolution(self):
+        state = self.state
+
+        for id in range(1, self.num_players + 1):
+            if state.hands[id][JESTER - 1] < 2:
+                continue
+
+            if not self.policies[id].revolution(state, id):
+                continue
+
+            self.revolution = id
+            if id == state.order[-1]:
+                self.great_revolution = True
+                state.order.reverse()
+
+            break
+
+        self.phase = Phase.PLAY if self.revolution else Phase.TAXES
+        return
+
+    def __pay_taxes(self):
+        state = self.state
+        chosen = {}
+
+        # Every tax is chosen from the hands as they were dealt, like on the
+        # ring where received cards are only added once ROUND_READY arrives
+        for (tier, n) in enumerate(tax_tiers(self.num_players)):
+            dalmuti = state.order[tier]
+            policy = self.policies[dalmuti]
+
+            if tier == 0:
+                cards = policy.gd_taxes(state, dalmuti)
+            else:
+                cards = policy.ld_taxes(state, dalmuti)
+
+            if len(cards) != n or not has_cards(state.hands[dalmuti], cards):
+                raise ValueError(f'Player {dalmuti} chose invalid taxes {cards}')
+
+            chosen[dalmuti] = cards
+
+        self.transfers = tax_transfers(state.order, state.hands, chosen)
+
+        for (giver, _, cards) in self.transfers:
+            for card in cards:
+                state.hands[giver][card - 1] -= 1
+
+        for (_, receiver, cards) in self.transfers:
+            for card in cards:
+                state.hands[receiver][card - 1] += 1
+
+        self.phase = Phase.PLAY
+        return
+
+    def __play_turn(self):
+        state = self.state
+        player = state.order[state.turn]
+
+        if state.table_owner == player:
+            state.clear_table()
+
+        if state.num_cards[player] != 0:
+            cards = self.policies[player].play(state, player)
+            hand = state.hands[player]
+
+            if not is_legal_play(hand, cards, state.table_rank, state.table_count):
+                raise ValueError(f'Player {player} made an illegal play {cards}')
+
+            if cards:
+                for card in cards:
+                    hand[card - 1] -= 1
+                    state.played[card - 1] += 1
+
+                state.num_cards[player] -= len(cards)
+                state.table_rank = play_rank(cards)
+                state.table_count = len(cards)
+                state.table_owner = player
+
+                if state.num_cards[player] == 0:
+                    state.finish_order.append(player)
+
+        state.turn = (state.turn + 1) % self.num_players
+
+        if len(state.finish_order) == self.num_players - 1:
+            for id in state.order:
+                if state.num_cards[id] != 0:
+                    state.finish_order.append(id)
+
+            self.phase = Phase.FINISHED
+
+        return
+
+
+def play_round(
+    num_players: int,
+    policies: Dict[int, Policy],
+    seed: int = None,
+    order: List[int] = None
+) -> Round:
+    round = Round(num_players, policies, Random(seed), order)
+    round.run()
+
+    return round
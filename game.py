@@ -1,71 +1,37 @@
 import logging
 
 from bisect import insort
-from enum import Enum
-from random import shuffle
-from typing import List
+from random import Random
+from typing import Dict, List, Optional, Tuple
 
+from cards import CARDS, Card, Deck
+from checkpoint import Checkpoint, Checkpointer, game_id_of
+from engine import Phase, Policy, RoundState, has_cards
 from interface import Interface
-from ring import Ring, Message, MessageType
+from journal import Journal, JournalEvent
+from moves import EMPTY_TABLE, counts_of, deck_counts, num_decks, play_rank, tax_tiers, validate_play
+from ring import ResyncError, Ring, Message, MessageType, Move
 
 
-class Card(Enum):
-    DALMUTI = 1
-    ARCHBISHOP = 2
-    EARL_MARSHAL = 3
-    BARONESS = 4
-    ABBESS = 5
-    KNIGHT = 6
-    SEAMSTRESS = 7
-    MASON = 8
-    COOK = 9
-    SHEPHERDESS = 10
-    STONECUTTER = 11
-    PEASANT = 12
-    JESTER = 13
+# Tax tiers past these are numbered, e.g. Lesser Peon 2
+TIER_NAMES = ['Greater', 'Lesser']
 
-    def __repr__(self) -> str:
-        return f'{self.value}'
-
-    def __lt__(self, other) -> bool:
-        return self.value < other.value
-
-
-class Deck():
-    def __init__(self):
-        self.__cards = []
-        for card_type in Card:
-            if card_type != Card.JESTER:
-                self.__cards += card_type.value * [card_type]
-            else:
-                self.__cards += 2 * [card_type]
-
-        self.shuffle()
-        pass
-
-    def shuffle(self):
-        shuffle(self.__cards)
-        return
-    
-    def get_n_cards(self, n: int) -> List[Card]:
-        return self.__cards[0:n]
-    
-    def get_cards(self):
-        return self.__cards
+# Steps of a round a restarted machine can take up again
+RESUMABLE_PHASES = (Phase.REVOLUTION.value, Phase.TAXES.value, Phase.PLAY.value)
 
 
 class Deal():
-    def __init__(self, num_players: int):
+    def __init__(self, num_players: int, rng: Random = None):
         self.num_players = num_players
 
         self.players: List[Player] = []
         for p in range(num_players):
             self.players.append(Player(p+1))
 
-        self.deck = Deck()
+        self.deck = Deck(rng, num_decks(num_players))
         return
 
-    def setup(self) -> str:
+    def setup(self) -> Move:
         cards = self.deck.get_n_cards(self.num_players)
 
         for (i, card) in enumerate(cards):
@@ -73,23 +39,15 @@ class Deal():
 
         self.players.sort(key=lambda p: p.initial_card.value)
 
-        players= ''
-        for player in self.players:
-            players += f'{player.id}:{player.initial_card.value},'
-
-        return players[:-1]
+        return [(p.id, [p.initial_card.value]) for p in self.players]
 
-    def deal(self) -> str:
+    def deal(self) -> Move:
         self.deck.shuffle()
         cards = self.deck.get_cards()
         for (i, card) in enumerate(cards):
             self.players[i%self.num_players].add_card(card)
 
-        data=''
-        for player in self.players:
-            data += f'{player.id}:{player.cards};'
-
-        return data[:-1]
+        return [(p.id, [c.value for c in p.cards]) for p in self.players]
 
         
 class Player():
@@ -156,11 +114,10 @@ class Hand():
     def has_two_jesters(self):
         return self.__cards.count(Card.JESTER) >= 2
     
-    def parse_deal(self, card_string: str, machine_id: int):
-        for item in card_string.split(';'):
-            id, cards_str = item.split(':')
-            if machine_id == int(id):
-                self.__cards = [Card(int(value)) for value in cards_str.strip('[]').split(',')]
+    def parse_deal(self, deal: Move, machine_id: int):
+        for id, cards in deal:
+            if machine_id == id:
+                self.__cards = [Card(value) for value in cards]
                 self.__cards.sort()
                 return
             
@@ -169,49 +126,335 @@ class Hand():
     def is_empty(self):
         return len(self.__cards) == 0
     
-    def parse_given_cards(self, card_str: str):
-        id, cards = card_str.split(':')
-        id = int(id)
+    def parse_given_cards(self, move: Move):
+        id, cards = move[0]
 
-        cards = [Card(int(c)) for c in cards.strip('[]').split(',')]
+        cards = [Card(c) for c in cards]
         return id, cards
 
     def get_n_best_cards(self, n = 1) -> Card:
         return self.__cards[:n]
 
 
+class CountHand():
+    """Hand stored as the number of cards held of each rank.
+
+    Slot ``value - 1`` holds how many cards of that ``Card`` value are in the
+    hand, so adding, removing and counting a card are O(1) and picking the
+    best N cards is O(13). It keeps the same interface as ``Hand``.
+    """
+
+    def __init__(self):
+        self.__counts: List[int] = [0] * len(Card)
+        self.__total = 0
+
+    @staticmethod
+    def from_cards(cards: List[Card]) -> 'CountHand':
+        hand = CountHand()
+        hand.add_cards(cards)
+
+        return hand
+
+    def to_hand(self) -> Hand:
+        hand = Hand()
+        hand.add_cards(self.get_cards())
+
+        return hand
+
+    def get_counts(self) -> List[int]:
+        return self.__counts
+
+    def get_cards(self) -> List[Card]:
+        cards = []
+        for (card, count) in zip(CARDS, self.__counts):
+            if count:
+                cards += count * [card]
+
+        return cards
+
+    def get_cards_by_copy(self) -> List[Card]:
+        return self.get_cards()
+
+    def count(self, card: int) -> int:
+        if isinstance(card, Card):
+            card = card.value
+
+        return self.__counts[card - 1]
+
+    def has_card(self, card: int) -> bool:
+        return self.count(card) > 0
+
+    def add_card(self, card: int):
+        if isinstance(card, Card):
+            card = card.value
+
+        self.__counts[card - 1] += 1
+        self.__total += 1
+
+        return
+
+    def add_cards(self, cards: List[int]):
+        for card in cards:
+            self.add_card(card)
+
+        return
+
+    def get_num_cards(self) -> int:
+        return self.__total
+
+    def use_card_on_index(self, index: int) -> Card:
+        for (i, count) in enumerate(self.__counts):
+            if index < count:
+                self.__counts[i] -= 1
+                self.__total -= 1
+                return Card(i + 1)
+
+            index -= count
+
+        raise IndexError('hand index out of range')
+
+    def use_card(self, card: int):
+        if self.__counts[card - 1] == 0:
+            return
+
+        self.__counts[card - 1] -= 1
+        self.__total -= 1
+
+        return
+
+    def use_cards(self, cards: List[Card]):
+        for card in cards:
+            self.use_card(card.value)
+
+        return
+
+    def has_two_jesters(self):
+        return self.__counts[Card.JESTER.value - 1] >= 2
+
+    def parse_deal(self, deal: Move, machine_id: int):
+        for id, cards in deal:
+            if machine_id == id:
+                self.__counts = [0] * len(Card)
+                self.__total = 0
+                self.add_cards(cards)
+                return
+
+        return
+
+    def is_empty(self):
+        return self.__total == 0
+
+    def parse_given_cards(self, move: Move):
+        id, cards = move[0]
+
+        cards = [Card(c) for c in cards]
+        return id, cards
+
+    def get_n_best_cards(self, n = 1) -> List[Card]:
+        cards = []
+        for (card, count) in zip(CARDS, self.__counts):
+            if len(cards) + count >= n:
+                return cards + (n - len(cards)) * [card]
+
+            cards += count * [card]
+
+        return cards
+
+
 class Game:
-    def __init__(self, ring: Ring, num_players: int):
+    def __init__(
+        self,
+        ring: Ring,
+        num_players: int,
+        policy: Policy = None,
+        interface: Interface = None,
+        rng: Random = None,
+        journal: Journal = None,
+        checkpointer: Checkpointer = None
+    ):
         self.__num_players = num_players
         self.__ring = ring
-        self.__hand = Hand()
+        self.__hand = CountHand()
         self.__had_revolution = False
         self.__table_cards: List[Card] = []
         self.__table_owner: int = 0
         self.__finish_order: List[int] = [] 
-        self.__interface = Interface(self.__ring.machine_id)
         self.__current_player_index: int = 0
 
+        # Every hand is known from the DEAL broadcast, and kept up to date
+        # with the taxes and plays seen on the ring to check remote moves
+        self.__hands: Dict[int, List[int]] = {}
+
+        # Decisions are asked on the terminal unless a policy takes them
+        self.__policy = policy
+        self.__rng = rng
+
+        if interface is None:
+            interface = Interface(self.__ring.machine_id)
+
+        self.__interface = interface
+
+        # Every event applied to the game is appended here when given
+        self.__journal = journal
+
+        # Saved whenever the round waits for the ring, when given
+        self.__checkpointer = checkpointer
+        self.__restored = False
+        self.__game_id = 0
+        self.__phase = Phase.SETUP
+
+        # Frames about to be sent and the machine about to get the token,
+        # saved before they go out
+        self.__outgoing: List[bytes] = []
+        self.__handoff = 0
+
+        # Whether the token settled at the Greater Dalmuti after ROUND_READY,
+        # whether this machine paid its taxes and the cards it was given,
+        # only added to its hand once every tax is paid
+        self.__settled = False
+        self.__taxes_paid = False
+        self.__pending_cards: List[Card] = []
+
     def get_player_rank(self):
-        rank = self.__player_order.index(self.__ring.machine_id)
+        return self.__rank_name(self.__player_order.index(self.__ring.machine_id))
 
-        if rank == 0:
-            return 'Greater Dalmuti'
-        elif rank == 1:
-            return 'Lesser Dalmuti'
-        elif rank == self.__num_players - 1:
-            return 'Greater Peon'
-        elif rank == self.__num_players - 2:
-            return 'Lesser Peon'
+    def __rank_name(self, position: int) -> str:
+        """Name of ``position`` in the order, one Dalmuti and Peon per tax tier."""
+        tiers = len(tax_tiers(self.__num_players))
+        from_end = self.__num_players - 1 - position
 
-        return f'Merchant {rank - 1}'
+        if position < tiers:
+            (tier, title) = (position, 'Dalmuti')
+        elif from_end < tiers:
+            (tier, title) = (from_end, 'Peon')
+        else:
+            return f'Merchant {position - tiers + 1}'
+
+        if tier < len(TIER_NAMES):
+            return f'{TIER_NAMES[tier]} {title}'
+
+        return f'Lesser {title} {tier}'
+
+    def get_finish_order(self) -> List[int]:
+        return self.__finish_order
+
+    def get_game_id(self) -> int:
+        return self.__game_id
+
+    def checkpoint_state(self) -> Checkpoint:
+        ring = self.__ring
+        checkpoint = Checkpoint(ring.machine_id, self.__num_players)
+        checkpoint.game_id = self.__game_id
+        checkpoint.phase = self.__phase.value
+
+        checkpoint.table = ring.table
+        checkpoint.seq = ring.seq
+        checkpoint.expected = ring.reorderer.expected.copy()
+        checkpoint.generation = ring.generation
+        checkpoint.token_holder = ring.token_holder
+        checkpoint.has_token = ring.has_token
+        checkpoint.handoff = self.__handoff
+        checkpoint.outgoing = self.__outgoing.copy()
+        checkpoint.received = ring.received_frames()
+
+        checkpoint.player_order = self.__player_order.copy()
+        checkpoint.had_revolution = self.__had_revolution
+        checkpoint.settled = self.__settled
+        checkpoint.taxes_paid = self.__taxes_paid
+        checkpoint.pending = [c.value for c in self.__pending_cards]
+        checkpoint.table_owner = self.__table_owner
+        checkpoint.table_cards = [c.value for c in self.__table_cards]
+        checkpoint.finish_order = self.__finish_order.copy()
+        checkpoint.current_player_index = self.__current_player_index
+        checkpoint.hand = self.__hand.get_counts().copy()
+        checkpoint.hands = {id: hand.copy() for id, hand in self.__hands.items()}
+
+        return checkpoint
+
+    def restore_state(self, checkpoint: Checkpoint, game_id: int = None):
+        """Goes on with the round of ``checkpoint``, ``run`` skips SETUP and DEAL.
+
+        ``run`` first sends the frames and the token the checkpoint was
+        saved to send, as they were, then picks the round up at the
+        revolutions, the taxes or the tricks, wherever it was saved. A
+        checkpoint of another round than ``game_id`` is refused when it is
+        given.
+        """
+        if checkpoint.machine_id != self.__ring.machine_id:
+            raise ValueError(
+                f'Checkpoint of machine {checkpoint.machine_id} given to machine {self.__ring.machine_id}'
+            )
+
+        if checkpoint.num_players != self.__num_players:
+            raise ValueError(
+                f'Checkpoint of {checkpoint.num_players} players given to a game of {self.__num_players}'
+            )
+
+        if game_id is not None and checkpoint.game_id != game_id:
+            raise ValueError(f'Checkpoint of game {checkpoint.game_id:08x}, not of game {game_id:08x}')
+
+        if checkpoint.phase not in RESUMABLE_PHASES:
+            raise ValueError(f'Checkpoint of a round in phase {checkpoint.phase}, which cannot be resumed')
+
+        self.__ring.restore(
+            checkpoint.seq,
+            checkpoint.expected,
+            checkpoint.generation,
+            checkpoint.token_holder,
+            checkpoint.has_token,
+            checkpoint.received
+        )
+
+        self.__outgoing = checkpoint.outgoing.copy()
+        self.__handoff = checkpoint.handoff
+
+        self.__player_order = checkpoint.player_order.copy()
+        self.__game_id = checkpoint.game_id
+        self.__phase = Phase(checkpoint.phase)
+        self.__had_revolution = checkpoint.had_revolution
+        self.__settled = checkpoint.settled
+        self.__taxes_paid = checkpoint.taxes_paid
+        self.__pending_cards = [Card(c) for c in checkpoint.pending]
+        self.__table_owner = checkpoint.table_owner
+        self.__table_cards = [Card(c) for c in checkpoint.table_cards]
+        self.__finish_order = checkpoint.finish_order.copy()
+        self.__current_player_index = checkpoint.current_player_index
+
+        self.__hand = CountHand()
+        for (i, count) in enumerate(checkpoint.hand):
+            self.__hand.add_cards(count * [i + 1])
+
+        self.__hands = {id: hand.copy() for id, hand in checkpoint.hands.items()}
+
+        self.__interface.set_order(self.get_player_order())
+        self.__interface.set_rank(self.get_player_rank())
+        self.__interface.set_hand(self.__hand.get_cards())
+        self.__interface.set_table(self.__table_cards)
+        self.__interface.set_finish(self.__finish_order)
+
+        self.__restored = True
+
+        # The file of the restarted machine starts out empty
+        self.__checkpoint()
+
+        return
 
     def run(self):
-        if self.__ring.machine_id == 1:
+        if self.__restored:
+            self.__resume()
+        elif self.__ring.machine_id == 1:
             self.run_as_dealer()
-            return
+        else:
+            self.run_as_player()
+
+        # The last frames sent may still be going around the ring
+        self.__ring.flush()
+        self.__interface.flush()
+
+        # Nothing of a round that is over is ever restored
+        if self.__checkpointer is not None:
+            self.__checkpointer.clear()
 
-        self.run_as_player()
         return
 
     def run_as_player(self):
@@ -225,35 +468,16 @@ class Game:
         logging.debug('Receiving DEAL')
         deal_message = self.__ring.recv_and_send_message()
         self.__hand.parse_deal(deal_message.move, self.__ring.machine_id)
+        self.__hands = {id: counts_of(cards) for id, cards in deal_message.move}
+        self.__record_deal(deal_message.move)
+        self.__deal_done(deal_message.move)
 
         self.__interface.set_hand(self.__hand.get_cards())
 
         self.__interface.print_game()
 
         logging.debug('REVOLUTION step')
-        message = self.__ring.recv_and_send_message()
-
-        while message.type != MessageType.ROUND_READY.value:
-            if message.type != MessageType.TOKEN.value:
-                logging.debug('Received REVOLUTION')
-
-                if message.type == MessageType.GREAT_REVOLUTION.value:
-                    self.__player_order.reverse()
-
-                    self.__interface.set_order(self.get_player_order())
-                    self.__interface.set_rank(self.get_player_rank())
-                    self.__interface.print_game()
-                    print("GRANDE REVOLUÇÃO. A ordem foi invertida")
-
-                self.__had_revolution = True
-            else:
-                logging.debug('Received TOKEN')
-                self.__check_revolution()
-
-                self.__ring.give_token()
-                logging.debug('Giving TOKEN')
-
-            message = self.__ring.recv_and_send_message()
+        self.__wait_round_ready()
 
         logging.debug('Received ROUND_READY')
         self.__run_game()
@@ -261,7 +485,7 @@ class Game:
         return
 
     def run_as_dealer(self):
-        deal = Deal(self.__num_players)
+        deal = Deal(self.__num_players, self.__rng)
 
         logging.debug('Setting SETUP')
         setup = deal.setup()
@@ -276,49 +500,179 @@ class Game:
         dealed_cards = deal.deal()
 
         self.__hand.parse_deal(dealed_cards, self.__ring.machine_id)
+        self.__hands = {id: counts_of(cards) for id, cards in dealed_cards}
+        self.__record_deal(dealed_cards)
+        self.__deal_done(dealed_cards)
 
         self.__interface.set_hand(self.__hand.get_cards())
         self.__interface.print_game()
 
-        self.__ring.send_message(MessageType.DEAL, dealed_cards)
+        self.__send([(MessageType.DEAL, dealed_cards)])
 
+        self.__dealer_revolution()
+        self.__send_round_ready()
 
-        self.__check_revolution()
-        
-        if not self.__had_revolution:
-            self.__ring.give_token()
-            message = self.__ring.recv_and_send_message()
+        return
+
+    def __resume(self):
+        """Goes on with a restored round from the step it was saved in."""
+        self.__send_outgoing()
+
+        if self.__phase == Phase.REVOLUTION:
+            if self.__ring.machine_id != 1:
+                self.__wait_round_ready()
+                self.__run_game()
+                return
+
+            # Still holding the token it dealt with, the dealer did not
+            # take its own turn yet
+            if self.__ring.has_token and not self.__had_revolution:
+                self.__dealer_revolution()
+            else:
+                self.__wait_token_back()
+
+            self.__send_round_ready()
+        elif self.__phase == Phase.TAXES:
+            self.__run_game()
+        else:
+            self.__play_game()
+
+        return
+
+    def __dealer_revolution(self):
+        frames = self.__check_revolution()
+
+        # The round is ready at once after a revolution of the dealer
+        if self.__had_revolution:
+            self.__send(frames)
+            return
+
+        self.__send([], self.__next_machine())
+        self.__wait_token_back()
 
+        return
+
+    def __wait_round_ready(self):
+        """Applies the revolutions of the other players until ROUND_READY."""
+        self.__checkpoint()
+        message = self.__ring.recv_and_send_message()
+
+        while message.type != MessageType.ROUND_READY.value:
             if message.type != MessageType.TOKEN.value:
+                self.__check_revolution_message(message)
                 logging.debug('Received REVOLUTION')
+                self.__record_revolution(message)
 
                 if message.type == MessageType.GREAT_REVOLUTION.value:
                     self.__player_order.reverse()
+
                     self.__interface.set_order(self.get_player_order())
+                    self.__interface.set_rank(self.get_player_rank())
                     self.__interface.print_game()
+                    self.__interface.notify('GRANDE REVOLUÇÃO. A ordem foi invertida')
 
                 self.__had_revolution = True
-            else:
+            elif self.__ring.has_token:
+                logging.debug('Received TOKEN')
+
+                # Only one revolution per round, later players just pass on
+                frames = []
+                if not self.__had_revolution:
+                    frames = self.__check_revolution()
+
+                logging.debug('Giving TOKEN')
+                self.__send(frames, self.__next_machine())
+
+            self.__checkpoint()
+            message = self.__ring.recv_and_send_message()
+
+        self.__phase = Phase.TAXES
+        self.__settled = False
+
+        return
+
+    def __wait_token_back(self):
+        """Applies the revolutions of the other players until the dealer has the token."""
+        # A revolution may come from any player before the token is back
+        while not self.__ring.has_token:
+            self.__checkpoint()
+            message = self.__ring.recv_and_send_message()
+
+            if message.type == MessageType.TOKEN.value:
                 logging.debug('Received TOKEN')
+                continue
+
+            self.__check_revolution_message(message)
+            logging.debug('Received REVOLUTION')
+            self.__record_revolution(message)
+
+            if message.type == MessageType.GREAT_REVOLUTION.value:
+                self.__player_order.reverse()
+                self.__interface.set_order(self.get_player_order())
+                self.__interface.set_rank(self.get_player_rank())
+                self.__interface.print_game()
+
+            self.__had_revolution = True
+
+        return
+
+    def __check_revolution_message(self, message: Message):
+        # Nothing else is sent before ROUND_READY, so a restarted machine
+        # that gets anything else missed the end of the revolution step
+        if message.type not in (MessageType.REVOLUTION.value, MessageType.GREAT_REVOLUTION.value):
+            raise ResyncError(
+                f'{MessageType(message.type).name} of machine {message.origin} '
+                'arrived before ROUND_READY'
+            )
 
+        return
+
+    def __send_round_ready(self):
         logging.debug('Sending ROUND_READY')
-        self.__ring.send_message(MessageType.ROUND_READY)
+        gd = self.__player_order[0]
 
-        self.__ring.give_token(self.__player_order[0])
+        # A dealer that gives the token to itself settles it right away
+        self.__phase = Phase.TAXES
+        self.__settled = gd == self.__ring.machine_id
+        self.__send([(MessageType.ROUND_READY, None)], gd)
 
         self.__run_game()
 
         return
 
     def __run_game(self):
-        if not self.__ring.has_token:
-            self.__ring.wait_token_settle()
+        if not self.__settled:
+            self.__wait_token_settle()
+
+        self.__run_taxes()
+
+        return
+
+    def __wait_token_settle(self):
+        """Waits for the Greater Dalmuti to announce it got the token."""
+        while not self.__ring.has_token:
+            self.__checkpoint()
+            message = self.__ring.recv_and_send_message()
+
+            if message.type == MessageType.TOKEN_SETTLED.value:
+                self.__settled = True
+                return
 
+        self.__settled = True
+        self.__send([(MessageType.TOKEN_SETTLED, None)])
+
+        return
+
+    def __run_taxes(self):
         if not self.__had_revolution:
             self.__pay_taxes()
             self.__interface.set_hand(self.__hand.get_cards())
             self.__interface.print_game()
 
+        # Taxes changed the hands, which is saved before anything is played
+        self.__phase = Phase.PLAY
+        self.__checkpoint()
+
         self.__play_game()
 
         return
@@ -328,168 +682,198 @@ class Game:
             self.__interface.print_game()
             
             if not self.__ring.has_token:
+                self.__checkpoint()
                 message = self.__ring.recv_and_send_message()
             else:
-                message = Message(self.__ring.machine_id, MessageType.MOCK_MESSAGE, '')
+                message = Message(self.__ring.machine_id, MessageType.MOCK_MESSAGE, [])
 
             while message.type != MessageType.ROUND_FINISHED.value:
-                if message.type == MessageType.PLAY_CARDS.value:
-                    self.__current_player_index = (self.__current_player_index + 1) % self.__num_players
-                    self.__interface.set_order(self.get_player_order())
-                    self.__interface.print_game()
-                    table_owner, cards = message.move.split(":")
+                # Everything one message changes is drawn at once
+                with self.__interface.batch():
+                    if message.type == MessageType.PLAY_CARDS.value:
+                        table_owner, cards = message.move[0]
 
-                    self.__table_owner = int(table_owner)
-                    self.__table_cards = [Card(int(c)) for c in cards.strip('[]').split(',')]
+                        # Machines that disagree on a hand cannot agree on the round
+                        error = self.__check_remote_play(message.origin, cards)
+                        if error is not None:
+                            raise ValueError(f'Player {message.origin} made an illegal play {cards}: {error}')
 
-                    self.__interface.set_table(self.__table_cards)
-                    self.__interface.print_game()
+                        self.__current_player_index = (self.__current_player_index + 1) % self.__num_players
+                        self.__interface.set_order(self.get_player_order())
+                        self.__record(JournalEvent.PLAY_CARDS, message.origin, cards)
 
-                if message.type == MessageType.PASS.value:
-                    self.__current_player_index = (self.__current_player_index + 1) % self.__num_players
-                    self.__interface.set_order(self.get_player_order())
-                    self.__interface.print_game()
+                        for card in cards:
+                            self.__hands[message.origin][card - 1] -= 1
 
-                if message.type == MessageType.HAND_EMPTY.value:
-                    self.__finish_order.append(message.origin)
+                        self.__table_owner = table_owner
+                        self.__table_cards = [Card(c) for c in cards]
 
-                    self.__interface.set_finish(self.__finish_order)
-                    self.__interface.print_game()
+                        self.__interface.set_table(self.__table_cards)
+                        self.__interface.print_game()
 
-                if self.__ring.has_token:
-                    if self.__table_owner == self.__ring.machine_id:
-                        self.__ring.send_message(MessageType.ROUND_FINISHED)
-                        break
-                    else:
-                        if not self.__hand.is_empty():
-                            if len(self.__table_cards) == 0:
-                                played_cards = self.__get_valid_first_play()
+                    if message.type == MessageType.PASS.value:
+                        self.__record(JournalEvent.PASS, message.origin)
+                        self.__current_player_index = (self.__current_player_index + 1) % self.__num_players
+                        self.__interface.set_order(self.get_player_order())
+                        self.__interface.print_game()
+
+                    if message.type == MessageType.HAND_EMPTY.value:
+                        self.__record(JournalEvent.HAND_EMPTY, message.origin)
+                        self.__finish_order.append(message.origin)
+
+                        self.__interface.set_finish(self.__finish_order)
+                        self.__interface.print_game()
+
+                    if self.__ring.has_token:
+                        if self.__table_owner == self.__ring.machine_id:
+                            # Over for this machine before the others hear it
+                            self.__end_trick()
+                            self.__send([(MessageType.ROUND_FINISHED, None)])
+                            break
+                        else:
+                            if not self.__hand.is_empty():
+                                if self.__policy is not None:
+                                    played_cards = self.__get_policy_play()
+                                elif len(self.__table_cards) == 0:
+                                    played_cards = self.__get_valid_first_play()
+                                else:
+                                    played_cards = self.__get_valid_other_play()
                             else:
-                                played_cards = self.__get_valid_other_play()
+                                played_cards = []
 
                             if len(played_cards) == 0:
-                                
-                                self.__ring.send_message(MessageType.PASS)
+                                self.__record(JournalEvent.PASS, self.__ring.machine_id)
+                                frames = [(MessageType.PASS, None)]
                             else:
-                                self.__play_cards(played_cards)
-                        else:
-                            self.__ring.send_message(MessageType.PASS)
+                                frames = self.__play_cards(played_cards)
 
-                        self.__current_player_index = (self.__current_player_index + 1) % self.__num_players
-                        self.__interface.set_order(self.get_player_order())
-                        self.__interface.print_game()
-                        self.__pass_to_next_player()
+                            self.__current_player_index = (self.__current_player_index + 1) % self.__num_players
+                            self.__interface.set_order(self.get_player_order())
+                            self.__interface.print_game()
+                            self.__send(frames, self.__next_player())
 
+                self.__checkpoint()
                 message = self.__ring.recv_and_send_message()
 
-            self.__table_cards = []
-            self.__interface.set_table(self.__table_cards)
-            self.__interface.print_game()
-            self.__table_owner = 0
+            if message.type == MessageType.ROUND_FINISHED.value:
+                self.__end_trick()
 
-    def __get_valid_first_play(self) -> List[Card]:
-        valid = False
+        return
 
-        while not valid:
-            cur_cards = self.__hand.get_cards_by_copy()
-            self.__interface.print_game()
-            played_cards = input('Insira as cartas que quer jogar:\n')
-            played_cards = played_cards.split(' ')
-            played_cards = list(filter(lambda x: x.isdigit(), played_cards))
-            played_cards = list(filter(lambda x: int(x) <= 13 and int(x) >= 1, played_cards))
+    def __end_trick(self):
+        self.__record(JournalEvent.TRICK_END, self.__table_owner)
 
-            if len(played_cards) == 0:
-                continue
+        self.__table_cards = []
+        self.__interface.set_table(self.__table_cards)
+        self.__interface.print_game()
+        self.__table_owner = 0
 
-            played_cards = [Card(int(c)) for c in played_cards]
+        return
 
-            unique_p_cards = list(set(played_cards))
+    def __get_policy_state(self) -> RoundState:
+        state = RoundState(self.__num_players)
 
-            try:
-                unique_p_cards.remove(Card.JESTER)
-            except ValueError:
-                pass
+        state.order = self.__player_order.copy()
+        state.hands = {self.__ring.machine_id: self.__hand.get_counts().copy()}
+        state.num_cards = {id: sum(hand) for id, hand in self.__hands.items()}
+        state.finish_order = self.__finish_order.copy()
 
-            if len(unique_p_cards) > 1:
-                print('Você deve jogar apenas cartas do mesmo tipo ou coringas...')
-                continue
-                
+        # Whatever no hand holds any more was played
+        state.played = [
+            count - sum(hand[i] for hand in self.__hands.values())
+            for (i, count) in enumerate(deck_counts(self.__num_players))
+        ]
 
-            for card in played_cards:
-                try:
-                    cur_cards.remove(card)
-                    valid = True
-                except ValueError:
-                    print('Você não tem alguma das cartas que jogou...')
-                    valid = False
-                    break
-           
-            if not valid:
-                continue
+        state.table_rank, state.table_count = self.__get_table()
+        if state.table_count != 0:
+            state.table_owner = self.__table_owner
 
-            break
+        return state
 
+    def __get_policy_play(self) -> List[Card]:
+        cards = self.__policy.play(self.__get_policy_state(), self.__ring.machine_id)
+        return [Card(c) for c in cards]
+
+    def __get_valid_first_play(self) -> List[Card]:
+        return self.__get_valid_play('Insira as cartas que quer jogar:\n')
 
-        return played_cards
-    
     def __get_valid_other_play(self) -> List[Card]:
+        return self.__get_valid_play('Insira as cartas que quer jogar (0 para passar a vez):\n')
+
+    def __get_valid_play(self, prompt: str) -> List[Card]:
+        table_rank, table_count = self.__get_table()
+
         while True:
-            cur_cards = self.__hand.get_cards_by_copy()
             self.__interface.print_game()
-            played_cards = input('Insira as cartas que quer jogar (0 para passar a vez):\n')
+            played_cards = self.__interface.ask(prompt)
             played_cards = played_cards.split(' ')
-            if played_cards[0] == '0':
+            if table_count != 0 and played_cards[0] == '0':
                 return []
-            
+
             played_cards = list(filter(lambda x: x.isdigit(), played_cards))
-            played_cards = list(filter(lambda x: int(x) <= 13 and int(x) >= 1, played_cards))
+            played_cards = [int(c) for c in played_cards if 1 <= int(c) <= 13]
 
             if len(played_cards) == 0:
                 continue
 
-            played_cards = [Card(int(c)) for c in played_cards]
+            error = validate_play(
+                self.__hand.get_counts(),
+                played_cards,
+                table_rank,
+                table_count
+            )
 
-            unique_p_cards = list(set(played_cards))
+            if error is not None:
+                self.__interface.notify(error)
+                continue
 
-            try:
-                unique_p_cards.remove(Card.JESTER)
-            except ValueError:
-                pass
+            return [Card(c) for c in played_cards]
 
-            if len(unique_p_cards) > 1:
-                print('Você deve jogar apenas cartas do mesmo tipo ou coringas...')
-                continue
+    def __get_table(self) -> Tuple[int, int]:
+        if len(self.__table_cards) == 0:
+            return EMPTY_TABLE, 0
 
-            try:
-                unique_p_cards.remove(Card.JESTER)
-            except ValueError:
-                pass
+        rank = play_rank([c.value for c in self.__table_cards])
+        return rank, len(self.__table_cards)
 
-            unique_t_cards = list(set(self.__table_cards))
+    def __recv_message(self) -> Message:
+        self.__checkpoint()
+        message = self.__ring.recv_and_send_message()
 
-            if unique_p_cards[0].value >= unique_t_cards[0].value:
-                print("Você precisa jogar cartas de valor menor que as que estão na mesa (ou passar)")
-                continue
+        if message.type == MessageType.GIVE_CARDS.value:
+            receiver, cards = message.move[0]
+            self.__move_tracked_cards(message.origin, receiver, cards)
 
-            if len(self.__table_cards) != len(played_cards):
-                print("Você precisa jogar a mesma quantidade de cartas que estão na mesa")
-                continue
+        return message
 
-            
-            for card in played_cards:
-                try:
-                    cur_cards.remove(card)
-                except ValueError:
-                    print('Você não tem alguma das cartas que quer jogar...')
-                    continue
+    def __move_tracked_cards(self, giver: int, receiver: int, cards: List[int]):
+        self.__record(JournalEvent.GIVE_CARDS, giver, cards, receiver)
 
-            return played_cards
-        
-    def __play_cards(self, cards: List[Card]):
+        for card in cards:
+            self.__hands[giver][card - 1] -= 1
+            self.__hands[receiver][card - 1] += 1
+
+        return
+
+    def __give_cards(self, receiver: int, cards: List[Card]) -> List[Tuple[MessageType, Move]]:
+        values = [c.value for c in cards]
+        self.__move_tracked_cards(self.__ring.machine_id, receiver, values)
+
+        return [(MessageType.GIVE_CARDS, [(receiver, values)])]
+
+    def __check_remote_play(self, player: int, cards: List[int]) -> Optional[str]:
+        table_rank, table_count = self.__get_table()
+        return validate_play(self.__hands[player], cards, table_rank, table_count)
+
+    def __play_cards(self, cards: List[Card]) -> List[Tuple[MessageType, Move]]:
         self.__hand.use_cards(cards)
+
+        for card in cards:
+            self.__hands[self.__ring.machine_id][card.value - 1] -= 1
         self.__interface.set_hand(self.__hand.get_cards())
 
-        move = f'{self.__ring.machine_id}:{cards}'
+        move = [(self.__ring.machine_id, [c.value for c in cards])]
+        self.__record(JournalEvent.PLAY_CARDS, self.__ring.machine_id, move[0][1])
 
         self.__table_owner = self.__ring.machine_id
         self.__table_cards = cards
@@ -497,47 +881,65 @@ class Game:
         self.__interface.set_table(self.__table_cards)
         self.__interface.print_game()
 
-        self.__ring.send_message(MessageType.PLAY_CARDS, move)
+        frames = [(MessageType.PLAY_CARDS, move)]
 
         if self.__hand.is_empty():
-            self.__ring.send_message(MessageType.HAND_EMPTY)
+            self.__record(JournalEvent.HAND_EMPTY, self.__ring.machine_id)
+            frames.append((MessageType.HAND_EMPTY, None))
             self.__finish_order.append(self.__ring.machine_id)
 
             self.__interface.set_finish(self.__finish_order)
             self.__interface.print_game()
 
+        return frames
 
-        return
+    def __next_machine(self) -> int:
+        return self.__ring.machine_id % self.__num_players + 1
 
-    def __pass_to_next_player(self):
+    def __next_player(self) -> int:
         next_index = (self.__player_order.index(self.__ring.machine_id) + 1) % self.__num_players
-        self.__ring.give_token(self.__player_order[next_index])
+        return self.__player_order[next_index]
 
     def __pay_taxes(self):
-        if self.__ring.machine_id == self.__player_order[0]:
-            self.__gd_taxes()
-        elif self.__ring.machine_id == self.__player_order[1]:
-            self.__ld_taxes()
-        elif self.__ring.machine_id == self.__player_order[-2]:
-            self.__lp_taxes()
-        elif self.__ring.machine_id == self.__player_order[-1]:
-            self.__gp_taxes()
+        """Pays the tax tier this machine is in, if any.
+
+        The Greater Dalmuti gives its taxes first and sends ROUND_READY once
+        the token is back, the other Dalmutis give theirs and the Peons
+        their best cards when the token reaches them.
+        """
+        tiers = tax_tiers(self.__num_players)
+        position = self.__player_order.index(self.__ring.machine_id)
+        peon_tier = self.__num_players - 1 - position
+
+        if position == 0:
+            self.__gd_taxes(tiers[0])
+        elif position < len(tiers):
+            self.__dalmuti_taxes(position, tiers[position])
+        elif peon_tier < len(tiers):
+            self.__peon_taxes(peon_tier, tiers[peon_tier])
         else:
-            message = self.__ring.recv_and_send_message()
+            message = self.__recv_message()
             while message.type != MessageType.ROUND_READY.value:
                 if self.__ring.has_token:
-                    self.__ring.give_token()
-                message = self.__ring.recv_and_send_message()
+                    self.__send([], self.__next_machine())
+                message = self.__recv_message()
             
         return
 
-    def __gd_taxes(self):
+    def __ask_taxes(self, tier: int, n: int) -> List[Card]:
+        peon = self.__rank_name(self.__num_players - 1 - tier)
+
+        if n == 1:
+            prompt = f'escolha uma carta para trocar pela melhor do {peon}:\n'
+        else:
+            count = 'duas' if n == 2 else n
+            prompt = f'escolha {count} cartas para trocar pelas {count} melhores do {peon}:\n'
+
         cards: List[Card] = []
-        cards_to_add = None
 
-        while len(cards) != 2:
+        while len(cards) != n:
             self.__interface.print_game()
-            i_cards = input('escolha duas cartas para trocar pelas duas melhores do Greater Peon:\n')
+            i_cards = self.__interface.ask(prompt)
             i_cards = i_cards.split(' ')
 
             i_cards = list(filter(lambda x: x.isdigit(), i_cards))
@@ -545,7 +947,7 @@ class Game:
 
             cards = [Card(int(c)) for c in i_cards]
 
-            if len(cards) != 2:
+            if len(cards) != n:
                 continue
 
             h_cards = self.__hand.get_cards_by_copy()
@@ -553,145 +955,208 @@ class Game:
                 try:
                     h_cards.remove(card)
                 except ValueError:
-                    print('Você não tem alguma das cartas que jogou...')
+                    self.__interface.notify('Você não tem alguma das cartas que jogou...')
                     cards.remove(card)
                     break
 
-        self.__hand.use_cards(cards)
+        return cards
 
-        gp_id = self.__player_order[-1]
-        move = f'{gp_id}:{cards}'
-        self.__ring.send_message(MessageType.GIVE_CARDS, move)
+    def __choose_taxes(self, tier: int, n: int) -> List[Card]:
+        if self.__policy is None:
+            return self.__ask_taxes(tier, n)
 
-        self.__ring.give_token()
+        id = self.__ring.machine_id
+        state = self.__get_policy_state()
 
-        message = self.__ring.recv_and_send_message()
+        if tier == 0:
+            cards = self.__policy.gd_taxes(state, id)
+        else:
+            cards = self.__policy.ld_taxes(state, id)
+
+        # A bot is never asked, so a wrong choice is its bug and not a typo
+        if len(cards) != n or not has_cards(state.hands[id], cards):
+            raise ValueError(f'Player {id} chose invalid taxes {cards}')
+
+        return [Card(c) for c in cards]
+
+    def __gd_taxes(self, n: int):
+        if not self.__taxes_paid:
+            # A restarted Greater Dalmuti waits for its token to be claimed back
+            while not self.__ring.has_token:
+                self.__collect_taxes(self.__recv_message())
+
+            cards = self.__choose_taxes(0, n)
+            self.__hand.use_cards(cards)
+
+            gp_id = self.__player_order[-1]
+            frames = self.__give_cards(gp_id, cards)
+            self.__taxes_paid = True
+
+            self.__send(frames, self.__next_machine())
+
+        message = self.__recv_message()
         while 1:
-            if message.type == MessageType.GIVE_CARDS.value:
-                id, g_cards = self.__hand.parse_given_cards(message.move)
-                if id == self.__ring.machine_id:
-                    cards_to_add = g_cards
+            self.__collect_taxes(message)
 
             if self.__ring.has_token:
                 break
-            message = self.__ring.recv_and_send_message()
+            message = self.__recv_message()
 
-        self.__ring.send_message(MessageType.ROUND_READY)
-        
-        if cards_to_add:
-            self.__hand.add_cards(cards_to_add)
+        # Every tax is paid once the token is back, and the Greater Dalmuti leads
+        self.__take_taxes()
+        self.__phase = Phase.PLAY
+        self.__send([(MessageType.ROUND_READY, None)])
 
         return
 
-    def __ld_taxes(self):
-        cards_to_add = None
-
-        message = self.__ring.recv_and_send_message()
+    def __dalmuti_taxes(self, tier: int, n: int):
+        message = self.__recv_message()
         while message.type != MessageType.ROUND_READY.value:
-            if message.type == MessageType.GIVE_CARDS.value:
-                id, g_cards = self.__hand.parse_given_cards(message.move)
-                if id == self.__ring.machine_id:
-                    cards_to_add = g_cards
+            self.__collect_taxes(message)
 
             if self.__ring.has_token:
-                cards: List[Card] = []
-                while len(cards) != 1:
-                    self.__interface.print_game()
-                    i_cards = input('escolha uma carta para trocar pela melhor do Lesser Peon:\n')
-                    i_cards = i_cards.split(' ')
+                frames = []
 
-                    i_cards = list(filter(lambda x: x.isdigit(), i_cards))
-                    i_cards = list(filter(lambda x: int(x) <= 13 and int(x) >= 1, i_cards))
+                if not self.__taxes_paid:
+                    cards = self.__choose_taxes(tier, n)
+                    self.__hand.use_cards(cards)
 
-                    cards = [Card(int(c)) for c in i_cards]
+                    peon_id = self.__player_order[-1 - tier]
+                    frames = self.__give_cards(peon_id, cards)
+                    self.__taxes_paid = True
 
-                    h_cards = self.__hand.get_cards_by_copy()
-                    for card in cards:
-                        try:
-                            h_cards.remove(card)
-                        except ValueError:
-                            print('Você não tem alguma das cartas que jogou...')
-                            cards.remove(card)
-                            break
+                self.__send(frames, self.__next_machine())
+            message = self.__recv_message()
 
+        self.__take_taxes()
 
-                card = cards[0].value
+        return
 
-                self.__hand.use_card(card)
+    def __peon_taxes(self, tier: int, n: int):
+        message = self.__recv_message()
 
-                lp_id = self.__player_order[-2]
-                move = f'{lp_id}:{card}'
-                self.__ring.send_message(MessageType.GIVE_CARDS, move)
+        while message.type != MessageType.ROUND_READY.value:
+            self.__collect_taxes(message)
+            
+            if self.__ring.has_token:
+                frames = []
 
-                self.__ring.give_token()
-            message = self.__ring.recv_and_send_message()
+                if not self.__taxes_paid:
+                    cards = self.__hand.get_n_best_cards(n)
+                    self.__hand.use_cards(cards)
+
+                    dalmuti_id = self.__player_order[tier]
+                    frames = self.__give_cards(dalmuti_id, cards)
+                    self.__taxes_paid = True
+
+                self.__send(frames, self.__next_machine())
 
-        if cards_to_add:
-            self.__hand.add_cards(cards_to_add)
+            message = self.__recv_message()
+
+        self.__take_taxes()
 
         return
 
-    def __lp_taxes(self):
-        cards_to_add = None
+    def __collect_taxes(self, message: Message):
+        """Keeps the cards given to this machine until the taxes are over."""
+        if message.type == MessageType.GIVE_CARDS.value:
+            id, cards = self.__hand.parse_given_cards(message.move)
 
-        message = self.__ring.recv_and_send_message()
-        while message.type != MessageType.ROUND_READY.value:
-            if message.type == MessageType.GIVE_CARDS.value:
-                id, g_cards = self.__hand.parse_given_cards(message.move)
+            if id == self.__ring.machine_id:
+                self.__pending_cards = cards
 
-                if id == self.__ring.machine_id:
-                    cards_to_add = g_cards
+        return
 
-            if self.__ring.has_token:
-                card = self.__hand.get_n_best_cards(1)
-                self.__hand.use_cards(card)
-                ld_id = self.__player_order[1]
-                move = f'{ld_id}:{card}'
-                self.__ring.send_message(MessageType.GIVE_CARDS, move)
+    def __take_taxes(self):
+        if self.__pending_cards:
+            self.__hand.add_cards(self.__pending_cards)
+            self.__pending_cards = []
 
-                self.__ring.give_token()
+        return
 
-            message = self.__ring.recv_and_send_message()
+    def __parse_order(self, setup: Move):
+        self.__player_order: List[int] = []
+        for p, _ in setup:
+            self.__player_order.append(p)
 
-        if cards_to_add:
-            self.__hand.add_cards(cards_to_add)
+        if self.__journal is not None:
+            self.__journal.start(self.__ring.machine_id, self.__num_players)
+            self.__record(JournalEvent.SETUP, cards=self.__player_order)
 
         return
 
-    def __gp_taxes(self):
-        cards_to_add = None
+    def __deal_done(self, deal: Move):
+        self.__game_id = game_id_of(self.__player_order, deal)
+        self.__phase = Phase.REVOLUTION
 
-        message = self.__ring.recv_and_send_message()
+        return
 
-        while message.type != MessageType.ROUND_READY.value:
-            if message.type == MessageType.GIVE_CARDS.value:
-                id, g_cards = self.__hand.parse_given_cards(message.move)
+    def __checkpoint(self):
+        if self.__checkpointer is not None:
+            self.__checkpointer.save(self.checkpoint_state())
 
-                if id == self.__ring.machine_id:
-                    cards_to_add = g_cards
-            
-            if self.__ring.has_token:
-                cards = self.__hand.get_n_best_cards(2)
-                self.__hand.use_cards(cards)
+        return
 
-                gd_id = self.__player_order[0]
-                move = f'{gd_id}:{cards}'
+    def __send(self, frames: List[Tuple[MessageType, Move]], to: int = 0):
+        """Sends ``frames`` and gives the token ``to`` a machine, keeping it on 0.
 
-                self.__ring.send_message(MessageType.GIVE_CARDS, move)
-                self.__ring.give_token()
+        Whatever the frames change must already be applied, as they are
+        saved with the state first: a machine restarted from there sends
+        the same frames again, which are duplicates to whoever got them,
+        instead of deciding its move anew.
+        """
+        if self.__checkpointer is None:
+            for (type, move) in frames:
+                self.__ring.send_message(type, move)
 
-            message = self.__ring.recv_and_send_message()
+            if to != 0:
+                self.__ring.give_token(to)
 
-        if cards_to_add:
-            self.__hand.add_cards(cards_to_add)
+            return
+
+        self.__outgoing = [self.__ring.prepare_message(type, move) for (type, move) in frames]
+        self.__handoff = to
+        self.__checkpoint()
+
+        self.__send_outgoing()
 
         return
 
-    def __parse_order(self, setup: str):
-        self.__player_order: List[int] = []
-        for player in setup.split(','):
-            p, _ = player.split(':')
-            self.__player_order.append(int(p))
+    def __send_outgoing(self):
+        for data in self.__outgoing:
+            self.__ring.send_frame(data)
+
+        if self.__handoff != 0:
+            self.__ring.give_token(self.__handoff)
+
+        self.__outgoing = []
+        self.__handoff = 0
+
+        return
+
+    def __record(
+        self,
+        event: JournalEvent,
+        player: int = 0,
+        cards: List[int] = (),
+        target: int = 0
+    ):
+        if self.__journal is not None:
+            self.__journal.append(event, player, cards, target)
+
+        return
+
+    def __record_deal(self, deal: Move):
+        for (id, cards) in deal:
+            self.__record(JournalEvent.DEAL, id, cards)
+
+        return
+
+    def __record_revolution(self, message: Message):
+        if message.type == MessageType.GREAT_REVOLUTION.value:
+            self.__record(JournalEvent.GREAT_REVOLUTION, message.origin)
+        else:
+            self.__record(JournalEvent.REVOLUTION, message.origin)
 
         return
     
@@ -711,12 +1176,18 @@ class Game:
 
 
 
-    def __check_revolution(self):
+    def __check_revolution(self) -> List[Tuple[MessageType, Move]]:
         if self.__hand.has_two_jesters():
             res = ''
+
+            if self.__policy is not None:
+                state = self.__get_policy_state()
+                revolution = self.__policy.revolution(state, self.__ring.machine_id)
+                res = 's' if revolution else 'n'
+
             while res != 's' and res != 'n':
                 self.__interface.print_game()
-                res = input('Você tem 2 Jesters! Portanto deseja fazer uma revolução?[s/n]')[0]
+                res = self.__interface.ask('Você tem 2 Jesters! Portanto deseja fazer uma revolução?[s/n]')[0]
 
             if res == 's':
                 if self.__ring.machine_id == self.__player_order[-1]:
@@ -726,14 +1197,16 @@ class Game:
                     self.__interface.set_order(self.get_player_order())
                     self.__interface.set_rank(self.get_player_rank())
                     self.__interface.print_game()
-                    print("GRANDE REVOLUÇÃO. A ordem foi invertida")
+                    self.__interface.notify('GRANDE REVOLUÇÃO. A ordem foi invertida')
 
-                    self.__ring.send_message(MessageType.GREAT_REVOLUTION)
+                    self.__record(JournalEvent.GREAT_REVOLUTION, self.__ring.machine_id)
+                    return [(MessageType.GREAT_REVOLUTION, None)]
                 else:
                     self.__had_revolution = True
-                    self.__ring.send_message(MessageType.REVOLUTION)
+                    self.__record(JournalEvent.REVOLUTION, self.__ring.machine_id)
+                    return [(MessageType.REVOLUTION, None)]
 
-        return
+        return []
 
         
         
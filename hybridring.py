@@ -0,0 +1,255 @@
+import select
+import socket
+import struct
+import time
+
+from typing import Dict, Optional, Tuple
+
+from ring import (
+    HEADER,
+    ORIGIN_OFFSET,
+    RECV_CONFIRM,
+    RECV_CONFIRM_OFFSET,
+    SEQ,
+    SEQ_OFFSET,
+    SOCKET_TIMEOUT,
+    TABLE_OFFSET,
+    TYPE_OFFSET,
+    Message,
+    MessageType,
+    Ring,
+    receipt_bit,
+)
+
+
+# Group of the rings that do not configure one, local to the site
+DEFAULT_GROUP = '239.255.42.99'
+
+# Multicast frames stay on the local network
+MULTICAST_TTL = 1
+
+# End of the table and sequence number an acknowledgement copies
+ACK_END = SEQ_OFFSET + SEQ.size
+NO_SEQ = bytes(SEQ.size)
+
+
+class HybridRing(Ring):
+    """``Ring`` whose frames skip the ring, while the token stays on it.
+
+    Every frame this machine sends goes to the multicast ``group`` as one
+    datagram, or to each of the ``peers`` in turn without one, and every
+    machine acknowledges it with an ACK frame sent straight back to the
+    receive port of its origin in ``peers``. Once every machine did, the
+    frame is handed to ``Ring`` as if it had come around, with their
+    receipt bits, so the send window, retransmissions and circuit times
+    work as they do on the ring, over one hop and back instead of all of
+    them.
+
+    The token and its claims are still passed from machine to machine.
+    As ``give_token`` waits for every frame sent to be acknowledged, all
+    machines got the frames of a holder before the next one gets the
+    token, which keeps the frames of different machines in order.
+
+    ``peers`` maps every machine id, this one included, to its address
+    and receive port.
+    """
+
+    def __init__(
+        self,
+        num_machines: int,
+        machine_id: int,
+        send_port: int,
+        recv_port: int,
+        send_address,
+        recv_address = None,
+        peers: Dict[int, Tuple[str, int]] = None,
+        group: Optional[Tuple[str, int]] = None,
+        **kwargs
+    ):
+        super().__init__(
+            num_machines,
+            machine_id,
+            send_port,
+            recv_port,
+            send_address,
+            recv_address,
+            **kwargs
+        )
+
+        if peers is None or sorted(peers) != list(range(1, num_machines + 1)):
+            raise ValueError(f'A hybrid ring needs the address of machines 1 to {num_machines}')
+
+        self.peers = peers
+        self.group = group
+        self.group_socket = None
+
+        self.others = [peers[id] for id in sorted(peers) if id != machine_id]
+        self.all_acks = 0
+        for id in peers:
+            if id != machine_id:
+                self.all_acks |= receipt_bit(id)
+
+        # Acknowledgements only differ in the table and sequence number they
+        # copy from the frame, which sit next to each other
+        self.ack_frame = bytearray(Message(machine_id, MessageType.ACK).encode())
+
+        # Frames of this machine by sequence number, with the receipt bits
+        # of the machines that acknowledged them
+        self.unacked: Dict[int, Tuple[bytearray, int]] = {}
+
+        pass
+
+    def setup(self):
+        super().setup()
+
+        if self.group is None:
+            return
+
+        (group, port) = self.group
+        interface = socket.inet_aton(self.recv_address)
+
+        self.send_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, interface)
+        self.send_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, MULTICAST_TTL)
+        # Machines on the same host need a copy too
+        self.send_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+
+        self.group_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.group_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.group_socket.bind(('', port))
+        self.group_socket.setsockopt(
+            socket.IPPROTO_IP,
+            socket.IP_ADD_MEMBERSHIP,
+            socket.inet_aton(group) + interface
+        )
+        self.group_socket.setblocking(False)
+
+        return
+
+    def cleanup(self):
+        super().cleanup()
+
+        if self.group_socket is not None:
+            self.group_socket.close()
+
+        return
+
+    def send(self, data):
+        (seq,) = SEQ.unpack_from(data, SEQ_OFFSET)
+
+        # Tokens, claims and what others send stay on the ring
+        if seq == 0 or data[ORIGIN_OFFSET] != self.machine_id:
+            super().send(data)
+            return
+
+        # Resent frames keep the acknowledgements they already got
+        if seq not in self.unacked:
+            self.unacked[seq] = (bytearray(data), 0)
+
+        if self.group is not None:
+            self.send_socket.sendto(data, self.group)
+        else:
+            for peer in self.others:
+                self.send_socket.sendto(data, peer)
+
+        return
+
+    def recv_frame(self, timeout: float = SOCKET_TIMEOUT):
+        """The next frame for ``Ring``, or None after ``timeout`` seconds.
+
+        Frames of other machines are acknowledged as they arrive, and
+        those of this machine are returned once they all did.
+        """
+        deadline = time.perf_counter() + timeout
+
+        while True:
+            (data, multicast) = self.__recv(max(deadline - time.perf_counter(), 0))
+
+            # Too short to tell, Ring discards it
+            if data is None or len(data) < HEADER.size:
+                return data
+
+            origin = data[ORIGIN_OFFSET]
+
+            if data[TYPE_OFFSET] == MessageType.ACK.value:
+                try:
+                    ack = Message.decode(data)
+                except (ValueError, struct.error):
+                    # Ring counts it as invalid
+                    return data
+
+                frame = self.__acked(ack, len(data))
+                if frame is not None:
+                    return frame
+
+                continue
+
+            # Our own frames come back from the group, on loopback too
+            if multicast and origin == self.machine_id:
+                continue
+
+            # Unsequenced frames, like tokens, are not acknowledged
+            if (origin != self.machine_id and origin in self.peers
+                    and data[SEQ_OFFSET:ACK_END] != NO_SEQ):
+                self.__ack(data, origin)
+
+            return data
+
+    def forward_frame(self, message: Message, data):
+        # Frames of other machines reached everyone at once and were
+        # acknowledged on arrival
+        if message.seq != 0:
+            return
+
+        super().forward_frame(message, data)
+        return
+
+    def __recv(self, timeout: float):
+        if self.group_socket is None:
+            return (super().recv_frame(timeout), False)
+
+        (readable, _, _) = select.select([self.group_socket, self.recv_socket], [], [], timeout)
+        if not readable:
+            return (None, False)
+
+        # The group first, a token never overtakes the frames sent before it
+        sock = readable[0]
+        size = sock.recv_into(self.recv_buffer)
+
+        return (self.recv_view[:size], sock is self.group_socket)
+
+    def __ack(self, data, origin: int):
+        ack = self.ack_frame
+        ack[TABLE_OFFSET:ACK_END] = data[TABLE_OFFSET:ACK_END]
+
+        self.send_socket.sendto(ack, self.peers[origin])
+
+        self.metrics.sent[MessageType.ACK.value] += 1
+        self.metrics.bytes_sent[MessageType.ACK.value] += len(ack)
+
+        return
+
+    def __acked(self, message: Message, size: int) -> Optional[bytearray]:
+        """The frame of this machine that ``message`` acknowledged, once everyone did."""
+        self.metrics.received[message.type] += 1
+        self.metrics.bytes_received[message.type] += size
+
+        entry = self.unacked.get(message.seq)
+
+        # Acknowledgements of a resent frame that already completed
+        if entry is None:
+            self.metrics.duplicates[message.type] += 1
+            return None
+
+        (frame, acks) = entry
+        acks |= receipt_bit(message.origin)
+
+        if acks != self.all_acks:
+            self.unacked[message.seq] = (frame, acks)
+            return None
+
+        del self.unacked[message.seq]
+        RECV_CONFIRM.pack_into(frame, RECV_CONFIRM_OFFSET, acks)
+
+        return frame
+
+    pass
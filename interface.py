@@ -1,13 +1,59 @@
-import logging
+import re
+import shutil
+import sys
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+from typing import List
+
+
+# Colours take no room on the screen
+ESCAPES = re.compile(r'\x1b\[[0-9;]*m')
+
+# Notifications kept under the frame, the oldest go first
+NOTES = 3
+
 
 class Interface():
-    def __init__(self, id: int):
+    """Draws the state of the game of one player on the terminal.
+
+    The last frame drawn is kept, so ``print_game`` only rewrites the lines
+    that changed, addressing them with the cursor, and writes nothing when
+    none did. Calls made inside ``batch`` are drawn once when it ends, and
+    ``interval`` limits how often frames are drawn at all: a frame held
+    back is drawn by a timer once the interval is over, or earlier by
+    ``flush``. The last notifications are part of the frame, under the
+    game, so redrawing it does not wipe them. A disabled interface never
+    draws.
+    """
+
+    def __init__(self, id: int, enabled: bool = True, interval: float = 0.0):
         self.__id = id
+        self.__enabled = enabled
+        self.__interval = interval
         self.__rank = ''
         self.__order = ''
         self.__table = ''
         self.__finish_order = ''
         self.__hand = ''
+        self.__notes = deque(maxlen=NOTES)
+
+        # Lines on the screen and the rows each of them takes
+        self.__frame: List[str] = None
+        self.__rows: List[int] = None
+        self.__drawn_at = 0.0
+
+        self.__dirty = False
+        self.__batches = 0
+
+        # The timer draws from its own thread
+        self.__lock = threading.RLock()
+        self.__timer: threading.Timer = None
+
+        # A prompt was written under the frame
+        self.__below = False
         pass
 
     @staticmethod
@@ -16,15 +62,45 @@ class Interface():
         return
 
     def print_game(self):
-        Interface.clear()
-        self.__print_id()
-        self.__print_rank()
-        self.__print_order()
-        self.__print_finish()
-        self.__print_table()
-        self.__print_hand()
+        if not self.__enabled:
+            return
+
+        with self.__lock:
+            self.__dirty = True
+
+            if self.__batches == 0:
+                self.__draw_if_due()
+
+        return
+
+    @contextmanager
+    def batch(self):
+        with self.__lock:
+            self.__batches += 1
+
+        try:
+            yield self
+        finally:
+            with self.__lock:
+                self.__batches -= 1
+
+                if self.__batches == 0 and self.__dirty:
+                    self.__draw_if_due()
+
+        return
+
+    def flush(self):
+        with self.__lock:
+            if self.__enabled and self.__dirty:
+                self.__draw()
+
+        return
+
+    def invalidate(self):
+        """Redraws the whole screen next time, e.g. after it was resized."""
+        self.__frame = None
         return
-    
+
     def set_rank(self, rank: str):
         self.__rank = rank
 
@@ -39,27 +115,95 @@ class Interface():
 
     def set_hand(self, hand: str):
         self.__hand = hand
-    
-    def __print_id(self):
-        print(f'ID: {self.__id}')
 
-    def __print_rank(self):
-        print(f'Rank: {self.__rank}')
+    def __lines(self) -> List[str]:
+        return [
+            f'ID: {self.__id}',
+            f'Rank: {self.__rank}',
+            f'Ordem: {self.__order}',
+            f'Terminaram: {self.__finish_order}',
+            f'Mesa: {self.__table}',
+            f'Mão: {self.__hand}',
+        ] + list(self.__notes)
+
+    def __draw_if_due(self):
+        wait = self.__drawn_at + self.__interval - time.perf_counter()
+
+        if wait <= 0:
+            self.__draw()
+        elif self.__timer is None:
+            self.__timer = threading.Timer(wait, self.__draw_pending)
+            self.__timer.daemon = True
+            self.__timer.start()
+
+        return
+
+    def __draw_pending(self):
+        with self.__lock:
+            self.__timer = None
+
+            # A batch still open draws when it ends
+            if self.__dirty and self.__batches == 0:
+                self.__draw()
+
+        return
+
+    def __draw(self):
+        lines = self.__lines()
+
+        width = max(shutil.get_terminal_size().columns, 1)
+        rows = [max(1, -(-len(ESCAPES.sub('', line)) // width)) for line in lines]
+
+        out = []
 
-    def __print_order(self):
-        print(f'Ordem: {self.__order}')
+        # Lines that wrap differently move the ones after them
+        if self.__frame is None or rows != self.__rows:
+            out.append('\033c')
+            out.extend(line + '\n' for line in lines)
+        else:
+            row = 1
+            for (line, old, height) in zip(lines, self.__frame, rows):
+                if line != old:
+                    out.append(f'\033[{row};1H{line}\033[K')
 
-    def __print_table(self):
-        print(f'Mesa: {self.__table}')
+                row += height
 
-    def __print_finish(self):
-        print(f'Terminaram: {self.__finish_order}')
+            # Leave the cursor under the frame, where prompts are written
+            if out or self.__below:
+                out.append(f'\033[{row};1H\033[J')
 
-    def __print_hand(self):
-        print(f'Mão: {self.__hand}')
+        if out:
+            sys.stdout.write(''.join(out))
+            sys.stdout.flush()
+
+        self.__frame = lines
+        self.__rows = rows
+        self.__drawn_at = time.perf_counter()
+        self.__dirty = False
+        self.__below = False
+
+        return
+
+    def notify(self, text: str):
+        if not self.__enabled:
+            return
+
+        with self.__lock:
+            self.__notes.extend(text.splitlines())
+            self.__draw()
+
+        return
+
+    def ask(self, prompt: str) -> str:
+        self.flush()
+        answer = input(prompt)
+
+        with self.__lock:
+            self.__below = True
+
+        return answer
 
     def ask_for_revolution(self) -> bool:
         return False
 
     pass
-
@@ -0,0 +1,300 @@
+import argparse
+import signal
+import struct
+import time
+
+from enum import Enum
+from typing import List, Sequence, Tuple
+
+from engine import RoundState
+from moves import counts_of, play_rank
+
+
+JOURNAL_VERSION = 1
+
+# Record layout: event u8 | player u8 | target u8 | num_cards u8 | cards...
+# Every game starts with a START record of the machine that wrote it,
+# whose target is the journal version and whose single card is the number
+# of players, so games may be appended one after the other to one file
+RECORD = struct.Struct('!BBBB')
+
+Entry = Tuple[int, int, int, Tuple[int, ...]]
+
+
+class JournalEvent(Enum):
+    START = 0
+    SETUP = 1
+    DEAL = 2
+    REVOLUTION = 3
+    GREAT_REVOLUTION = 4
+    GIVE_CARDS = 5
+    PLAY_CARDS = 6
+    PASS = 7
+    HAND_EMPTY = 8
+    TRICK_END = 9
+
+
+class Journal():
+    """Append-only binary log of the events a ``Game`` applied.
+
+    SETUP holds the player order as its cards, DEAL the cards of one
+    player, GIVE_CARDS the cards ``player`` gave to ``target`` and
+    TRICK_END the player who won the trick. Records are flushed as they
+    are written so a journal survives its process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'ab')
+
+        pass
+
+    def start(self, machine_id: int, num_players: int):
+        self.append(JournalEvent.START, machine_id, [num_players], JOURNAL_VERSION)
+        return
+
+    def append(
+        self,
+        event: JournalEvent,
+        player: int = 0,
+        cards: Sequence[int] = (),
+        target: int = 0
+    ):
+        self.file.write(RECORD.pack(event.value, player, target, len(cards)) + bytes(cards))
+        self.file.flush()
+
+        return
+
+    def close(self):
+        self.file.close()
+        return
+
+    pass
+
+
+def read_journal(path: str) -> List[Entry]:
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    entries = []
+    offset = 0
+
+    while offset < len(data):
+        if offset + RECORD.size > len(data):
+            raise ValueError(f'Truncated record at byte {offset} of {path}')
+
+        (event, player, target, num_cards) = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+
+        cards = tuple(data[offset:offset + num_cards])
+        offset += num_cards
+
+        if len(cards) != num_cards:
+            raise ValueError(f'Truncated record at byte {offset} of {path}')
+
+        if event == JournalEvent.START.value and target != JOURNAL_VERSION:
+            raise ValueError(f'Unsupported journal version {target} in {path}')
+
+        entries.append((event, player, target, cards))
+
+    if entries and entries[0][0] != JournalEvent.START.value:
+        raise ValueError(f'{path} does not start with a game')
+
+    return entries
+
+
+class Replay():
+    """Rebuilds what a ``Game`` knew from the entries of its journal.
+
+    The state is an ``engine.RoundState`` with every hand as a count
+    vector, so it can be handed to a policy. ``seek`` moves to the state
+    right after any entry, replaying from the start when going back.
+    """
+
+    def __init__(self, entries: List[Entry]):
+        self.entries = entries
+        self.reset()
+
+        pass
+
+    def reset(self):
+        self.position = 0
+        self.machine_id = 0
+        self.state = None
+        self.revolution = 0
+        self.great_revolution = False
+
+        return
+
+    def seek(self, position: int):
+        position = max(0, min(position, len(self.entries)))
+
+        if position < self.position:
+            self.reset()
+
+        while self.position < position:
+            self.step()
+
+        return
+
+    def run(self):
+        self.seek(len(self.entries))
+        return
+
+    def step(self) -> Entry:
+        entry = self.entries[self.position]
+        self.position += 1
+
+        (event, player, target, cards) = entry
+        state = self.state
+
+        if event == JournalEvent.PLAY_CARDS.value:
+            hand = state.hands[player]
+            for card in cards:
+                hand[card - 1] -= 1
+                state.played[card - 1] += 1
+
+            state.num_cards[player] -= len(cards)
+            state.table_rank = play_rank(cards)
+            state.table_count = len(cards)
+            state.table_owner = player
+            state.turn = (state.order.index(player) + 1) % state.num_players
+        elif event == JournalEvent.PASS.value:
+            state.turn = (state.order.index(player) + 1) % state.num_players
+        elif event == JournalEvent.TRICK_END.value:
+            state.clear_table()
+        elif event == JournalEvent.HAND_EMPTY.value:
+            state.finish_order.append(player)
+        elif event == JournalEvent.GIVE_CARDS.value:
+            for card in cards:
+                state.hands[player][card - 1] -= 1
+                state.hands[target][card - 1] += 1
+        elif event == JournalEvent.DEAL.value:
+            state.hands[player] = counts_of(cards)
+            state.num_cards[player] = len(cards)
+        elif event == JournalEvent.SETUP.value:
+            state.order = list(cards)
+        elif event == JournalEvent.REVOLUTION.value:
+            self.revolution = player
+        elif event == JournalEvent.GREAT_REVOLUTION.value:
+            self.revolution = player
+            self.great_revolution = True
+            state.order.reverse()
+        elif event == JournalEvent.START.value:
+            self.machine_id = player
+            self.state = RoundState(cards[0])
+            self.revolution = 0
+            self.great_revolution = False
+
+        return entry
+
+    pass
+
+
+def format_entry(entry: Entry) -> str:
+    (event, player, target, cards) = entry
+    name = JournalEvent(event).name
+
+    if event == JournalEvent.START.value:
+        return f'{name:<17}machine {player}, {cards[0]} players'
+
+    if event == JournalEvent.SETUP.value:
+        return f'{name:<17}order {list(cards)}'
+
+    if event == JournalEvent.GIVE_CARDS.value:
+        return f'{name:<17}{player} -> {target} {list(cards)}'
+
+    if cards:
+        return f'{name:<17}{player} {list(cards)}'
+
+    return f'{name:<17}{player}'
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Replays game journals without sockets or input.'
+    )
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show = subparsers.add_parser('show', help='print the entries and the state at one of them')
+    show.add_argument('journal', help='journal file')
+    show.add_argument(
+        '-s',
+        '--seek',
+        type=int,
+        default=None,
+        help='stop after this many entries, all of them by default'
+    )
+    show.set_defaults(func=show_journal)
+
+    bench = subparsers.add_parser('bench', help='replay journals as fast as possible')
+    bench.add_argument('journals', nargs='+', help='journal files')
+    bench.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        default=100,
+        help='number of times every journal is replayed'
+    )
+    bench.set_defaults(func=bench_journals)
+
+    return parser.parse_args()
+
+
+def show_journal(args):
+    entries = read_journal(args.journal)
+    position = len(entries) if args.seek is None else args.seek
+
+    # Stop quietly when the output is piped into e.g. head
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+    for (i, entry) in enumerate(entries[:position]):
+        print(f'{i:>5}  {format_entry(entry)}')
+
+    replay = Replay(entries)
+    replay.seek(position)
+    state = replay.state
+
+    if state is None:
+        return
+
+    print()
+    print(f'Order: {state.order}')
+    print(f'Table: rank {state.table_rank}, {state.table_count} cards, owner {state.table_owner}')
+    print(f'Finished: {state.finish_order}')
+
+    # Hands are only known once their DEAL entry has been replayed
+    for id in state.order:
+        if id not in state.hands:
+            print(f'Player {id}: not dealt')
+            continue
+
+        print(f'Player {id}: {state.num_cards[id]} cards {state.hands[id]}')
+
+    return
+
+
+def bench_journals(args):
+    journals = [read_journal(path) for path in args.journals]
+    num_entries = sum(len(entries) for entries in journals) * args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for entries in journals:
+            Replay(entries).run()
+    elapsed = time.perf_counter() - start
+
+    print(f'{num_entries:,} entries in {elapsed:.3f}s: {num_entries / elapsed:,.0f} entries/s')
+    return
+
+
+def main():
+    args = get_args()
+    args.func(args)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import List
+
+from hybridring import DEFAULT_GROUP
+from metrics import MetricsExporter
+from policy import POLICIES
+
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+LOOPBACK = '127.0.0.1'
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Runs a whole ring of bot nodes on this machine over UDP.'
+    )
+
+    parser.add_argument(
+        '-n',
+        '--nodes',
+        type=int,
+        default=4,
+        help='number of nodes in the ring, from 4 to 64'
+    )
+    parser.add_argument(
+        '-b',
+        '--bot',
+        choices=POLICIES.keys(),
+        default='greedy',
+        help='bot policy played by every node'
+    )
+    parser.add_argument(
+        '--bot-budget',
+        type=float,
+        default=None,
+        help='seconds an mcts bot may think per decision'
+    )
+    parser.add_argument(
+        '-s',
+        '--seed',
+        type=int,
+        default=None,
+        help='seed of the deal and of the bots'
+    )
+    parser.add_argument(
+        '-t',
+        '--transport',
+        choices=['udp', 'asyncio', 'hybrid'],
+        default='udp',
+        help='ring transport of every node'
+    )
+    parser.add_argument(
+        '-l',
+        '--logs',
+        default=None,
+        help='directory for the config and node logs, a new temporary one by default'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=60.0,
+        help='seconds to wait for the game before killing every node'
+    )
+    parser.add_argument(
+        '-m',
+        '--metrics',
+        choices=MetricsExporter.FORMATS,
+        default=None,
+        help='have every node write its transport metrics next to its log'
+    )
+    parser.add_argument(
+        '-j',
+        '--journal',
+        action='store_true',
+        help='have every node write a journal of the game next to its log'
+    )
+    parser.add_argument(
+        '--trace',
+        action='store_true',
+        help='have every node dump a trace of its frames next to its log'
+    )
+    parser.add_argument(
+        '--token-timeout',
+        type=float,
+        default=None,
+        help='have every node regenerate a lost token after this many seconds of silence'
+    )
+    parser.add_argument(
+        '-d',
+        '--debug',
+        action='store_true',
+        help='run the nodes in debug mode'
+    )
+
+    return parser.parse_args()
+
+
+def free_ports(n: int) -> List[int]:
+    sockets = []
+    for _ in range(n):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.bind((LOOPBACK, 0))
+        sockets.append(s)
+
+    ports = [s.getsockname()[1] for s in sockets]
+
+    for s in sockets:
+        s.close()
+
+    return ports
+
+
+def write_config(
+    path: str,
+    num_nodes: int,
+    address: str = LOOPBACK,
+    group: str = None
+) -> List[int]:
+    """Writes a ``config.txt`` for ``num_nodes`` nodes on ``address``.
+
+    Every node gets its own free port and sends to the port of the next
+    one, and the nodes share one more on multicast ``group`` when it is
+    given. Returns the ports by node.
+    """
+    ports = free_ports(num_nodes + 1)
+    group_port = ports.pop()
+
+    with open(path, 'w') as f:
+        f.write(f'NUM_MACHINES {num_nodes}\n')
+
+        if group is not None:
+            f.write(f'MULTICAST {group}:{group_port}\n')
+
+        for i in range(num_nodes):
+            f.write(
+                f'\nMACHINE {i + 1}\n'
+                f'    ADDRESS {address}\n'
+                f'    SEND_ADDRESS {address}\n'
+                f'    SEND_PORT {ports[(i + 1) % num_nodes]}\n'
+                f'    RECV_PORT {ports[i]}\n'
+            )
+
+    return ports
+
+
+def is_bound(port: int, address: str = LOOPBACK) -> bool:
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    try:
+        s.bind((address, port))
+    except OSError:
+        return True
+    finally:
+        s.close()
+
+    return False
+
+
+def wait_bound(ports: List[int], deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        if all(is_bound(port) for port in ports):
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+class Node():
+    def __init__(self, id: int, args: List[str], log_path: str):
+        self.id = id
+        self.log_path = log_path
+
+        self.log = open(log_path, 'w')
+        self.start = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, MAIN, '--id', str(id)] + args,
+            stdout=self.log,
+            stderr=subprocess.STDOUT
+        )
+        self.elapsed = None
+
+        pass
+
+    def wait(self, deadline: float) -> bool:
+        try:
+            self.process.wait(timeout=max(deadline - time.perf_counter(), 0))
+        except subprocess.TimeoutExpired:
+            return False
+
+        self.elapsed = time.perf_counter() - self.start
+        return True
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+        return
+
+    def close(self):
+        self.log.close()
+        return
+
+    def finish_order(self) -> List[int]:
+        with open(self.log_path) as f:
+            lines = f.read().split('\n')
+
+        # The last line printed by a quiet node is its finish order
+        for line in reversed(lines):
+            if line.strip() != '':
+                try:
+                    return [int(id) for id in line.split()]
+                except ValueError:
+                    return []
+
+        return []
+
+    pass
+
+
+def launch(
+    num_nodes: int,
+    bot: str,
+    directory: str,
+    seed: int = None,
+    transport: str = 'udp',
+    timeout: float = 60.0,
+    debug: bool = False,
+    metrics: str = None,
+    trace: bool = False,
+    journal: bool = False,
+    token_timeout: float = None,
+    bot_budget: float = None
+) -> List[Node]:
+    """Runs one ``main.py`` process per node and waits for all of them.
+
+    Nodes that are still running after ``timeout`` seconds are killed.
+    """
+    config = os.path.join(directory, 'config.txt')
+    ports = write_config(
+        config,
+        num_nodes,
+        group=DEFAULT_GROUP if transport == 'hybrid' else None
+    )
+
+    args = ['--config', config, '--bot', bot, '--transport', transport, '--quiet']
+
+    if seed is not None:
+        args += ['--seed', str(seed)]
+
+    if debug:
+        args += ['--debug']
+
+    if token_timeout is not None:
+        args += ['--token-timeout', str(token_timeout)]
+
+    if bot_budget is not None:
+        args += ['--bot-budget', str(bot_budget)]
+
+    def node_args(id: int) -> List[str]:
+        extra = []
+
+        if metrics is not None:
+            extension = 'prom' if metrics == 'prometheus' else 'jsonl'
+            path = os.path.join(directory, f'node{id}.{extension}')
+            extra += ['--metrics', path, '--metrics-format', metrics]
+
+        if trace:
+            extra += ['--trace', os.path.join(directory, f'node{id}.trace')]
+
+        if journal:
+            extra += ['--journal', os.path.join(directory, f'node{id}.journal')]
+
+        return args + extra
+
+    deadline = time.perf_counter() + timeout
+
+    nodes = [
+        Node(id, node_args(id), os.path.join(directory, f'node{id}.log'))
+        for id in range(2, num_nodes + 1)
+    ]
+
+    # The dealer starts once the others are listening, so nothing it deals
+    # is lost and waits for a retransmission
+    if not wait_bound(ports[1:], deadline):
+        logging.error('Nodes did not start listening in time')
+
+    nodes.insert(0, Node(1, node_args(1), os.path.join(directory, 'node1.log')))
+
+    for node in nodes:
+        if not node.wait(deadline):
+            logging.error(f'Node {node.id} did not finish in {timeout}s, killing it')
+
+    for node in nodes:
+        node.kill()
+        node.close()
+
+    return nodes
+
+
+def report(nodes: List[Node]) -> bool:
+    ok = True
+    orders = set()
+
+    print(f'{"node":>6}{"exit":>6}{"seconds":>10}  finish order / log')
+
+    for node in nodes:
+        code = node.process.returncode
+        order = node.finish_order() if code == 0 else []
+
+        if code != 0 or not order:
+            ok = False
+        else:
+            orders.add(tuple(order))
+
+        elapsed = '-' if node.elapsed is None else f'{node.elapsed:.2f}'
+        print(f'{node.id:>6}{code:>6}{elapsed:>10}  {order} {node.log_path}')
+
+    if len(orders) > 1:
+        logging.error('Nodes disagree on the finish order')
+        ok = False
+
+    return ok
+
+
+def main():
+    args = get_args()
+
+    logging.basicConfig(format='[%(levelname)s] %(message)s', level=logging.WARNING)
+
+    directory = args.logs
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix='dalmuti-')
+    else:
+        os.makedirs(directory, exist_ok=True)
+
+    nodes = launch(
+        args.nodes,
+        args.bot,
+        directory,
+        args.seed,
+        args.transport,
+        args.timeout,
+        args.debug,
+        args.metrics,
+        args.trace,
+        args.journal,
+        args.token_timeout,
+        args.bot_budget
+    )
+
+    ok = report(nodes)
+
+    exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+import os
+import queue
+import threading
+import time
+
+from random import Random
+from typing import Dict, List
+
+from checkpoint import Checkpointer, read_checkpoint
+from engine import Policy
+from game import Game
+from interface import Interface
+from policy import make_policy
+from ring import MessageType, ORIGIN_OFFSET, Ring, SOCKET_TIMEOUT, TYPE_OFFSET
+
+
+# Where a CrashingRing goes down: waiting with nothing sent or held since
+# its last checkpoint, right after a play of its own went out, or holding
+# the token right before it gives it away
+CRASH_POINTS = ['wait', 'play', 'handoff']
+
+
+class LocalRing(Ring):
+    """In-memory stand-in for ``Ring``.
+
+    Frames are still encoded and decoded, but travel through queues instead
+    of UDP sockets, so a whole ring of ``Game`` instances can run as threads
+    of one process.
+    """
+
+    def __init__(
+        self,
+        num_machines: int,
+        machine_id: int,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        window: int = 1,
+        **kwargs
+    ):
+        super().__init__(num_machines, machine_id, 0, 0, None, '', window, **kwargs)
+
+        self.inbox = inbox
+        self.outbox = outbox
+        pass
+
+    def setup(self):
+        return
+
+    def cleanup(self):
+        return
+
+    def send(self, data):
+        self.outbox.put(data)
+        return
+
+    def recv_frame(self, timeout: float = SOCKET_TIMEOUT):
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    pass
+
+
+class LossyLocalRing(LocalRing):
+    """``LocalRing`` that drops each frame it sends with probability ``loss``.
+
+    Only frames of ``types`` are dropped when they are given, e.g. TOKEN to
+    lose nothing but tokens. Dropped frames are counted in ``dropped``.
+    """
+
+    def __init__(
+        self,
+        *args,
+        loss: float = 0.0,
+        types: List[int] = None,
+        rng: Random = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+
+        self.loss = loss
+        self.types = None if types is None else set(types)
+        self.rng = rng if rng is not None else Random()
+        self.dropped = 0
+        pass
+
+    def send(self, data):
+        if self.types is None or data[TYPE_OFFSET] in self.types:
+            if self.rng.random() < self.loss:
+                self.dropped += 1
+                return
+
+        self.outbox.put(data)
+        return
+
+    pass
+
+
+def make_local_ring(
+    num_machines: int,
+    window: int = 1,
+    cls = LocalRing,
+    **kwargs
+) -> List[LocalRing]:
+    queues = [queue.Queue() for _ in range(num_machines)]
+
+    # Machine i receives on queues[i] and sends to the next machine's queue
+    return [
+        cls(
+            num_machines,
+            i + 1,
+            queues[i],
+            queues[(i + 1) % num_machines],
+            window,
+            **kwargs
+        )
+        for i in range(num_machines)
+    ]
+
+
+def play_local_game(
+    num_players: int,
+    policies: Dict[int, Policy],
+    seed: int = None,
+    window: int = 1,
+    rings: List[LocalRing] = None
+) -> Dict[int, Game]:
+    """Runs one networked ``Game`` per player over a ``LocalRing``.
+
+    ``rings`` replaces the default ring, e.g. with a lossy one.
+    """
+    games = {}
+    threads = []
+
+    if rings is None:
+        rings = make_local_ring(num_players, window)
+
+    for ring in rings:
+        id = ring.machine_id
+        games[id] = Game(
+            ring,
+            num_players,
+            policy=policies[id],
+            interface=Interface(id, enabled=False),
+            rng=Random(seed)
+        )
+
+        threads.append(threading.Thread(target=games[id].run, daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return games
+
+
+class NodeCrash(Exception):
+    pass
+
+
+class CrashingRing(LocalRing):
+    """``LocalRing`` of a machine that dies after ``crash_after`` checkpoints.
+
+    It dies at the first ``crash_at`` of ``CRASH_POINTS`` it reaches after
+    that many, raising NodeCrash. When the first frame after it was built
+    arrived is kept in ``first_frame``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.checkpointer: Checkpointer = None
+        self.crash_after = None
+        self.crash_at = 'wait'
+        self.first_frame = None
+        pass
+
+    def send(self, data):
+        type = data[TYPE_OFFSET]
+
+        if type == MessageType.TOKEN.value and self.has_token and self.__due('handoff'):
+            raise NodeCrash(f'Machine {self.machine_id} crashed holding the token')
+
+        super().send(data)
+
+        if (type == MessageType.PLAY_CARDS.value and data[ORIGIN_OFFSET] == self.machine_id
+                and self.__due('play')):
+            raise NodeCrash(f'Machine {self.machine_id} crashed after its play')
+
+        return
+
+    def recv_frame(self, timeout: float = SOCKET_TIMEOUT):
+        if not self.in_flight and not self.ready and not self.has_token and self.__due('wait'):
+            raise NodeCrash(f'Machine {self.machine_id} crashed')
+
+        data = super().recv_frame(timeout)
+
+        if data is not None and self.first_frame is None:
+            self.first_frame = time.perf_counter()
+
+        return data
+
+    def __due(self, point: str) -> bool:
+        return (self.crash_after is not None
+            and self.crash_at == point
+            and self.checkpointer.writes >= self.crash_after)
+
+    pass
+
+
+def play_with_restart(
+    num_machines: int,
+    victim: int,
+    after: int,
+    downtime: float,
+    token_timeout: float,
+    policy: str,
+    seed: int,
+    directory: str,
+    crash_at: str = 'wait'
+) -> dict:
+    """Plays a bot game in which ``victim`` crashes and restarts from its checkpoint.
+
+    Frames that reach the victim while it is down are lost. Returns the
+    games by id, the checkpointers and, when the victim did crash, how
+    long restoring, hearing the ring again and finishing the round from
+    the restart took.
+    """
+    rings = make_local_ring(num_machines, cls=CrashingRing, token_timeout=token_timeout)
+    rings[victim - 1].crash_after = after
+    rings[victim - 1].crash_at = crash_at
+
+    games = {}
+    checkpointers = []
+    crashed = threading.Event()
+
+    def make_game(ring: CrashingRing) -> Game:
+        id = ring.machine_id
+
+        checkpointer = Checkpointer(os.path.join(directory, f'node{id}.checkpoint'))
+        checkpointers.append(checkpointer)
+        ring.checkpointer = checkpointer
+
+        return Game(
+            ring,
+            num_machines,
+            policy=make_policy(policy, Random(seed + id)),
+            interface=Interface(id, enabled=False),
+            rng=Random(seed),
+            checkpointer=checkpointer
+        )
+
+    def run(game: Game):
+        try:
+            game.run()
+        except NodeCrash:
+            crashed.set()
+
+        return
+
+    threads = []
+    for ring in rings:
+        games[ring.machine_id] = make_game(ring)
+        threads.append(threading.Thread(target=run, args=(games[ring.machine_id],), daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    threads[victim - 1].join()
+
+    result = {'games': games, 'checkpointers': checkpointers, 'rings': rings}
+
+    if crashed.is_set():
+        time.sleep(downtime)
+
+        old = rings[victim - 1]
+        while True:
+            try:
+                old.inbox.get_nowait()
+            except queue.Empty:
+                break
+
+        restarted = time.perf_counter()
+
+        # Read before the new checkpointer empties the file
+        checkpoint = read_checkpoint(os.path.join(directory, f'node{victim}.checkpoint'))
+        game_id = games[victim % num_machines + 1].get_game_id()
+
+        ring = CrashingRing(num_machines, victim, old.inbox, old.outbox, token_timeout=token_timeout)
+        game = make_game(ring)
+        game.restore_state(checkpoint, game_id)
+
+        result['restore'] = time.perf_counter() - restarted
+        rings.append(ring)
+        games[victim] = game
+
+        thread = threading.Thread(target=run, args=(game,), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    if crashed.is_set():
+        result['recovery'] = time.perf_counter() - restarted
+
+        if rings[-1].first_frame is not None:
+            result['resync'] = rings[-1].first_frame - restarted
+
+    return result
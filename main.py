@@ -1,9 +1,27 @@
 import argparse
 import logging
-import socket
+import time
 
+from random import Random
+
+from aioring import ThreadedRing
+from checkpoint import Checkpointer, read_checkpoint
+from config import ConfigError, load_config, resolve
 from ring import Ring, Message, MessageType
 from game import Game
+from hybridring import HybridRing
+from interface import Interface
+from journal import Journal
+from metrics import MetricsExporter
+from policy import POLICIES, make_policy
+from tracer import Tracer
+
+
+TRANSPORTS = {
+    'udp': Ring,
+    'asyncio': ThreadedRing,
+    'hybrid': HybridRing,
+}
 
 
 def get_args():
@@ -17,61 +35,125 @@ def get_args():
         action='store_true',
         help='run logging in debug mode'
     )
-    
-    return parser.parse_args()
 
+    parser.add_argument(
+        '-t',
+        '--transport',
+        choices=TRANSPORTS.keys(),
+        default='udp',
+        help='ring transport, asyncio keeps forwarding while waiting for input, '
+            'hybrid sends frames straight to every machine and only passes the token on'
+    )
+
+    parser.add_argument(
+        '-c',
+        '--config',
+        default='config.txt',
+        help='ring configuration file'
+    )
 
-def get_local_address():
-    return socket.gethostbyname(socket.gethostname())
+    parser.add_argument(
+        '-i',
+        '--id',
+        type=int,
+        default=None,
+        help='machine id in the configuration, instead of matching the local address'
+    )
 
+    parser.add_argument(
+        '-b',
+        '--bot',
+        choices=POLICIES.keys(),
+        default=None,
+        help='let a bot policy play instead of reading input'
+    )
 
-def get_config_data():
-    num_players = 1
-    machine_id = -1
-    send_address = -1
-    send_port = -1
-    recv_port = -1
+    parser.add_argument(
+        '--bot-budget',
+        type=float,
+        default=None,
+        help='seconds the mcts bot may think per decision'
+    )
 
-    local_address = get_local_address()
+    parser.add_argument(
+        '-s',
+        '--seed',
+        type=int,
+        default=None,
+        help='seed of the deal and of the bot'
+    )
 
-    f = None
-    try:
-        f = open('config.txt')
-    except:
-        logging.error('File config.txt does not exist, exiting...')
-        exit(-1)
+    parser.add_argument(
+        '-q',
+        '--quiet',
+        action='store_true',
+        help='do not draw the game, only print the finish order at the end'
+    )
 
-    num_players = int(f.readline().split()[1])
+    parser.add_argument(
+        '--render-interval',
+        type=float,
+        default=0.0,
+        help='least seconds between two frames of the game, every change is drawn by default'
+    )
 
-    if num_players < 4 or num_players > 8:
-        print('O número de jogadores deve estar entre 4 e 8')
-        exit(1)
+    parser.add_argument(
+        '--metrics',
+        default=None,
+        help='periodically write the transport metrics to this file'
+    )
 
-    line = f.readline()
-    while line != '':
-        line = f.readline()
-
-        if 'MACHINE' not in line:
-            continue
-            
-        id = int(line.split()[1])
-        address = f.readline().split()[1].strip()
-
-        if address == local_address:
-            machine_id = id 
-            send_address = f.readline().split()[1].strip()
-            send_port = int(f.readline().split()[1])
-            recv_port = int(f.readline().split()[1])
-            break
-
-    if machine_id == -1:
-        print('Error: machine address is not in config.txt')
-        exit(1)
+    parser.add_argument(
+        '--metrics-format',
+        choices=MetricsExporter.FORMATS,
+        default='prometheus',
+        help='prometheus text file, replaced on every dump, or appended JSON lines'
+    )
+
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=10.0,
+        help='seconds between metrics dumps'
+    )
+
+    parser.add_argument(
+        '-j',
+        '--journal',
+        default=None,
+        help='append every event of the game to this journal'
+    )
 
-    return num_players, machine_id, send_port, recv_port, send_address
+    parser.add_argument(
+        '--trace',
+        default=None,
+        help='record every frame of the udp transport and dump them to this file on exit'
+    )
+
+    parser.add_argument(
+        '--token-timeout',
+        type=float,
+        default=None,
+        help='regenerate a token lost on the udp transport after this many seconds of silence, for bots only'
+    )
+
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        help='keep the latest state of the round on the udp transport in this file, emptied once the round is over'
+    )
+
+    parser.add_argument(
+        '--restore',
+        action='store_true',
+        help='go on with the round saved in --checkpoint instead of waiting for SETUP and DEAL'
+    )
+
+    return parser.parse_args()
 
 
 def main():
+    start = time.perf_counter()
     args = get_args()
 
     logging.basicConfig(
@@ -79,30 +161,145 @@ def main():
         level=logging.DEBUG if args.debug else logging.WARNING
     )
 
-    num_players, id, send_port, recv_port, send_address = get_config_data()
+    try:
+        config = load_config(args.config)
+        machine = config.machine(args.id)
+
+        # Resolved once here, so neither binding nor sending looks them up
+        address = resolve(machine.address)
+        send_address = resolve(machine.send_address)
+    except ConfigError as e:
+        print(f'Error: {e}')
+        exit(1)
+
+    num_players = config.num_machines
+    id = machine.id
+    send_port = machine.send_port
+    recv_port = machine.recv_port
 
     logging.info('Machine configuration:\n'
           f'\tID: {id}\n'
-          f'\tAddress: {get_local_address()}\n'
+          f'\tAddress: {address}\n'
           f'\tSend address: {send_address}\n'
           f'\tSend port: {send_port}\n'
           f'\tRecv port: {recv_port}\n'
     )
 
-    ring = Ring(
+    kwargs = {}
+    if args.token_timeout is not None:
+        if args.transport == 'asyncio':
+            print('Error: --token-timeout needs the udp or hybrid transport')
+            exit(1)
+
+        kwargs['token_timeout'] = args.token_timeout
+
+    if args.checkpoint is not None and args.transport == 'asyncio':
+        print('Error: --checkpoint needs the udp or hybrid transport')
+        exit(1)
+
+    if args.transport == 'hybrid':
+        try:
+            kwargs['peers'] = config.peers()
+        except ConfigError as e:
+            print(f'Error: {e}')
+            exit(1)
+
+        kwargs['group'] = config.multicast
+
+    if args.restore and args.checkpoint is None:
+        print('Error: --restore needs --checkpoint')
+        exit(1)
+
+    # A token lost with the machine is only ever claimed back after a timeout
+    if args.restore and args.token_timeout is None:
+        print('Error: --restore needs --token-timeout')
+        exit(1)
+
+    ring = TRANSPORTS[args.transport](
         num_players,
         id,
         send_port,
         recv_port,
-        send_address
+        send_address,
+        address,
+        **kwargs
     )
     ring.setup()
-    game = Game(ring, num_players)
+
+    logging.info(
+        f'Config read in {config.seconds * 1e3:.2f}ms, '
+        f'bound in {(time.perf_counter() - start) * 1e3:.2f}ms'
+    )
+
+    if args.trace is not None:
+        ring.tracer = Tracer(id)
+        ring.tracer.dump_on_exit(args.trace)
+
+    exporter = None
+    if args.metrics is not None:
+        exporter = MetricsExporter(
+            ring.metrics,
+            args.metrics,
+            args.metrics_interval,
+            args.metrics_format
+        )
+        exporter.start()
+
+    policy = None
+    if args.bot is not None:
+        seed = None if args.seed is None else args.seed + id
+        policy = make_policy(args.bot, Random(seed), args.bot_budget)
+
+    journal = None
+    if args.journal is not None:
+        journal = Journal(args.journal)
+
+    # Read before the checkpointer opens the file, which empties it
+    checkpoint = None
+    if args.restore:
+        try:
+            checkpoint = read_checkpoint(args.checkpoint)
+        except (OSError, ValueError) as e:
+            print(f'Error: cannot restore {args.checkpoint}: {e}')
+            exit(1)
+
+    checkpointer = None
+    if args.checkpoint is not None:
+        checkpointer = Checkpointer(args.checkpoint)
+
+    game = Game(
+        ring,
+        num_players,
+        policy=policy,
+        interface=Interface(id, enabled=not args.quiet, interval=args.render_interval),
+        rng=Random(args.seed),
+        journal=journal,
+        checkpointer=checkpointer
+    )
+
+    if checkpoint is not None:
+        try:
+            game.restore_state(checkpoint)
+        except ValueError as e:
+            print(f'Error: cannot restore {args.checkpoint}: {e}')
+            exit(1)
 
     game.run()
 
     ring.cleanup()
 
+    if journal is not None:
+        journal.close()
+
+    if checkpointer is not None:
+        checkpointer.close()
+
+    if exporter is not None:
+        exporter.stop()
+
+    if args.quiet:
+        print(' '.join(str(id) for id in game.get_finish_order()))
+
     return
 
 
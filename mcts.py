@@ -0,0 +1,358 @@
+import math
+import time
+
+from random import Random
+from typing import Callable, Dict, List
+
+from engine import Policy, PlayState, RoundState, tax_transfers, worst_cards
+from moves import JESTER, NUM_RANKS, Play, counts_of, deck_counts, greedy_play, tax_tiers
+from solver import SOLVE_CARDS, Solver
+
+
+# Seconds a decision may take, give or take one playout
+DEFAULT_BUDGET = 0.1
+
+# Weight of the exploration term of UCB1, for rewards between 0 and 1
+EXPLORATION = 0.7
+
+# Share of the moves of a playout picked at random instead of greedily
+ROLLOUT_EPSILON = 0.1
+
+# Taxes are only chosen among the cards of this many worst ranks held
+TAX_RANKS = 5
+
+class Node():
+    __slots__ = ('player', 'children', 'visits', 'reward', 'available')
+
+    def __init__(self, player: int):
+        # Who made the move into this node, whose reward it adds up
+        self.player = player
+        self.children: Dict[Play, Node] = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.available = 0
+
+    pass
+
+
+def unseen_cards(state: RoundState, player: int) -> List[int]:
+    """Cards neither in the hand of ``player`` nor played, one entry per card."""
+    hand = state.hands[player]
+    deck = deck_counts(state.num_players)
+    cards = []
+
+    for i in range(NUM_RANKS):
+        cards += max(deck[i] - hand[i] - state.played[i], 0) * [i + 1]
+
+    return cards
+
+
+class MCTSPolicy(Policy):
+    """Determinized Monte Carlo tree search within a time budget per decision.
+
+    Every playout deals the cards it has not seen to the other players
+    anew, and one tree over the moves of every player is grown across all
+    of those deals, counting how often each move was available to pick
+    among them (single observer information set MCTS). Playouts run on a
+    ``PlayState`` with moves picked greedily, some at random. Taxes and
+    revolutions compare their few choices with playouts of the whole
+    round. A decision takes ``budget`` seconds and one playout at most;
+    ``playouts``, ``decisions`` and ``seconds`` add up all of them.
+
+    Once a single other player holds cards, the unseen cards are all
+    theirs, and with at most ``solve_cards`` cards left the play is
+    solved exactly by ``solver`` instead.
+    """
+
+    def __init__(
+        self,
+        rng: Random = None,
+        budget: float = DEFAULT_BUDGET,
+        exploration: float = EXPLORATION,
+        solve_cards: int = None
+    ):
+        self.rng = rng if rng is not None else Random()
+        self.budget = budget
+        self.exploration = exploration
+        self.solve_cards = SOLVE_CARDS if solve_cards is None else solve_cards
+        self.solver = Solver()
+
+        self.playouts = 0
+        self.decisions = 0
+        self.seconds = 0.0
+
+        pass
+
+    def play(self, state: RoundState, player: int) -> List[int]:
+        start = time.perf_counter()
+
+        hands = self.__hands(state, player)
+        root_state = PlayState(
+            state.order,
+            hands,
+            state.table_rank,
+            state.table_count,
+            state.table_owner,
+            state.order.index(player),
+            state.finish_order.copy()
+        )
+
+        actions = root_state.actions()
+        if len(actions) == 1:
+            return list(actions[0])
+
+        unseen = unseen_cards(state, player)
+
+        holding = [id for id in state.order if id != player and state.num_cards[id] != 0]
+        if len(holding) == 1 and len(unseen) + root_state.num_cards[player] <= self.solve_cards:
+            hands[holding[0]] = counts_of(unseen)
+            play = self.solver.best_play(state, player, hands)
+
+            self.__count(start, 0)
+            return play
+
+        others = [id for id in state.order if id != player]
+        sizes = [state.num_cards[id] for id in others]
+
+        root = Node(player)
+        deadline = start + self.budget
+        playouts = 0
+
+        while playouts == 0 or time.perf_counter() < deadline:
+            self.__deal(hands, others, sizes, unseen)
+            root_state.num_cards = {id: sum(hand) for id, hand in hands.items()}
+
+            self.__search(root_state, root)
+            playouts += 1
+
+        (action, _) = max(root.children.items(), key=lambda item: item[1].visits)
+
+        self.__count(start, playouts)
+        return list(action)
+
+    def gd_taxes(self, state: RoundState, player: int) -> List[int]:
+        return self.__taxes(state, player)
+
+    def ld_taxes(self, state: RoundState, player: int) -> List[int]:
+        return self.__taxes(state, player)
+
+    def revolution(self, state: RoundState, player: int) -> bool:
+        order = state.order
+
+        def start(hands, revolution):
+            if not revolution:
+                return (order, tax_transfers(order, hands))
+
+            # A revolution of the Greater Peon reverses the order as well
+            if player == order[-1]:
+                return (order[::-1], [])
+
+            return (order, [])
+
+        return self.__compare(state, player, [True, False], start)
+
+    def __taxes(self, state: RoundState, player: int) -> List[int]:
+        """The cards ``player`` gives back to its Peon, the others giving their worst."""
+        order = state.order
+        n = tax_tiers(state.num_players)[order.index(player)]
+        options = self.__tax_options(state.hands[player], n)
+
+        def start(hands, option):
+            return (order, tax_transfers(order, hands, {player: list(option)}))
+
+        return list(self.__compare(state, player, options, start))
+
+    def __hands(self, state: RoundState, player: int) -> Dict[int, List[int]]:
+        hands = {id: [0] * NUM_RANKS for id in state.order}
+        hands[player] = list(state.hands[player])
+
+        return hands
+
+    def __deal(
+        self,
+        hands: Dict[int, List[int]],
+        others: List[int],
+        sizes: List[int],
+        unseen: List[int]
+    ):
+        self.rng.shuffle(unseen)
+
+        offset = 0
+        for (id, size) in zip(others, sizes):
+            hand = hands[id]
+            for i in range(NUM_RANKS):
+                hand[i] = 0
+
+            for card in unseen[offset:offset + size]:
+                hand[card - 1] += 1
+
+            offset += size
+
+        return
+
+    def __search(self, state: PlayState, root: Node):
+        """One playout from ``state``: down the tree, one new node, then greedy."""
+        node = root
+        path = []
+        exploration = self.exploration
+
+        while not state.is_over():
+            mover = state.player
+            untried = []
+            best = None
+            best_score = -1.0
+
+            for action in state.actions():
+                child = node.children.get(action)
+
+                if child is None:
+                    untried.append(action)
+                    continue
+
+                child.available += 1
+                score = (child.reward / child.visits
+                    + exploration * math.sqrt(math.log(child.available) / child.visits))
+
+                if score > best_score:
+                    (best, best_score) = (action, score)
+
+            if untried:
+                action = self.rng.choice(untried)
+                child = Node(mover)
+                child.available = 1
+                node.children[action] = child
+
+                state.make(action)
+                path.append(child)
+                break
+
+            node = node.children[best]
+            state.make(best)
+            path.append(node)
+
+        self.__rollout(state)
+        rewards = state.rewards()
+
+        root.visits += 1
+        for node in path:
+            node.visits += 1
+            node.reward += rewards[node.player]
+
+        state.unmake_all()
+        return
+
+    def __rollout(self, state: PlayState):
+        rng = self.rng
+
+        while not state.is_over():
+            if rng.random() < ROLLOUT_EPSILON:
+                state.make(rng.choice(state.actions()))
+            else:
+                state.make(greedy_play(
+                    state.hands[state.player],
+                    state.table_rank,
+                    state.table_count
+                ))
+
+        return
+
+    def __tax_options(self, hand: List[int], n: int) -> List[tuple]:
+        cards = []
+        ranks = 0
+        for rank in range(NUM_RANKS, 0, -1):
+            if hand[rank - 1] == 0 or rank == JESTER:
+                continue
+
+            cards += min(hand[rank - 1], n) * [rank]
+            ranks += 1
+
+            if ranks == TAX_RANKS:
+                break
+
+        options = set()
+        for (i, card) in enumerate(cards):
+            if n == 1:
+                options.add((card,))
+            else:
+                for other in cards[i + 1:]:
+                    options.add((card, other))
+
+        # A hand of Jesters and nothing else still has to pay
+        return sorted(options) or [tuple(worst_cards(hand, n))]
+
+    def __compare(
+        self,
+        state: RoundState,
+        player: int,
+        options: list,
+        start: Callable
+    ):
+        """The option with the best playouts of the whole round, picked by UCB1.
+
+        ``start`` returns the order and the card transfers a round would
+        start with after the option, given the dealt hands.
+        """
+        begin = time.perf_counter()
+
+        if len(options) == 1:
+            return options[0]
+
+        hands = self.__hands(state, player)
+        unseen = unseen_cards(state, player)
+        others = [id for id in state.order if id != player]
+        sizes = [state.num_cards[id] for id in others]
+
+        visits = [0] * len(options)
+        rewards = [0.0] * len(options)
+        deadline = begin + self.budget
+        playouts = 0
+
+        while playouts < len(options) or time.perf_counter() < deadline:
+            if playouts < len(options):
+                i = playouts
+            else:
+                log = math.log(playouts)
+                i = max(
+                    range(len(options)),
+                    key=lambda j: rewards[j] / visits[j]
+                        + self.exploration * math.sqrt(log / visits[j])
+                )
+
+            self.__deal(hands, others, sizes, unseen)
+            (order, transfers) = start(hands, options[i])
+
+            # Every transfer is chosen from the hands as they were dealt
+            for (giver, _, cards) in transfers:
+                for card in cards:
+                    hands[giver][card - 1] -= 1
+
+            for (_, receiver, cards) in transfers:
+                for card in cards:
+                    hands[receiver][card - 1] += 1
+
+            round = PlayState(order, hands)
+            self.__rollout(round)
+            rewards[i] += round.rewards()[player]
+            visits[i] += 1
+            playouts += 1
+
+            round.unmake_all()
+
+            for (giver, receiver, cards) in transfers:
+                for card in cards:
+                    hands[receiver][card - 1] -= 1
+                    hands[giver][card - 1] += 1
+
+        best = max(range(len(options)), key=lambda i: visits[i])
+
+        self.__count(begin, playouts)
+        return options[best]
+
+    def __count(self, start: float, playouts: int):
+        self.playouts += playouts
+        self.decisions += 1
+        self.seconds += time.perf_counter() - start
+
+        return
+
+    pass
@@ -0,0 +1,19 @@
+from enum import Enum
+
+
+class MessageType(Enum):
+    PLAY_CARDS = 1
+    PASS = 2
+    TOKEN = 3
+    SETUP = 4
+    DEAL = 5
+    REVOLUTION = 6
+    GREAT_REVOLUTION = 7
+    ROUND_READY = 8
+    GIVE_CARDS = 9
+    TOKEN_SETTLED = 10
+    ROUND_FINISHED = 11
+    HAND_EMPTY = 12
+    TOKEN_CLAIM = 13
+    ACK = 14
+    MOCK_MESSAGE = 42
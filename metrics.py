@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from typing import Dict
+
+
+# Message types are one byte on the wire
+NUM_TYPES = 256
+
+# Counted per message type
+TYPE_COUNTERS = [
+    'sent',
+    'received',
+    'forwarded',
+    'retransmitted',
+    'duplicates',
+    'bytes_sent',
+    'bytes_received',
+    'circuits',
+    'circuit_seconds',
+]
+
+# Counted for the whole machine
+MACHINE_COUNTERS = [
+    'timeouts',
+    'invalid_frames',
+    'token_holds',
+    'token_seconds',
+    'blocked_seconds',
+    'token_claims',
+    'tokens_regenerated',
+    'stale_tokens',
+    'token_recovery_seconds',
+]
+
+PROMETHEUS_PREFIX = 'dalmuti_ring_'
+
+
+class Metrics():
+    """Counters and timers of one machine of the ring.
+
+    Counters per message type are plain lists indexed by the type byte, so
+    recording is a list increment and cheap enough to leave on. Readers
+    take a ``snapshot``, which leaves out types that were never seen.
+    """
+
+    def __init__(self, machine_id: int, type_names: Dict[int, str] = None):
+        self.machine_id = machine_id
+        self.type_names = type_names if type_names is not None else {}
+        self.started = time.time()
+
+        for name in TYPE_COUNTERS:
+            setattr(self, name, [0] * NUM_TYPES)
+
+        for name in MACHINE_COUNTERS:
+            setattr(self, name, 0)
+
+        self.token_since = None
+
+        pass
+
+    def token_acquired(self):
+        if self.token_since is None:
+            self.token_since = time.perf_counter()
+            self.token_holds += 1
+
+        return
+
+    def token_released(self):
+        if self.token_since is not None:
+            self.token_seconds += time.perf_counter() - self.token_since
+            self.token_since = None
+
+        return
+
+    def snapshot(self) -> dict:
+        types = {}
+        for type in range(NUM_TYPES):
+            counters = {name: getattr(self, name)[type] for name in TYPE_COUNTERS}
+
+            if any(counters.values()):
+                types[self.type_names.get(type, str(type))] = counters
+
+        machine = {name: getattr(self, name) for name in MACHINE_COUNTERS}
+
+        # Include the hold that is still going on
+        if self.token_since is not None:
+            machine['token_seconds'] += time.perf_counter() - self.token_since
+
+        return {
+            'machine': self.machine_id,
+            'time': time.time(),
+            'uptime_seconds': time.time() - self.started,
+            'types': types,
+            **machine,
+        }
+
+    def to_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        machine = snapshot['machine']
+        lines = []
+
+        for name in TYPE_COUNTERS:
+            metric = f'{PROMETHEUS_PREFIX}{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+
+            for (type, counters) in snapshot['types'].items():
+                lines.append(
+                    f'{metric}{{machine="{machine}",type="{type}"}} {counters[name]}'
+                )
+
+        for name in MACHINE_COUNTERS:
+            metric = f'{PROMETHEUS_PREFIX}{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{{machine="{machine}"}} {snapshot[name]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    pass
+
+
+class MetricsExporter():
+    """Dumps ``metrics`` to ``path`` every ``interval`` seconds from a thread.
+
+    ``prometheus`` replaces the file with the text exposition format, ready
+    for the textfile collector, while ``jsonl`` appends one snapshot per
+    line. A last dump is written on ``stop``.
+    """
+
+    FORMATS = ['prometheus', 'jsonl']
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        path: str,
+        interval: float = 10.0,
+        format: str = 'prometheus'
+    ):
+        if format not in MetricsExporter.FORMATS:
+            raise ValueError(
+                f'Unknown metrics format {format}, choose from {MetricsExporter.FORMATS}'
+            )
+
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.format = format
+
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+
+        pass
+
+    def start(self):
+        self.thread.start()
+        return
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.dump()
+
+        return
+
+    def dump(self):
+        try:
+            if self.format == 'prometheus':
+                # Written aside and renamed so readers never see half a file
+                tmp = f'{self.path}.tmp'
+                with open(tmp, 'w') as f:
+                    f.write(self.metrics.to_prometheus())
+
+                os.replace(tmp, self.path)
+            else:
+                with open(self.path, 'a') as f:
+                    f.write(self.metrics.to_json() + '\n')
+        except OSError as e:
+            logging.warning(f'[METRICS] Could not write {self.path}: {e}')
+
+        return
+
+    def __run(self):
+        while not self.stopped.wait(self.interval):
+            self.dump()
+
+        return
+
+    pass
@@ -0,0 +1,189 @@
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+
+# Cards are cards.Card values, from DALMUTI = 1 to JESTER = 13. They are
+# repeated here so that counts need no Card to be looked up
+NUM_RANKS = 13
+JESTER = 13
+
+# Rank of an empty table: every card is lower than it
+EMPTY_TABLE = NUM_RANKS + 1
+
+# How many cards of each rank the deck holds, as a count vector
+DECK = tuple(range(1, JESTER)) + (2,)
+
+# Another deck is shuffled in for every this many players, so hands keep
+# about ten cards however large the ring is
+PLAYERS_PER_DECK = 8
+
+# Cards paid in every tier of taxes, from both ends of the order inwards:
+# the Greater Peon pays its two best cards to the Greater Dalmuti and the
+# Lesser Peon one to the Lesser Dalmuti, who give back as many cards of
+# their choice. Every deck after the first adds a tier paying one card
+TAXES = (2, 1)
+EXTRA_DECK_TAX = 1
+
+Play = Tuple[int, ...]
+
+PLAYS_CACHE_SIZE = 1 << 16
+
+
+def num_decks(num_players: int) -> int:
+    return -(-num_players // PLAYERS_PER_DECK)
+
+
+def deck_counts(num_players: int) -> Tuple[int, ...]:
+    """How many cards of each rank the decks of ``num_players`` players hold."""
+    decks = num_decks(num_players)
+    return tuple(count * decks for count in DECK)
+
+
+def tax_tiers(num_players: int) -> Tuple[int, ...]:
+    """Cards paid in each tier of taxes, the tier of the Greater Dalmuti first."""
+    return TAXES + (num_decks(num_players) - 1) * (EXTRA_DECK_TAX,)
+
+
+def counts_of(cards: Sequence[int]) -> list:
+    counts = [0] * NUM_RANKS
+    for card in cards:
+        counts[card - 1] += 1
+
+    return counts
+
+
+def play_rank(cards: Sequence[int]) -> int:
+    for card in cards:
+        if card != JESTER:
+            return card
+
+    return JESTER
+
+
+def validate_play(
+    hand: Sequence[int],
+    cards: Sequence[int],
+    table_rank: int,
+    table_count: int
+) -> Optional[str]:
+    """Returns why ``cards`` cannot be played, or None when they can.
+
+    ``hand`` is a count vector and the table is described by the rank of
+    the cards on it and how many there are, 0 when it is empty. An empty
+    ``cards`` is a pass, which is only allowed when following.
+    """
+    if len(cards) == 0:
+        if table_count == 0:
+            return 'Você precisa jogar alguma carta'
+
+        return None
+
+    rank = JESTER
+    naturals = 0
+    for card in cards:
+        if card < 1 or card > JESTER:
+            return f'Carta inválida: {card}'
+
+        if card == JESTER:
+            continue
+
+        if rank != JESTER and card != rank:
+            return 'Você deve jogar apenas cartas do mesmo tipo ou coringas...'
+
+        rank = card
+        naturals += 1
+
+    jesters = len(cards) - naturals
+
+    if hand[rank - 1] < naturals or hand[JESTER - 1] < jesters:
+        return 'Você não tem alguma das cartas que jogou...'
+
+    if table_count != 0 and len(cards) != table_count:
+        return 'Você precisa jogar a mesma quantidade de cartas que estão na mesa'
+
+    if rank >= table_rank:
+        return 'Você precisa jogar cartas de valor menor que as que estão na mesa (ou passar)'
+
+    return None
+
+
+def is_legal_play(
+    hand: Sequence[int],
+    cards: Sequence[int],
+    table_rank: int,
+    table_count: int
+) -> bool:
+    return validate_play(hand, cards, table_rank, table_count) is None
+
+
+def legal_plays(
+    hand: Sequence[int],
+    table_rank: int,
+    table_count: int
+) -> Tuple[Play, ...]:
+    """Every play allowed from ``hand``, passing excluded.
+
+    A play of a rank may replace any of its cards but one with Jesters, and
+    each way of doing so is its own play. Results are cached by hand and
+    table, so they are shared tuples that must not be modified.
+    """
+    return _legal_plays(tuple(hand), table_rank, table_count)
+
+
+@lru_cache(maxsize=PLAYS_CACHE_SIZE)
+def _legal_plays(hand: tuple, table_rank: int, table_count: int) -> Tuple[Play, ...]:
+    jesters = hand[JESTER - 1]
+    plays = []
+
+    for rank in range(1, min(table_rank, JESTER)):
+        count = hand[rank - 1]
+        if count == 0:
+            continue
+
+        if table_count != 0:
+            sizes = [table_count]
+        else:
+            sizes = range(1, count + jesters + 1)
+
+        for size in sizes:
+            for naturals in range(max(1, size - jesters), min(count, size) + 1):
+                plays.append(naturals * (rank,) + (size - naturals) * (JESTER,))
+
+    if table_count == 0:
+        for size in range(1, jesters + 1):
+            plays.append(size * (JESTER,))
+
+    return tuple(plays)
+
+
+def greedy_play(hand: List[int], table_rank: int, table_count: int) -> List[int]:
+    """The worst cards of ``hand`` that can be played, only adding Jesters when needed."""
+    jesters = hand[JESTER - 1]
+    need = table_count
+
+    for rank in range(min(table_rank, JESTER) - 1, 0, -1):
+        count = hand[rank - 1]
+        if count == 0:
+            continue
+
+        if need == 0:
+            return count * [rank]
+
+        if count >= need:
+            return need * [rank]
+
+        if count + jesters >= need:
+            return count * [rank] + (need - count) * [JESTER]
+
+    if need == 0:
+        return jesters * [JESTER]
+
+    return []
+
+
+def cache_info():
+    return _legal_plays.cache_info()
+
+
+def cache_clear():
+    _legal_plays.cache_clear()
@@ -0,0 +1,75 @@
+from random import Random
+from typing import List
+
+from engine import Policy, RoundState, worst_cards
+from mcts import DEFAULT_BUDGET, MCTSPolicy
+from moves import greedy_play, legal_plays
+
+
+class RandomPolicy(Policy):
+    """Picks uniformly among the legal plays, passing included."""
+
+    def __init__(self, rng: Random = None):
+        self.rng = rng if rng is not None else Random()
+
+    def revolution(self, state: RoundState, player: int) -> bool:
+        return self.rng.random() < 0.5
+
+    def play(self, state: RoundState, player: int) -> List[int]:
+        plays = legal_plays(state.hands[player], state.table_rank, state.table_count)
+
+        # Passing is one more choice whenever the table is not empty
+        if state.table_count != 0:
+            i = self.rng.randrange(len(plays) + 1)
+            return list(plays[i]) if i < len(plays) else []
+
+        return list(self.rng.choice(plays))
+
+
+class GreedyPolicy(Policy):
+    """Gets rid of its worst cards first, only spending Jesters when needed.
+
+    Calls a revolution whenever it sits in the lower half of the order.
+    """
+
+    def revolution(self, state: RoundState, player: int) -> bool:
+        return state.order.index(player) >= state.num_players // 2
+
+    def play(self, state: RoundState, player: int) -> List[int]:
+        return greedy_play(state.hands[player], state.table_rank, state.table_count)
+
+
+class PassPolicy(Policy):
+    """Passes whenever it may, leading with a single worst card."""
+
+    def play(self, state: RoundState, player: int) -> List[int]:
+        if state.table_count != 0:
+            return []
+
+        return worst_cards(state.hands[player], 1)
+
+
+def make_mcts_policy(rng: Random = None, budget: float = None) -> Policy:
+    return MCTSPolicy(rng, DEFAULT_BUDGET if budget is None else budget)
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'greedy': GreedyPolicy,
+    'pass': PassPolicy,
+    'mcts': make_mcts_policy,
+}
+
+
+def make_policy(name: str, rng: Random = None, budget: float = None) -> Policy:
+    """``budget`` is the seconds per decision of the mcts policy, its default when None."""
+    if name not in POLICIES:
+        raise ValueError(f'Unknown policy {name}, choose from {list(POLICIES)}')
+
+    if name == 'random':
+        return RandomPolicy(rng)
+
+    if name == 'mcts':
+        return make_mcts_policy(rng, budget)
+
+    return POLICIES[name]()
@@ -1,44 +1,126 @@
 import logging
 import socket
-import pickle
+import struct
+import time
 
-from enum import Enum
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from messages import MessageType
+from metrics import Metrics
+from tracer import Event, Tracer
 
 
 START_MARKER = 0b01110101
 END_MARKER = 0b0111010101
 
+WIRE_VERSION = 4
+
 BUFFER_SIZE = 1024
 SOCKET_TIMEOUT = 1.0
 
-
-class MessageType(Enum):
-    PLAY_CARDS = 1
-    PASS = 2
-    TOKEN = 3
-    SETUP = 4
-    DEAL = 5
-    REVOLUTION = 6
-    GREAT_REVOLUTION = 7
-    ROUND_READY = 8
-    GIVE_CARDS = 9
-    TOKEN_SETTLED = 10
-    ROUND_FINISHED = 11
-    HAND_EMPTY = 12
-    MOCK_MESSAGE = 42
+# Retransmission timeout of frames in flight, estimated from their circuits
+# as in RFC 6298 and doubled on every timeout. A ring gives up after
+# MAX_RETRIES retransmissions in a row without a circuit
+INITIAL_RTO = SOCKET_TIMEOUT
+MIN_RTO = 0.02
+MAX_RTO = 8.0
+MAX_RETRIES = 8
+
+# Shortest wait on the socket, a zero timeout would make it non-blocking
+MIN_RECV_TIMEOUT = 0.001
+
+# Frame layout (network byte order):
+#   start_marker u8 | version u8 | origin u8 | type u8 | table u16 |
+#   seq u16 | recv_confirm u64 | num_groups u8 | groups... | end_marker u16
+# Each group is: player id u8 | num_cards u8 | one u8 per card value
+HEADER = struct.Struct('!BBBBHHQB')
+TRAILER = struct.Struct('!H')
+
+# Where the origin, type, table id and sequence number sit in a frame, to
+# use them without decoding
+ORIGIN_OFFSET = 2
+TYPE_OFFSET = 3
+TABLE = struct.Struct('!H')
+TABLE_OFFSET = 4
+SEQ = struct.Struct('!H')
+SEQ_OFFSET = 6
+
+# Where the receipt confirmation sits, to patch it in frames passed on.
+# Machine id sets bit id - 1 of it, so it bounds the size of a ring
+RECV_CONFIRM = struct.Struct('!Q')
+RECV_CONFIRM_OFFSET = 8
+MAX_MACHINES = RECV_CONFIRM.size * 8
+
+# Every origin numbers its frames 1, 2, ..., 65535, 1, ... while 0 marks an
+# unsequenced frame, like TOKEN, which is never reordered or deduplicated
+SEQ_SPACE = (1 << 16) - 1
+
+# A TOKEN frame carries its generation as the single card of its group. It
+# grows on every handoff and when a lost token is regenerated, so a token
+# that is not newer than the last one a machine saw is stale
+GENERATIONS = 1 << 8
+
+# A lost token is claimed after this many circuits of silence, or after the
+# token timeout of the ring if that is longer, and the ring is given up on
+# after this many claims in a row were followed by silence
+TOKEN_LOSS_CIRCUITS = 8
+MAX_TOKEN_CLAIMS = 5
+
+# A restarted machine gives up on the frames of an origin that are missing
+# once a later frame of it has been held this long, longer than the origin
+# takes to resend what is still in flight: they were passed on before the
+# machine went down and will never come round again
+RESYNC_TIMEOUT = MAX_RTO
+
+Move = List[Tuple[int, List[int]]]
+
+
+def next_seq(seq: int) -> int:
+    return seq % SEQ_SPACE + 1
+
+
+def is_newer_generation(generation: int, than: int) -> bool:
+    return 0 < (generation - than) % GENERATIONS < GENERATIONS // 2
+
+
+class ResyncError(Exception):
+    """A restarted machine missed frames it cannot get back."""
+    pass
 
 
 class Message():
-    def __init__(self, origin: int, type: MessageType, move: str):
+    """One frame of the ring.
+
+    Decoded frames only unpack their header up front. The groups of
+    ``move`` are built from the frame the first time they are used, so
+    frames that are only forwarded or acknowledged never build them.
+    """
+
+    def __init__(
+        self,
+        origin: int,
+        type: MessageType,
+        move: Move = None,
+        seq: int = 0,
+        table: int = 0
+    ):
         self.start_marker = START_MARKER
         self.origin = origin
+        self.table = table
+        self.seq = seq
 
         self.type = type
 
         if isinstance(type, MessageType):
             self.type = type.value
 
-        self.move = move
+        if move is None:
+            move = []
+
+        self.__move = move
+        # Frame the groups are read from while __move is None
+        self.__frame = None
 
         self.recv_confirm = 0
 
@@ -49,6 +131,8 @@ class Message():
         return (f'--- Message: \n'
             f'\tstart_marker: {self.start_marker}\n'
             f'\torigin: {self.origin}\n'
+            f'\ttable: {self.table}\n'
+            f'\tseq: {self.seq}\n'
             f'\ttype: {MessageType(self.type)}\n'
             f'\tmove: {self.move}\n'
             f'\treceipt_confirmation: {format(self.recv_confirm, "b")}\n'
@@ -59,72 +143,305 @@ class Message():
         return (f'\t--- Message: \n'
             f'\t\tstart_marker: {self.start_marker}\n'
             f'\t\torigin: {self.origin}\n'
+            f'\t\ttable: {self.table}\n'
+            f'\t\tseq: {self.seq}\n'
             f'\t\ttype: {MessageType(self.type)}\n'
             f'\t\tmove: {self.move}\n'
             f'\t\treceipt_confirmation: {format(self.recv_confirm, "b")}\n'
             f'\t\tend_marker: {self.end_marker}\n'
         )
 
-    def get_buffer(self):
-        buffer = []
+    @property
+    def move(self) -> Move:
+        if self.__move is None:
+            self.__move = Message.decode_groups(self.__frame)
+            self.__frame = None
+
+        return self.__move
+
+    @move.setter
+    def move(self, move: Move):
+        self.__move = move
+        self.__frame = None
 
-        buffer.append(self.start_marker)
-        buffer.append(self.origin)
-        buffer.append(self.type)
-        buffer.append(self.move)
-        buffer.append(self.recv_confirm)
-        buffer.append(self.end_marker)
+    def detach(self):
+        """Copies the frame out of a receive buffer that is going to be reused."""
+        if self.__frame is not None:
+            self.__frame = bytes(self.__frame)
 
-        return buffer
+        return
+
+    def encode(self) -> bytes:
+        groups = []
+        for (id, cards) in self.move:
+            groups.append(id)
+            groups.append(len(cards))
+            groups += cards
+
+        return (
+            HEADER.pack(
+                self.start_marker,
+                WIRE_VERSION,
+                self.origin,
+                self.type,
+                self.table,
+                self.seq,
+                self.recv_confirm,
+                len(self.move)
+            )
+            + bytes(groups)
+            + TRAILER.pack(self.end_marker)
+        )
 
     @staticmethod
-    def buffer_to_message(buffer):
-        message = Message(buffer[1], buffer[2], buffer[3])
+    def decode(data) -> 'Message':
+        if len(data) < HEADER.size + TRAILER.size:
+            raise ValueError('Frame is too short')
 
-        message.start_marker = buffer[0]
-        message.recv_confirm = buffer[4]
-        message.end_marker = buffer[5]
+        (start_marker, version, origin, type, table, seq, recv_confirm,
+            num_groups) = HEADER.unpack_from(data, 0)
+
+        if start_marker != START_MARKER:
+            raise ValueError(f'Invalid start marker {start_marker}')
+
+        if version != WIRE_VERSION:
+            raise ValueError(f'Unsupported wire version {version}')
+
+        # Only the lengths of the groups are checked here
+        end = len(data) - TRAILER.size
+        offset = HEADER.size
+        for _ in range(num_groups):
+            if offset + 2 > end:
+                raise ValueError('Frame length does not match its groups')
+
+            offset += 2 + data[offset + 1]
+
+        if offset != end:
+            raise ValueError('Frame length does not match its groups')
+
+        (end_marker,) = TRAILER.unpack_from(data, offset)
+        if end_marker != END_MARKER:
+            raise ValueError(f'Invalid end marker {end_marker}')
+
+        message = Message(origin, type, None, seq, table)
+        message.recv_confirm = recv_confirm
+        message.__move = None
+        message.__frame = data
 
         return message
 
+    @staticmethod
+    def decode_groups(data) -> Move:
+        move = []
+        offset = HEADER.size
+        for _ in range(data[HEADER.size - 1]):
+            id = data[offset]
+            num_cards = data[offset + 1]
+            offset += 2
+
+            move.append((id, list(data[offset:offset + num_cards])))
+            offset += num_cards
+
+        return move
+
+    @staticmethod
+    def peek_table(data) -> int:
+        if len(data) < HEADER.size:
+            raise ValueError('Frame is too short')
+
+        return TABLE.unpack_from(data, TABLE_OFFSET)[0]
+
+    pass
+
+
+def receipt_bit(machine_id: int) -> int:
+    return 1 << (machine_id - 1)
+
+
+class Reorderer():
+    """In-order delivery and duplicate suppression of sequenced frames.
+
+    ``push`` returns the frames that can be delivered now, in the order
+    their origin sent them: an empty list when ``message`` is held until the
+    frames before it arrive, or None when it was already delivered.
+    """
+
+    def __init__(self):
+        self.expected: Dict[int, int] = {}
+        self.held: Dict[int, Dict[int, Message]] = {}
+
+        pass
+
+    def push(self, message: Message) -> Optional[List[Message]]:
+        if message.seq == 0:
+            return [message]
+
+        origin = message.origin
+        expected = self.expected.get(origin, 1)
+
+        distance = (message.seq - expected) % SEQ_SPACE
+        if distance >= SEQ_SPACE // 2:
+            return None
+
+        held = self.held.setdefault(origin, {})
+
+        if distance != 0:
+            held[message.seq] = message
+            return []
+
+        ready = [message]
+        expected = next_seq(expected)
+
+        while expected in held:
+            ready.append(held.pop(expected))
+            expected = next_seq(expected)
+
+        self.expected[origin] = expected
+        return ready
+
     pass
 
 
 class Ring():
+    """One machine of the token ring.
+
+    Up to ``window`` frames sent by this machine may be going around the
+    ring at once; ``send_message`` only blocks while the window is full,
+    and ``flush`` waits for every frame to come back. With the default
+    window of 1 every send waits for its frame, as in stop-and-wait.
+
+    Frames of other machines are passed on as soon as they arrive, before
+    the game gets them, by patching the receipt bit of this machine into
+    the received datagram, unless this machine holds the token.
+
+    Frames carry the ``table`` they belong to, see ``tables.Dispatcher``
+    for running several games over the same sockets.
+
+    Frames in flight are resent after ``rto`` seconds, which follows the
+    smoothed circuit time ``srtt`` and its variation ``rttvar``, measured on
+    frames that were not resent, unless a fixed ``rto`` is given. Every
+    timeout doubles it, and once ``MAX_RETRIES`` retransmissions in a row
+    went unanswered sending raises TimeoutError. Receivers drop the copies
+    of frames they already delivered.
+
+    Traffic, retransmissions, timeouts and the time spent holding the token
+    or blocked on the socket are counted in ``metrics``, and every frame is
+    recorded by ``tracer`` when one is set.
+
+    With a ``token_timeout`` a machine that hears nothing for that long, or
+    for ``TOKEN_LOSS_CIRCUITS`` times ``srtt`` if longer, claims the
+    token with a TOKEN_CLAIM frame. Claims go around the ring collecting the
+    last handoff any machine saw, the claim of the lowest id wins and its
+    claimant regenerates the token for the machine it was given to, one
+    generation later. A holder answers claims by marking them held. Without
+    further losses the token is back within the timeout and two circuits;
+    ``recv_message`` raises TimeoutError once ``MAX_TOKEN_CLAIMS`` claims in
+    a row were followed by silence, not even the claims of others, as when a
+    machine is gone. Silence is only normal while a bot thinks, so the
+    timeout is off by default for rings with people on them.
+    """
+
     def __init__(
         self,
         num_machines: int,
         machine_id: int,
         send_port: int,
         recv_port: int,
-        send_address
+        send_address,
+        recv_address = None,
+        window: int = 1,
+        table: int = 0,
+        token_timeout: float = None,
+        rto: float = None
     ):
         self.num_machines = num_machines
         self.machine_id = machine_id
 
-        self.send_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.recv_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.send_socket = None
+        self.recv_socket = None
 
         self.send_port = send_port
         self.recv_port = recv_port
 
         self.send_address = send_address
-        self.recv_address = socket.gethostbyname(socket.gethostname())
+        self.recv_address = recv_address
+
+        if num_machines > MAX_MACHINES:
+            raise ValueError(f'A ring has at most {MAX_MACHINES} machines, got {num_machines}')
+
+        # Set in recv_confirm by this machine in every frame it passes on
+        self.receipt_bit = receipt_bit(machine_id)
+
+        self.metrics = Metrics(
+            machine_id,
+            {type.value: type.name for type in MessageType}
+        )
 
         self.has_token = False
 
         if machine_id == 1:
             self.has_token = True
+            self.metrics.token_acquired()
+
+        if window < 1:
+            raise ValueError(f'Send window must be at least 1, got {window}')
+
+        self.window = window
+        self.table = table
+        self.seq = 0
+        # Frames by sequence number, with the time they were first sent and
+        # whether they were resent since
+        self.in_flight: Dict[int, Tuple[bytes, float, bool]] = OrderedDict()
+
+        # Circuit time of the frames of this machine, None until measured
+        self.srtt = None
+        self.rttvar = None
+        self.fixed_rto = rto
+        self.rto = rto if rto is not None else INITIAL_RTO
+        self.resend_at = None
+        self.retries = 0
+
+        self.reorderer = Reorderer()
+        self.ready = deque()
+
+        self.tracer: Optional[Tracer] = None
+
+        # Generation and receiver of the last token handoff this machine saw
+        self.generation = 0
+        self.token_holder = 1
+
+        self.token_timeout = token_timeout
+        # None until the first frame, a machine waiting to join never claims
+        self.last_heard = None
+        self.silent_since = None
+        self.claimed_at = None
+        self.claims = 0
+
+        # Since when a frame of each origin is held waiting for earlier ones,
+        # only kept once the machine was restarted
+        self.restored = False
+        self.gaps: Dict[int, float] = {}
 
         pass
 
     def setup(self):
+        if self.recv_address is None:
+            self.recv_address = socket.gethostbyname(socket.gethostname())
+
+        self.send_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.recv_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
         self.recv_socket.bind((self.recv_address, self.recv_port))
         logging.debug(f'Binded to {self.recv_address} on {self.recv_port}')
 
         self.recv_socket.settimeout(SOCKET_TIMEOUT)
+        self.recv_timeout = SOCKET_TIMEOUT
         logging.debug(f'Set recv socket timeout to {SOCKET_TIMEOUT}')
 
+        # Every frame is received into the same buffer
+        self.recv_buffer = bytearray(BUFFER_SIZE)
+        self.recv_view = memoryview(self.recv_buffer)
+
         return
 
     def cleanup(self):
@@ -137,127 +454,551 @@ class Ring():
         self.send_socket.sendto(data, (self.send_address, self.send_port))
         return
 
-    def send_message(self, type: MessageType, move = ''):
-        message = Message(self.machine_id, type, move)
-        logging.debug(f'[SEND] Sending {message}')
+    def recv_frame(self, timeout: float = SOCKET_TIMEOUT):
+        """The next frame, or None after ``timeout`` seconds.
 
-        data = pickle.dumps(message.get_buffer())
-        recv_message = None
+        The frame is a view of a buffer that the next call reuses, so what
+        must outlive it has to be copied.
+        """
+        if timeout != self.recv_timeout:
+            self.recv_socket.settimeout(timeout)
+            self.recv_timeout = timeout
 
-        while True:
-            self.send(data)
+        try:
+            size = self.recv_socket.recv_into(self.recv_buffer)
+        except socket.timeout:
+            return None
 
-            logging.debug('[SEND] Waiting message')
-            recv_message = self.recv_message()
+        return self.recv_view[:size]
 
-            if recv_message.origin == self.machine_id:
-                logging.debug(f'[SEND] Message went through the entire ring')
-                recv_message = self.set_received(recv_message)
-                break
+    def send_message(self, type: MessageType, move: Move = None):
+        self.send_frame(self.prepare_message(type, move))
+        return
+
+    def prepare_message(self, type: MessageType, move: Move = None) -> bytes:
+        """Numbers and encodes the next frame of this machine for ``send_frame``."""
+        self.seq = next_seq(self.seq)
+
+        return Message(self.machine_id, type, move, self.seq, self.table).encode()
+
+    def send_frame(self, data: bytes):
+        """Sends a frame of ``prepare_message``, blocking while the window is full.
+
+        A restarted machine sends the frames it saved before it went down
+        this way again, with the sequence numbers they were given then.
+        """
+        (seq,) = SEQ.unpack_from(data, SEQ_OFFSET)
+        type = data[TYPE_OFFSET]
+
+        if self.tracer is not None:
+            self.tracer.record(Event.SEND, type, self.machine_id, seq, 0, self.table)
+
+        now = time.perf_counter()
+        if not self.in_flight:
+            self.resend_at = now + self.rto
+
+        self.in_flight[seq] = (data, now, False)
+        self.send(data)
+
+        self.metrics.sent[type] += 1
+        self.metrics.bytes_sent[type] += len(data)
+
+        while len(self.in_flight) >= self.window:
+            self.__poll()
+
+        return
+
+    def flush(self):
+        while self.in_flight:
+            self.__poll()
+
+        return
+
+    def received_frames(self) -> List[bytes]:
+        """The frames received for the game that it did not take yet."""
+        return [message.encode() for message in self.ready]
+
+    def restore(
+        self,
+        seq: int,
+        expected: Dict[int, int],
+        generation: int,
+        token_holder: int,
+        has_token: bool = False,
+        received: List[bytes] = ()
+    ):
+        """Takes up the sequence numbers and token handoff of a restarted machine.
+
+        A restarted machine holds the token only if it held it when it was
+        saved, as it is only given away once a later save says so. A token
+        it got after was lost with it and is claimed back for it. The
+        ``received`` frames the game had not taken are delivered again.
+
+        Frames it passed on but did not deliver before it went down are
+        gone, so ``recv_message`` raises ResyncError once a gap in the
+        frames of an origin lasts ``RESYNC_TIMEOUT``, instead of waiting
+        for them forever.
+        """
+        self.seq = seq
+        self.reorderer.expected = dict(expected)
+        self.generation = generation
+        self.token_holder = token_holder
+        self.ready.extend(Message.decode(data) for data in received)
+
+        if has_token and not self.has_token:
+            self.has_token = True
+            self.metrics.token_acquired()
+        elif not has_token and self.has_token:
+            self.has_token = False
+            self.metrics.token_released()
+
+        # As if the ring was just heard, so that silence is noticed
+        self.last_heard = time.perf_counter()
+        self.restored = True
+
+        return
+
+    def forward_frame(self, message: Message, data):
+        """Passes on the received ``data`` of ``message`` with our receipt bit.
 
-            logging.warning(f'[SEND] Did not received the sent message')
+        The bit is patched in ``data`` itself, which is only copied when it
+        is read-only, so nothing is encoded again.
+        """
+        if isinstance(data, bytes):
+            data = bytearray(data)
+
+        message.recv_confirm |= self.receipt_bit
+        RECV_CONFIRM.pack_into(data, RECV_CONFIRM_OFFSET, message.recv_confirm)
+
+        if self.tracer is not None:
+            self.__trace(Event.FORWARD, message)
+
+        self.send(data)
+
+        self.metrics.forwarded[message.type] += 1
+        self.metrics.bytes_sent[message.type] += len(data)
 
         return
 
     def send_message_to_next(self, message: Message):
-        logging.debug(f'[SEND-N] Sending to next machine {message}')
+        data = message.encode()
+
+        if self.tracer is not None:
+            self.__trace(Event.FORWARD, message)
 
-        data = pickle.dumps(message.get_buffer())
         self.send(data)
 
+        self.metrics.forwarded[message.type] += 1
+        self.metrics.bytes_sent[message.type] += len(data)
+
         return
 
     def recv_message(self) -> Message:
-        start_marker = None
-
-        addr = None
-        data = None
-        
-        while (start_marker != START_MARKER):
-            try:
-                data, addr = self.recv_socket.recvfrom(BUFFER_SIZE)
-            except socket.timeout:
-                continue
+        while not self.ready:
+            self.__poll()
 
-            buffer = pickle.loads(data)
-            start_marker = buffer[0]
-
-        message = Message.buffer_to_message(buffer)
-        logging.debug(f'[RECV] Received message: {message}')
+        message = self.ready.popleft()
 
         if message.type == MessageType.TOKEN.value:
-            id = int(message.move)
-
-            logging.debug(f'[RECV] Message is TOKEN for machine {id}')
+            id = message.move[0][0]
 
             if id == self.machine_id:
-                logging.debug('[RECV] Received TOKEN')
                 self.has_token = True
+                self.metrics.token_acquired()
+
+                if self.tracer is not None:
+                    self.__trace(Event.TOKEN_IN, message)
             else:
-                logging.debug('[RECV] Giving TOKEN')
-                self.give_token(int(message.move))
+                # Passed on as the same handoff, with the same generation
+                self.__send_token(id, self.generation)
 
         return message
     
-    def wait_token_settle(self):
-        logging.debug('[WTS] Waiting token settle')
+    def __poll(self):
+        """Receives one frame, resending what is in flight on a timeout."""
+        metrics = self.metrics
+        tracer = self.tracer
+
+        start = time.perf_counter()
+        data = self.recv_frame(self.__recv_timeout(start))
+        received = time.perf_counter()
+        metrics.blocked_seconds += received - start
+
+        if self.gaps:
+            self.__check_gaps(received)
+
+        if data is None:
+            metrics.timeouts += 1
+
+            if tracer is not None:
+                tracer.record(Event.TIMEOUT, 0, self.machine_id, 0, 0, self.table)
+
+            if self.in_flight and received >= self.resend_at:
+                self.__resend(received)
+
+            if self.token_timeout is not None:
+                self.__check_token()
+
+            return
+
+        try:
+            message = Message.decode(data)
+        except (ValueError, struct.error) as e:
+            logging.warning(f'[RECV] Discarding invalid frame: {e}')
+            metrics.invalid_frames += 1
+
+            if tracer is not None:
+                tracer.record(Event.INVALID, 0, 0, 0, 0, self.table)
+
+            return
+
+        metrics.received[message.type] += 1
+        metrics.bytes_received[message.type] += len(data)
+
+        if tracer is not None:
+            self.__trace(Event.RECV, message)
+
+        self.last_heard = received
+
+        # Claims are answered by anything heard, claims of others too, as
+        # a ring that loses one regenerated token after another is not broken
+        self.claims = 0
+
+        if message.type == MessageType.TOKEN_CLAIM.value:
+            self.__claim_received(message)
+            return
+
+        if message.type == MessageType.TOKEN.value and not self.__accept_token(message):
+            return
+
+        if message.origin == self.machine_id and message.seq != 0:
+            sent = self.in_flight.pop(message.seq, None)
+
+            if sent is None:
+                metrics.duplicates[message.type] += 1
+
+                if tracer is not None:
+                    self.__trace(Event.DUPLICATE, message)
+            else:
+                (_, sent_at, resent) = sent
+                elapsed = received - sent_at
+
+                metrics.circuits[message.type] += 1
+                metrics.circuit_seconds[message.type] += elapsed
+
+                # A resent frame does not tell which copy came back
+                if not resent:
+                    self.__sample_circuit(elapsed)
+                elif self.fixed_rto is not None:
+                    self.rto = self.fixed_rto
+
+                self.retries = 0
+                self.resend_at = received + self.rto
+
+                if tracer is not None:
+                    self.__trace(Event.CIRCUIT, message)
+
+            return
+
+        # Duplicates too, the origin may still be waiting for them
+        if message.type != MessageType.TOKEN.value and not self.has_token:
+            self.forward_frame(message, data)
+
+        # Delivered or held, either way it outlives the receive buffer
+        message.detach()
+        ready = self.reorderer.push(message)
+
+        if ready is None:
+            metrics.duplicates[message.type] += 1
+
+            if tracer is not None:
+                self.__trace(Event.DUPLICATE, message)
+
+            return
+
+        if self.restored:
+            self.__track_gap(message.origin, received)
+
+        self.ready.extend(ready)
+        return
+
+    def __track_gap(self, origin: int, now: float):
+        if self.reorderer.held.get(origin):
+            self.gaps.setdefault(origin, now)
+        else:
+            self.gaps.pop(origin, None)
+
+        return
+
+    def __check_gaps(self, now: float):
+        for (origin, since) in self.gaps.items():
+            if now - since < RESYNC_TIMEOUT:
+                continue
+
+            expected = self.reorderer.expected.get(origin, 1)
+            raise ResyncError(
+                f'Frames of machine {origin} from {expected} on were lost while '
+                f'machine {self.machine_id} was down, it cannot go on with the round'
+            )
+
+        return
+
+    def __recv_timeout(self, now: float) -> float:
+        if self.in_flight:
+            timeout = self.resend_at - now
+        elif self.token_timeout is not None and self.last_heard is not None and not self.has_token:
+            timeout = min(self.last_heard + self.__loss_timeout() - now, SOCKET_TIMEOUT)
+        else:
+            return SOCKET_TIMEOUT
+
+        return max(timeout, MIN_RECV_TIMEOUT)
+
+    def __resend(self, now: float):
+        """Resends every frame in flight, go-back-N, and backs off."""
+        if self.retries >= MAX_RETRIES:
+            raise TimeoutError(
+                f'{self.retries} retransmissions went unanswered, the ring is broken'
+            )
+
+        logging.warning('[SEND] Did not received the sent message')
+
+        metrics = self.metrics
+        tracer = self.tracer
+
+        for (seq, (data, sent_at, _)) in list(self.in_flight.items()):
+            self.in_flight[seq] = (data, sent_at, True)
+
+            if tracer is not None:
+                tracer.record(Event.RESEND, data[TYPE_OFFSET], self.machine_id, seq, 0, self.table)
+
+            self.send(data)
+
+            metrics.retransmitted[data[TYPE_OFFSET]] += 1
+            metrics.bytes_sent[data[TYPE_OFFSET]] += len(data)
+
+        self.retries += 1
+        self.rto = min(self.rto * 2, MAX_RTO)
+        self.resend_at = now + self.rto
+
+        return
+
+    def __sample_circuit(self, elapsed: float):
+        if self.srtt is None:
+            self.srtt = elapsed
+            self.rttvar = elapsed / 2
+        else:
+            self.rttvar += (abs(self.srtt - elapsed) - self.rttvar) / 4
+            self.srtt += (elapsed - self.srtt) / 8
+
+        if self.fixed_rto is None:
+            self.rto = min(max(self.srtt + 4 * self.rttvar, MIN_RTO), MAX_RTO)
+        else:
+            self.rto = self.fixed_rto
+
+        return
+
+    def __accept_token(self, message: Message) -> bool:
+        (holder, cards) = message.move[0]
+
+        # Tokens of rings that do not number them are taken as they come
+        if not cards:
+            return True
+
+        if not is_newer_generation(cards[0], self.generation):
+            logging.warning(f'[TOKEN] Discarding stale token of generation {cards[0]}')
+            self.metrics.stale_tokens += 1
+
+            if self.tracer is not None:
+                self.__trace(Event.STALE_TOKEN, message)
+
+            return False
+
+        self.generation = cards[0]
+        self.token_holder = holder
+        self.claimed_at = None
+
+        return True
+
+    def __loss_timeout(self) -> float:
+        if self.srtt is None:
+            return self.token_timeout
+
+        return max(self.token_timeout, TOKEN_LOSS_CIRCUITS * self.srtt)
+
+    def __check_token(self):
+        """Claims the token after a silence, the ring is quiet on a timeout."""
+        if self.has_token or self.in_flight or self.last_heard is None:
+            return
 
+        now = time.perf_counter()
+        if now - self.last_heard < self.__loss_timeout():
+            return
+
+        if self.claims >= MAX_TOKEN_CLAIMS:
+            raise TimeoutError(
+                f'{self.claims} token claims went unanswered, the ring is broken'
+            )
+
+        if self.claimed_at is None:
+            self.silent_since = self.last_heard
+
+        logging.warning(
+            f'[TOKEN] Nothing heard for {now - self.silent_since:.1f}s, claiming the token'
+        )
+
+        self.claims += 1
+        self.claimed_at = now
+        self.last_heard = now
+
+        message = Message(
+            self.machine_id,
+            MessageType.TOKEN_CLAIM,
+            [(self.token_holder, [self.generation, 0])],
+            table=self.table
+        )
+        data = message.encode()
+
+        if self.tracer is not None:
+            self.__trace(Event.CLAIM, message)
+
+        self.send(data)
+
+        self.metrics.token_claims += 1
+        self.metrics.sent[message.type] += 1
+        self.metrics.bytes_sent[message.type] += len(data)
+
+        return
+
+    def __claim_received(self, message: Message):
+        (holder, (generation, held)) = message.move[0]
+
+        if message.origin == self.machine_id:
+            # Claims that came back after a token showed up are moot
+            if self.claimed_at is None:
+                return
+
+            self.claimed_at = None
+
+            if not held:
+                self.__regenerate(holder, generation)
+
+            return
+
+        if self.has_token:
+            message.move = [(self.machine_id, [self.generation, 1])]
+        elif held:
+            self.claimed_at = None
+        elif self.claimed_at is not None and message.origin > self.machine_id:
+            # Our own claim is going around and wins over this one
+            return
+        else:
+            self.claimed_at = None
+
+            # Only carried by the claim, a token of this generation may still
+            # be on its way here
+            if is_newer_generation(self.generation, generation):
+                message.move = [(self.token_holder, [self.generation, 0])]
+
+        self.send_message_to_next(message)
+
+        return
+
+    def __regenerate(self, holder: int, generation: int):
+        generation = (generation + 1) % GENERATIONS
+
+        logging.warning(f'[TOKEN] Regenerating the token of {holder}, generation {generation}')
+
+        self.metrics.tokens_regenerated += 1
+        self.metrics.token_recovery_seconds += time.perf_counter() - self.silent_since
+
+        if self.tracer is not None:
+            self.tracer.record(Event.REGENERATE, MessageType.TOKEN.value, holder, 0, 0, self.table)
+
+        if holder != self.machine_id:
+            self.__send_token(holder, generation)
+            return
+
+        self.generation = generation
+        self.token_holder = holder
+        self.ready.append(
+            Message(self.machine_id, MessageType.TOKEN, [(holder, [generation])], table=self.table)
+        )
+
+        return
+
+    def __trace(self, event: Event, message: Message):
+        self.tracer.record(
+            event,
+            message.type,
+            message.origin,
+            message.seq,
+            message.recv_confirm,
+            message.table
+        )
+
+        return
+
+    def wait_token_settle(self):
         while True:
             message = self.recv_and_send_message()
 
             if self.has_token:
-                logging.debug('[WTS] Received token, senting TOKEN_SETTLED')
                 self.send_message(MessageType.TOKEN_SETTLED)
                 break
             elif message.type == MessageType.TOKEN_SETTLED.value:
-                logging.debug('[WTS] Received TOKEN_SETTLED')
                 break
 
         return
 
 
     def recv_and_send_message(self) -> Message:
-        logging.debug('[RECV&SEND] Receiving and sending message')
-
-        message = self.recv_message()
-        message = self.set_received(message)
-
-        if message.type == MessageType.TOKEN.value:
-            logging.debug('[RECV&SEND] Message is TOKEN, returning')
-            return message
-
-        if not self.has_token:
-            logging.debug('[RECV&SEND] Sending message to next')
-            self.send_message_to_next(message)
-
-        return message
+        # What had to be passed on already was when it arrived
+        return self.set_received(self.recv_message())
 
     def give_token(self, machine_id = -1):
         if machine_id == -1:
             machine_id = self.machine_id % self.num_machines + 1
 
-        logging.debug(f'[GT] Giving TOKEN to {machine_id}')
+        # Whatever this machine sent must go around before the token does
+        self.flush()
 
         if machine_id == self.machine_id:
             self.send_message(MessageType.TOKEN_SETTLED)
+            self.flush()
 
-            logging.debug(f'[GT] Giving TOKEN to yourself, TOKEN_SETTLED sent')
             return
 
-        message = Message(self.machine_id, MessageType.TOKEN, str(machine_id))
-        data = pickle.dumps(message.get_buffer())
+        self.__send_token(machine_id, (self.generation + 1) % GENERATIONS)
+        self.has_token = False
+
+        self.metrics.token_released()
+
+        return
+
+    def __send_token(self, machine_id: int, generation: int):
+        message = Message(
+            self.machine_id,
+            MessageType.TOKEN,
+            [(machine_id, [generation])],
+            table=self.table
+        )
+        data = message.encode()
+
+        self.generation = generation
+        self.token_holder = machine_id
+
+        if self.tracer is not None:
+            self.tracer.record(Event.TOKEN_OUT, message.type, machine_id, 0, 0, self.table)
 
         self.send(data)
-        self.has_token = False
 
-        logging.debug(f'[GT] TOKEN sent')
+        self.metrics.sent[message.type] += 1
+        self.metrics.bytes_sent[message.type] += len(data)
 
         return
 
     def set_received(self, message: Message):
-        message.recv_confirm |= 2 ** (self.num_machines - self.machine_id)
-        logging.debug('[SET-R] Set message received bit')
-
+        message.recv_confirm |= self.receipt_bit
         return message
 
     pass
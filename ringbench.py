@@ -0,0 +1,1247 @@
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from random import Random
+from typing import Dict, List
+
+from aioring import AsyncRing, ThreadedRing
+from game import Deal, Game
+from hybridring import DEFAULT_GROUP, HybridRing
+from interface import Interface
+from launch import LOOPBACK, free_ports
+from localring import (CRASH_POINTS, LocalRing, LossyLocalRing, make_local_ring, play_local_game,
+    play_with_restart)
+from moves import num_decks
+from policy import make_policy
+from ring import BUFFER_SIZE, Message, MessageType, Ring, SOCKET_TIMEOUT
+from tables import Dispatcher, play_tables
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks of the ring transports on a loopback ring.'
+    )
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    transport = subparsers.add_parser(
+        'transport',
+        help='compare circuit latency of Ring, AsyncRing and ThreadedRing'
+    )
+    transport.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=4,
+        help='number of machines in the ring'
+    )
+    transport.add_argument(
+        '-n',
+        '--messages',
+        type=int,
+        default=2000,
+        help='number of messages sent around the ring'
+    )
+    transport.set_defaults(func=bench_transport)
+
+    window = subparsers.add_parser(
+        'window',
+        help='messages/s of pipelined sends versus the send window'
+    )
+    window.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=4,
+        help='number of machines in the ring'
+    )
+    window.add_argument(
+        '-n',
+        '--messages',
+        type=int,
+        default=5000,
+        help='number of messages sent around the ring'
+    )
+    window.add_argument(
+        '-w',
+        '--windows',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8, 16, 32],
+        help='send window sizes to compare'
+    )
+    window.set_defaults(func=bench_window)
+
+    tables = subparsers.add_parser(
+        'tables',
+        help='games/s of bot tables multiplexed over one ring'
+    )
+    tables.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=8,
+        help='number of machines in the ring'
+    )
+    tables.add_argument(
+        '-t',
+        '--tables',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8, 16, 32],
+        help='numbers of simultaneous tables to compare'
+    )
+    tables.add_argument(
+        '-p',
+        '--policy',
+        default='greedy',
+        help='policy of every bot'
+    )
+    tables.add_argument(
+        '-w',
+        '--window',
+        type=int,
+        default=1,
+        help='send window of every table'
+    )
+    tables.add_argument(
+        '--processes',
+        action='store_true',
+        help='run every machine in its own process instead of a thread'
+    )
+    tables.set_defaults(func=bench_tables)
+
+    suite = subparsers.add_parser(
+        'suite',
+        help='latency histograms of every Ring operation, optionally as JSON'
+    )
+    suite.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=4,
+        help='number of machines in the ring'
+    )
+    suite.add_argument(
+        '-n',
+        '--samples',
+        type=int,
+        default=2000,
+        help='number of samples of every measurement'
+    )
+    suite.add_argument(
+        '-w',
+        '--window',
+        type=int,
+        default=8,
+        help='send window of the frames/s measurement'
+    )
+    suite.add_argument(
+        '-j',
+        '--json',
+        default=None,
+        help='also write the results to this file as JSON'
+    )
+    suite.set_defaults(func=bench_suite)
+
+    receive = subparsers.add_parser(
+        'recv',
+        help='frames/s and memory blocks per frame of the receive paths'
+    )
+    receive.add_argument(
+        '-n',
+        '--frames',
+        type=int,
+        default=50000,
+        help='number of frames received by every path'
+    )
+    receive.set_defaults(func=bench_recv)
+
+    loss = subparsers.add_parser(
+        'loss',
+        help='circuit latency of an in-process ring that loses frames'
+    )
+    loss.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=4,
+        help='number of machines in the ring'
+    )
+    loss.add_argument(
+        '-n',
+        '--messages',
+        type=int,
+        default=300,
+        help='number of messages sent around the ring'
+    )
+    loss.add_argument(
+        '-l',
+        '--losses',
+        type=float,
+        nargs='+',
+        default=[0.0, 0.01, 0.02],
+        help='probabilities of losing a frame to compare'
+    )
+    loss.add_argument(
+        '-r',
+        '--rto',
+        type=float,
+        default=SOCKET_TIMEOUT,
+        help='fixed retransmission timeout compared with the adaptive one'
+    )
+    loss.set_defaults(func=bench_loss)
+
+    recovery = subparsers.add_parser(
+        'recovery',
+        help='bot games on an in-process ring that loses tokens'
+    )
+    recovery.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=6,
+        help='number of machines in the ring'
+    )
+    recovery.add_argument(
+        '-g',
+        '--games',
+        type=int,
+        default=5,
+        help='number of games played'
+    )
+    recovery.add_argument(
+        '-l',
+        '--loss',
+        type=float,
+        default=0.1,
+        help='probability of losing a frame'
+    )
+    recovery.add_argument(
+        '-a',
+        '--all',
+        action='store_true',
+        help='lose frames of every type, not only tokens'
+    )
+    recovery.add_argument(
+        '-t',
+        '--token-timeout',
+        type=float,
+        default=0.2,
+        help='token timeout of every machine'
+    )
+    recovery.add_argument(
+        '-p',
+        '--policy',
+        default='greedy',
+        help='policy of every bot'
+    )
+    recovery.set_defaults(func=bench_recovery)
+
+    restart = subparsers.add_parser(
+        'restart',
+        help='bot games on an in-process ring where a machine crashes and restarts from its checkpoint'
+    )
+    restart.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        default=6,
+        help='number of machines in the ring'
+    )
+    restart.add_argument(
+        '-g',
+        '--games',
+        type=int,
+        default=6,
+        help='number of games played, the machine that crashes goes around the ring'
+    )
+    restart.add_argument(
+        '-a',
+        '--after',
+        type=int,
+        default=20,
+        help='checkpoints the machine saves before it crashes'
+    )
+    restart.add_argument(
+        '-d',
+        '--downtime',
+        type=float,
+        default=0.2,
+        help='seconds the machine stays down'
+    )
+    restart.add_argument(
+        '-t',
+        '--token-timeout',
+        type=float,
+        default=0.5,
+        help='token timeout of every machine'
+    )
+    restart.add_argument(
+        '-p',
+        '--policy',
+        default='greedy',
+        help='policy of every bot'
+    )
+    restart.add_argument(
+        '-c',
+        '--crash-at',
+        choices=CRASH_POINTS,
+        default='wait',
+        help='crash waiting for the ring, right after a play or holding the token before giving it'
+    )
+    restart.set_defaults(func=bench_restart)
+
+    scale = subparsers.add_parser(
+        'scale',
+        help='circuit latency, frame sizes and game time versus the size of the ring'
+    )
+    scale.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        nargs='+',
+        default=[4, 8, 16, 32, 64],
+        help='ring sizes to compare'
+    )
+    scale.add_argument(
+        '-n',
+        '--messages',
+        type=int,
+        default=500,
+        help='number of messages sent around every ring'
+    )
+    scale.add_argument(
+        '-g',
+        '--games',
+        type=int,
+        default=1,
+        help='greedy games played on a local ring of every size, 0 to skip them'
+    )
+    scale.set_defaults(func=bench_scale)
+
+    hybrid = subparsers.add_parser(
+        'hybrid',
+        help='circuit latency of the ring versus frames sent straight to every machine'
+    )
+    hybrid.add_argument(
+        '-m',
+        '--machines',
+        type=int,
+        nargs='+',
+        default=[4, 8, 16, 32],
+        help='ring sizes to compare'
+    )
+    hybrid.add_argument(
+        '-n',
+        '--messages',
+        type=int,
+        default=500,
+        help='number of messages sent by the first machine of every ring'
+    )
+    hybrid.add_argument(
+        '-d',
+        '--delay',
+        type=float,
+        default=0.0,
+        help='microseconds every datagram takes, as over a network, 0 for loopback'
+    )
+    hybrid.set_defaults(func=bench_hybrid)
+
+    compare = subparsers.add_parser(
+        'compare',
+        help='compare two JSON reports of the suite'
+    )
+    compare.add_argument('base', help='report of the reference run')
+    compare.add_argument('head', help='report of the run to check')
+    compare.add_argument(
+        '-t',
+        '--threshold',
+        type=float,
+        default=1.10,
+        help='slowdown ratio reported as a regression'
+    )
+    compare.set_defaults(func=bench_compare)
+
+    return parser.parse_args()
+
+
+def make_loopback_ring(num_machines: int, cls = Ring, **kwargs) -> list:
+    """Builds ``num_machines`` transports wired into a ring on 127.0.0.1."""
+    ports = free_ports(num_machines)
+
+    return [
+        cls(
+            num_machines,
+            i + 1,
+            ports[(i + 1) % num_machines],
+            ports[i],
+            LOOPBACK,
+            LOOPBACK,
+            **kwargs
+        )
+        for i in range(num_machines)
+    ]
+
+
+def make_hybrid_ring(num_machines: int, group: str = None, **kwargs) -> list:
+    """``make_loopback_ring`` of ``HybridRing``, multicast to ``group`` when given."""
+    ports = free_ports(num_machines + 1)
+    peers = {i + 1: (LOOPBACK, ports[i]) for i in range(num_machines)}
+
+    return [
+        HybridRing(
+            num_machines,
+            i + 1,
+            ports[(i + 1) % num_machines],
+            ports[i],
+            LOOPBACK,
+            LOOPBACK,
+            peers=peers,
+            group=None if group is None else (group, ports[num_machines]),
+            **kwargs
+        )
+        for i in range(num_machines)
+    ]
+
+
+def percentiles(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+
+    def at(p):
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': at(0.50),
+        'p95': at(0.95),
+        'p99': at(0.99),
+        'max': ordered[-1],
+    }
+
+
+def histogram(samples: List[float]) -> Dict[str, int]:
+    """Counts of ``samples`` in power of two buckets of microseconds."""
+    buckets = {}
+
+    for sample in samples:
+        bound = 1
+        while bound < sample * 1e6:
+            bound *= 2
+
+        buckets[bound] = buckets.get(bound, 0) + 1
+
+    return {f'le_{bound}us': buckets[bound] for bound in sorted(buckets)}
+
+
+def print_latency(name: str, samples: List[float]):
+    stats = percentiles(samples)
+    print(f'{name:<14}'
+        f'{stats["mean"] * 1e6:>10.1f}'
+        f'{stats["p50"] * 1e6:>10.1f}'
+        f'{stats["p95"] * 1e6:>10.1f}'
+        f'{stats["p99"] * 1e6:>10.1f}'
+        f'{len(samples) / sum(samples):>12,.0f}'
+    )
+
+    return
+
+
+class Forwarders():
+    """Threads that keep every machine but the first forwarding frames.
+
+    They stop after forwarding a ROUND_FINISHED frame.
+    """
+
+    def __init__(self, rings: list):
+        self.rings = rings
+        self.threads = [
+            threading.Thread(target=self.__forward, args=(ring,), daemon=True)
+            for ring in rings
+        ]
+
+        for thread in self.threads:
+            thread.start()
+
+    def __forward(self, ring):
+        while True:
+            message = ring.recv_and_send_message()
+
+            if message.type == MessageType.ROUND_FINISHED.value:
+                break
+
+        return
+
+    def stop(self, sender):
+        sender.send_message(MessageType.ROUND_FINISHED)
+
+        for thread in self.threads:
+            thread.join()
+
+        return
+
+
+class DelayedLink():
+    """Sends what it is given ``delay`` seconds later, from a thread of its own.
+
+    Send sockets wrapped by ``wrap`` go through it, so every datagram takes
+    as long as over a network with that latency, without holding up its
+    sender.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.queue = []
+        self.count = 0
+        self.condition = threading.Condition()
+        self.stopped = False
+
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+        pass
+
+    def wrap(self, sock) -> 'DelayedSocket':
+        return DelayedSocket(self, sock)
+
+    def sendto(self, sock, data, address):
+        with self.condition:
+            # Sent in order when they are due together
+            self.count += 1
+            heapq.heappush(
+                self.queue,
+                (time.perf_counter() + self.delay, self.count, sock, bytes(data), address)
+            )
+            self.condition.notify()
+
+        return
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+        self.thread.join()
+        return
+
+    def __run(self):
+        while True:
+            with self.condition:
+                while not self.stopped and not self.queue:
+                    self.condition.wait()
+
+                if self.stopped:
+                    return
+
+                wait = self.queue[0][0] - time.perf_counter()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+
+                (_, _, sock, data, address) = heapq.heappop(self.queue)
+
+            try:
+                sock.sendto(data, address)
+            except OSError:
+                # Closed by a ring that is done
+                pass
+
+
+class DelayedSocket():
+    def __init__(self, link: DelayedLink, sock):
+        self.link = link
+        self.sock = sock
+
+        pass
+
+    def sendto(self, data, address):
+        self.link.sendto(self.sock, data, address)
+        return
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+def circuit_blocking(rings: list, messages: int, link: DelayedLink = None) -> List[float]:
+    for ring in rings:
+        ring.setup()
+
+        if link is not None:
+            ring.send_socket = link.wrap(ring.send_socket)
+
+    forwarders = Forwarders(rings[1:])
+    sender = rings[0]
+
+    samples = []
+    for _ in range(messages):
+        start = time.perf_counter()
+        sender.send_message(MessageType.MOCK_MESSAGE)
+        samples.append(time.perf_counter() - start)
+
+    forwarders.stop(sender)
+
+    for ring in rings:
+        ring.cleanup()
+
+    return samples
+
+
+def circuit_async(num_machines: int, messages: int) -> List[float]:
+    async def run():
+        rings = make_loopback_ring(num_machines, AsyncRing)
+        for ring in rings:
+            await ring.setup()
+
+        sender = rings[0]
+
+        samples = []
+        for _ in range(messages):
+            start = time.perf_counter()
+            await sender.send_message(MessageType.MOCK_MESSAGE)
+            samples.append(time.perf_counter() - start)
+
+        for ring in rings:
+            ring.cleanup()
+
+        return samples
+
+    return asyncio.run(run())
+
+
+def bench_transport(args):
+    print(f'{"transport":<14}{"mean us":>10}{"p50 us":>10}{"p95 us":>10}{"p99 us":>10}{"circuits/s":>12}')
+
+    rings = make_loopback_ring(args.machines)
+    print_latency('Ring', circuit_blocking(rings, args.messages))
+
+    print_latency('AsyncRing', circuit_async(args.machines, args.messages))
+
+    rings = make_loopback_ring(args.machines, ThreadedRing)
+    print_latency('ThreadedRing', circuit_blocking(rings, args.messages))
+
+    return
+
+
+def pipelined_rate(num_machines: int, messages: int, window: int) -> float:
+    rings = make_loopback_ring(num_machines, window=window)
+    for ring in rings:
+        ring.setup()
+
+    forwarders = Forwarders(rings[1:])
+    sender = rings[0]
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        sender.send_message(MessageType.MOCK_MESSAGE)
+
+    sender.flush()
+    elapsed = time.perf_counter() - start
+
+    forwarders.stop(sender)
+    sender.flush()
+
+    for ring in rings:
+        ring.cleanup()
+
+    return messages / elapsed
+
+
+def bench_window(args):
+    print(f'{"window":>8}{"messages/s":>14}{"speedup":>10}')
+
+    base = None
+    for window in args.windows:
+        rate = pipelined_rate(args.machines, args.messages, window)
+
+        if base is None:
+            base = rate
+
+        print(f'{window:>8}{rate:>14,.0f}{rate / base:>9.1f}x')
+
+    return
+
+
+def run_tables(
+    rings: list,
+    num_tables: int,
+    policy: str,
+    start: multiprocessing.Barrier = None
+) -> float:
+    """Plays ``num_tables`` tables on ``rings`` and returns the seconds taken."""
+    dispatchers = [Dispatcher(ring) for ring in rings]
+
+    for (ring, dispatcher) in zip(rings, dispatchers):
+        ring.setup()
+        dispatcher.start()
+
+    policies = {
+        id: make_policy(policy, Random(id))
+        for id in range(1, rings[0].num_machines + 1)
+    }
+
+    if start is not None:
+        start.wait()
+
+    begin = time.perf_counter()
+    play_tables(dispatchers, list(range(1, num_tables + 1)), policies, seed=num_tables)
+    elapsed = time.perf_counter() - begin
+
+    for dispatcher in dispatchers:
+        dispatcher.stop()
+
+    for (ring, dispatcher) in zip(rings, dispatchers):
+        dispatcher.join()
+        ring.cleanup()
+
+    return elapsed
+
+
+def run_machine_tables(ring, num_tables, policy, start, results):
+    results.put(run_tables([ring], num_tables, policy, start))
+    return
+
+
+def run_tables_in_processes(rings: list, num_tables: int, policy: str) -> float:
+    start = multiprocessing.Barrier(len(rings))
+    results = multiprocessing.Queue()
+
+    processes = [
+        multiprocessing.Process(
+            target=run_machine_tables,
+            args=(ring, num_tables, policy, start, results)
+        )
+        for ring in rings
+    ]
+
+    for process in processes:
+        process.start()
+
+    elapsed = max(results.get() for _ in processes)
+
+    for process in processes:
+        process.join()
+
+    return elapsed
+
+
+def bench_tables(args):
+    print(f'{"tables":>8}{"seconds":>10}{"games/s":>10}{"speedup":>10}')
+
+    base = None
+    for num_tables in args.tables:
+        rings = make_loopback_ring(args.machines, window=args.window)
+
+        if args.processes:
+            elapsed = run_tables_in_processes(rings, num_tables, args.policy)
+        else:
+            elapsed = run_tables(rings, num_tables, args.policy)
+
+        rate = num_tables / elapsed
+        if base is None:
+            base = rate
+
+        print(f'{num_tables:>8}{elapsed:>10.2f}{rate:>10.1f}{rate / base:>9.1f}x')
+
+    return
+
+
+RECEIVE_PATHS = ['recvfrom', 'recv_into', 'recv_into+move']
+
+
+def receive_frames(path: str, frame: bytes, frames: int, batch: int = 64) -> tuple:
+    """Receives ``frames`` copies of ``frame`` over loopback through ``path``.
+
+    ``recvfrom`` is the previous path, a new bytes object per frame decoded
+    at once. ``recv_into`` reuses one buffer and only decodes the header,
+    as for frames that are forwarded, and ``recv_into+move`` also copies
+    the frame out and builds its groups, as for frames that are delivered.
+    Every message is kept until the end, so the blocks they hold can be
+    counted. Returns the frames/s and the blocks kept per frame.
+    """
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind((LOOPBACK, 0))
+    receiver.settimeout(SOCKET_TIMEOUT)
+    address = receiver.getsockname()
+
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+
+    kept = []
+    elapsed = 0.0
+    blocks = sys.getallocatedblocks()
+
+    for _ in range(frames // batch):
+        # Sent in batches that fit in the socket buffer, only receiving is timed
+        for _ in range(batch):
+            sender.sendto(frame, address)
+
+        start = time.perf_counter()
+
+        for _ in range(batch):
+            if path == 'recvfrom':
+                (data, _) = receiver.recvfrom(BUFFER_SIZE)
+                message = Message.decode(data)
+                message.move
+            else:
+                size = receiver.recv_into(buffer)
+                message = Message.decode(view[:size])
+
+                if path == 'recv_into+move':
+                    message.detach()
+                    message.move
+
+            kept.append(message)
+
+        elapsed += time.perf_counter() - start
+
+    blocks = (sys.getallocatedblocks() - blocks) / len(kept)
+
+    sender.close()
+    receiver.close()
+
+    return (len(kept) / elapsed, blocks)
+
+
+def bench_recv(args):
+    print(f'{"frame":<12}{"path":<16}{"frames/s":>12}{"speedup":>9}{"blocks":>8}')
+
+    frames = {
+        'PASS': Message(3, MessageType.PASS, seq=1),
+        'PLAY_CARDS': Message(2, MessageType.PLAY_CARDS, [(2, [7, 7, 13])], seq=1),
+        'DEAL': Message(1, MessageType.DEAL, [(id, list(range(1, 14))) for id in range(1, 9)], seq=1),
+    }
+
+    for (name, message) in frames.items():
+        base = None
+
+        for path in RECEIVE_PATHS:
+            (rate, blocks) = receive_frames(path, message.encode(), args.frames)
+
+            if base is None:
+                base = rate
+
+            print(f'{name:<12}{path:<16}{rate:>12,.0f}{rate / base:>8.2f}x{blocks:>8.1f}')
+
+    return
+
+
+def bench_loss(args):
+    print(f'{"rto":<10}{"loss":>6}{"mean ms":>10}{"p50 ms":>10}{"p99 ms":>10}{"max ms":>10}{"resent":>8}{"srtt ms":>10}')
+
+    for loss in args.losses:
+        for rto in [args.rto, None]:
+            # Only the measured frames are lost, the one stopping the
+            # forwarders must get through
+            rings = make_local_ring(
+                args.machines,
+                cls=LossyLocalRing,
+                rto=rto,
+                loss=loss,
+                types=[MessageType.MOCK_MESSAGE.value],
+                rng=Random(0)
+            )
+
+            stats = percentiles(circuit_blocking(rings, args.messages))
+            sender = rings[0]
+            resent = sum(sender.metrics.retransmitted)
+            srtt = 0.0 if sender.srtt is None else sender.srtt
+
+            name = 'adaptive' if rto is None else f'fixed {rto:g}s'
+            print(f'{name:<10}{loss:>6.2f}'
+                f'{stats["mean"] * 1e3:>10.2f}'
+                f'{stats["p50"] * 1e3:>10.2f}'
+                f'{stats["p99"] * 1e3:>10.2f}'
+                f'{stats["max"] * 1e3:>10.2f}'
+                f'{resent:>8}'
+                f'{srtt * 1e3:>10.3f}'
+            )
+
+    return
+
+
+def bench_recovery(args):
+    print(f'{"game":>6}{"seconds":>10}{"lost":>6}{"claims":>8}{"regenerated":>13}{"recovery s":>12}  finish order')
+
+    types = None if args.all else [MessageType.TOKEN.value]
+    ok = True
+
+    for game in range(args.games):
+        rings = make_local_ring(
+            args.machines,
+            cls=LossyLocalRing,
+            token_timeout=args.token_timeout,
+            loss=args.loss,
+            types=types,
+            rng=Random(game)
+        )
+
+        policies = {
+            id: make_policy(args.policy, Random(game + id))
+            for id in range(1, args.machines + 1)
+        }
+
+        start = time.perf_counter()
+        games = play_local_game(args.machines, policies, seed=game, rings=rings)
+        elapsed = time.perf_counter() - start
+
+        orders = {tuple(g.get_finish_order()) for g in games.values()}
+        order = list(orders.pop()) if len(orders) == 1 else []
+
+        if len(order) != args.machines:
+            ok = False
+
+        lost = sum(ring.dropped for ring in rings)
+        claims = sum(ring.metrics.token_claims for ring in rings)
+        regenerated = sum(ring.metrics.tokens_regenerated for ring in rings)
+        recovery = sum(ring.metrics.token_recovery_seconds for ring in rings)
+        mean = recovery / regenerated if regenerated else 0.0
+
+        print(f'{game:>6}{elapsed:>10.2f}{lost:>6}{claims:>8}{regenerated:>13}{mean:>12.2f}  {order}')
+
+    exit(0 if ok else 1)
+
+
+def bench_restart(args):
+    print(f'{"game":>6}{"victim":>8}{"seconds":>10}{"checkpoints":>13}{"write us":>10}'
+        f'{"restore ms":>12}{"resync ms":>11}{"recovery s":>12}{"regenerated":>13}  finish order')
+
+    ok = True
+    directory = tempfile.mkdtemp(prefix='dalmuti-')
+
+    for game in range(args.games):
+        victim = game % args.machines + 1
+
+        start = time.perf_counter()
+        result = play_with_restart(
+            args.machines,
+            victim,
+            args.after,
+            args.downtime,
+            args.token_timeout,
+            args.policy,
+            game,
+            directory,
+            args.crash_at
+        )
+        elapsed = time.perf_counter() - start
+
+        orders = {tuple(g.get_finish_order()) for g in result['games'].values()}
+        order = list(orders.pop()) if len(orders) == 1 else []
+
+        if len(order) != args.machines or 'restore' not in result:
+            ok = False
+
+        writes = sum(c.writes for c in result['checkpointers'])
+        write = sum(c.seconds for c in result['checkpointers']) / writes if writes else 0.0
+        regenerated = sum(ring.metrics.tokens_regenerated for ring in result['rings'])
+
+        restore = f'{result["restore"] * 1e3:.2f}' if 'restore' in result else '-'
+        resync = f'{result["resync"] * 1e3:.1f}' if 'resync' in result else '-'
+        recovery = f'{result["recovery"]:.2f}' if 'recovery' in result else '-'
+
+        print(f'{game:>6}{victim:>8}{elapsed:>10.2f}{writes:>13}{write * 1e6:>10.1f}'
+            f'{restore:>12}{resync:>11}{recovery:>12}{regenerated:>13}  {order}')
+
+    exit(0 if ok else 1)
+
+
+class TimedRing(Ring):
+    """Ring that records how long every frame it forwards stays on it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.arrived = 0.0
+        self.hops: List[float] = []
+        pass
+
+    def recv_frame(self, timeout: float = SOCKET_TIMEOUT):
+        data = super().recv_frame(timeout)
+        self.arrived = time.perf_counter()
+
+        return data
+
+    def forward_frame(self, message, data):
+        super().forward_frame(message, data)
+        self.hops.append(time.perf_counter() - self.arrived)
+
+        return
+
+    pass
+
+
+def run_until_closed(target, ring, *args):
+    """Runs ``target`` until it returns or ``ring`` is cleaned up under it."""
+    try:
+        target(ring, *args)
+    except OSError:
+        pass
+
+    return
+
+
+def token_handoffs(rings: list, samples: int) -> List[float]:
+    """Time from ``give_token`` on a machine until the next one has it."""
+    given = {}
+    handoffs = []
+    done = threading.Event()
+
+    def pass_token(ring):
+        while not done.is_set():
+            while not ring.has_token:
+                ring.recv_and_send_message()
+
+            received = time.perf_counter()
+            if ring.machine_id in given:
+                handoffs.append(received - given.pop(ring.machine_id))
+
+                if len(handoffs) >= samples:
+                    done.set()
+                    return
+
+            given[ring.machine_id % ring.num_machines + 1] = time.perf_counter()
+            ring.give_token()
+
+        return
+
+    for ring in rings:
+        ring.setup()
+
+    threads = [
+        threading.Thread(target=run_until_closed, args=(pass_token, ring), daemon=True)
+        for ring in rings
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    done.wait()
+
+    for ring in rings:
+        ring.cleanup()
+
+    return handoffs[:samples]
+
+
+def token_settles(rings: list, samples: int) -> List[float]:
+    """Time from ``give_token`` until ``wait_token_settle`` returns on the giver."""
+    settles = []
+    done = threading.Event()
+
+    def settle_token(ring):
+        while not done.is_set():
+            while not ring.has_token:
+                ring.wait_token_settle()
+
+            start = time.perf_counter()
+            ring.give_token()
+            ring.wait_token_settle()
+            settles.append(time.perf_counter() - start)
+
+            if len(settles) >= samples:
+                done.set()
+
+        return
+
+    for ring in rings:
+        ring.setup()
+
+    threads = [
+        threading.Thread(target=run_until_closed, args=(settle_token, ring), daemon=True)
+        for ring in rings
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    done.wait()
+
+    for ring in rings:
+        ring.cleanup()
+
+    return settles[:samples]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def bench_scale(args):
+    print(f'{"machines":>9}{"decks":>7}{"deal bytes":>12}{"p50 us":>10}{"p99 us":>10}'
+        f'{"hop us":>9}{"game s":>9}')
+
+    for machines in args.machines:
+        deal = Message(1, MessageType.DEAL, Deal(machines, Random(0)).deal())
+        size = len(deal.encode())
+
+        if size > BUFFER_SIZE:
+            logging.warning(f'A DEAL of {machines} machines is {size} bytes, over {BUFFER_SIZE}')
+
+        samples = circuit_blocking(make_loopback_ring(machines), args.messages)
+        stats = percentiles(samples)
+
+        game = '-'
+        if args.games > 0:
+            start = time.perf_counter()
+            for seed in range(args.games):
+                policies = {id: make_policy('greedy') for id in range(1, machines + 1)}
+                play_local_game(machines, policies, seed)
+
+            game = f'{(time.perf_counter() - start) / args.games:.2f}'
+
+        print(f'{machines:>9}{num_decks(machines):>7}{size:>12}'
+            f'{stats["p50"] * 1e6:>10.1f}{stats["p99"] * 1e6:>10.1f}'
+            f'{stats["p50"] / machines * 1e6:>9.1f}{game:>9}')
+
+    return
+
+
+def bench_hybrid(args):
+    print(f'{"machines":>9}  {"transport":<12}{"datagrams":>10}{"p50 us":>10}{"p99 us":>10}{"speedup":>9}')
+
+    link = DelayedLink(args.delay / 1e6) if args.delay > 0 else None
+
+    for machines in args.machines:
+        transports = [
+            ('ring', make_loopback_ring(machines), machines),
+            ('multicast', make_hybrid_ring(machines, DEFAULT_GROUP), machines),
+            ('fan-out', make_hybrid_ring(machines), 2 * (machines - 1)),
+        ]
+
+        base = None
+        for (name, rings, datagrams) in transports:
+            stats = percentiles(circuit_blocking(rings, args.messages, link))
+
+            if base is None:
+                base = stats['p50']
+
+            print(f'{machines:>9}  {name:<12}{datagrams:>10}'
+                f'{stats["p50"] * 1e6:>10.1f}{stats["p99"] * 1e6:>10.1f}'
+                f'{base / stats["p50"]:>8.2f}x')
+
+    if link is not None:
+        link.stop()
+
+    return
+
+
+def bench_suite(args):
+    results = {}
+
+    rings = make_loopback_ring(args.machines, TimedRing)
+    results['circuit'] = circuit_blocking(rings, args.samples)
+    results['hop'] = [hop for ring in rings[1:] for hop in ring.hops][:args.samples]
+
+    results['handoff'] = token_handoffs(make_loopback_ring(args.machines), args.samples)
+    results['settle'] = token_settles(make_loopback_ring(args.machines), args.samples)
+
+    print(f'{"operation":<14}{"mean us":>10}{"p50 us":>10}{"p95 us":>10}{"p99 us":>10}{"ops/s":>12}')
+    for (name, samples) in results.items():
+        print_latency(name, samples)
+
+    rates = {
+        'window_1': pipelined_rate(args.machines, args.samples, 1),
+        f'window_{args.window}': pipelined_rate(args.machines, args.samples, args.window),
+    }
+
+    print()
+    for (name, rate) in rates.items():
+        print(f'{"frames/s " + name:<24}{rate:>12,.0f}')
+
+    if args.json is not None:
+        report = {
+            'commit': git_commit(),
+            'time': time.time(),
+            'python': platform.python_version(),
+            'machines': args.machines,
+            'samples': args.samples,
+            'latency': {
+                name: {
+                    **{key: value for (key, value) in percentiles(samples).items()},
+                    'histogram': histogram(samples),
+                }
+                for (name, samples) in results.items()
+            },
+            'frames_per_second': rates,
+        }
+
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return
+
+
+def bench_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f'{base["commit"][:10]} -> {head["commit"][:10]}')
+    print(f'{"metric":<24}{"base":>12}{"head":>12}{"ratio":>8}')
+
+    regressions = 0
+
+    def row(name, old, new, ratio):
+        nonlocal regressions
+
+        flag = ''
+        if ratio > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+
+        print(f'{name:<24}{old:>12,.1f}{new:>12,.1f}{ratio:>8.2f}{flag}')
+        return
+
+    for (name, stats) in base['latency'].items():
+        if name not in head['latency']:
+            continue
+
+        for key in ['p50', 'p99']:
+            old = stats[key] * 1e6
+            new = head['latency'][name][key] * 1e6
+            row(f'{name} {key} us', old, new, new / old)
+
+    for (name, old) in base['frames_per_second'].items():
+        if name in head['frames_per_second']:
+            new = head['frames_per_second'][name]
+            row(f'frames/s {name}', old, new, old / new)
+
+    exit(1 if regressions else 0)
+
+
+def main():
+    logging.basicConfig(format='[%(levelname)s] %(message)s', level=logging.WARNING)
+
+    args = get_args()
+    args.func(args)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
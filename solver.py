@@ -0,0 +1,298 @@
+import argparse
+import math
+import signal
+import time
+
+from collections import OrderedDict
+from functools import lru_cache
+from random import Random
+from typing import Dict, List, Tuple
+
+from engine import PASS, PlayState, RoundState
+from journal import JournalEvent, Replay, read_journal
+from moves import JESTER, NUM_RANKS, Play, legal_plays, play_rank
+
+
+# Entries kept by the transposition table before the least recently used go
+TABLE_SIZE = 1 << 18
+
+# Positions with more cards left than this are too big to solve in a turn
+SOLVE_CARDS = 16
+
+HASH_MASK = (1 << 64) - 1
+
+Outcome = Tuple[int, ...]
+
+
+@lru_cache(maxsize=1 << 16)
+def ordered_plays(hand: tuple, table_rank: int, table_count: int) -> Tuple[Play, ...]:
+    """The actions of ``hand``, most promising first, passing last.
+
+    Playing more cards at once comes first, so a play that empties the
+    hand is tried before anything else, then plays spending fewer Jesters
+    and then worse cards.
+    """
+    plays = sorted(
+        legal_plays(hand, table_rank, table_count),
+        key=lambda play: (-len(play), play.count(JESTER), -play_rank(play))
+    )
+
+    if table_count != 0:
+        plays.append(PASS)
+
+    return tuple(plays)
+
+
+class Solver():
+    """Finishes the tricks of a round exactly when every hand is known.
+
+    Every player picks the play that lets them finish the soonest, given
+    that the others do the same (max^n search), trying the promising
+    plays first and stopping as soon as one finishes the player next.
+    Players are searched by their seat in the order, so positions of
+    different rounds share the transposition table, keyed by an additive
+    hash of the hands by seat updated as cards are played. The table
+    keeps ``max_entries`` outcomes and evicts the least recently used.
+
+    ``nodes``, ``hits``, ``evictions``, ``solved`` and ``seconds`` add up
+    every search.
+    """
+
+    def __init__(self, max_entries: int = TABLE_SIZE, seed: int = 0):
+        self.max_entries = max_entries
+        self.table: OrderedDict = OrderedDict()
+
+        self.rng = Random(seed)
+        self.keys: List[List[int]] = [[]]
+
+        self.nodes = 0
+        self.hits = 0
+        self.evictions = 0
+        self.solved = 0
+        self.seconds = 0.0
+
+        pass
+
+    def solve(self, state: RoundState, player: int = None) -> List[int]:
+        """The finish order of the players still holding cards, ``player`` to move.
+
+        The player to move is the one at ``state.turn`` by default.
+        """
+        start = time.perf_counter()
+
+        (position, hash) = self.__position(state, state.hands, player)
+        outcome = self.__search(position, hash)
+
+        self.__count(start)
+        return [state.order[seat - 1] for seat in outcome]
+
+    def best_play(
+        self,
+        state: RoundState,
+        player: int,
+        hands: Dict[int, List[int]] = None
+    ) -> List[int]:
+        """The play of ``player`` that finishes them the soonest.
+
+        ``hands`` are solved instead of those of ``state`` when given, e.g.
+        a policy that only knows its own hand can pass what it worked out.
+        """
+        start = time.perf_counter()
+
+        (position, hash) = self.__position(state, state.hands if hands is None else hands, player)
+        (_, play) = self.__best(position, hash)
+
+        self.__count(start)
+        return list(play)
+
+    def evaluate(self, state: RoundState, player: int) -> List[Tuple[List[int], List[int]]]:
+        """Every action of ``player`` with the finish order it leads to."""
+        start = time.perf_counter()
+
+        (position, hash) = self.__position(state, state.hands, player)
+        keys = self.keys[position.player]
+        base = len(position.finish_order)
+        results = []
+
+        for play in ordered_plays(tuple(position.hands[position.player]),
+                position.table_rank, position.table_count):
+            outcome = self.__after(position, hash, keys, base, play)
+            results.append((list(play), [state.order[seat - 1] for seat in outcome]))
+
+        self.__count(start)
+        return results
+
+    def __position(
+        self,
+        state: RoundState,
+        hands: Dict[int, List[int]],
+        player: int = None
+    ) -> Tuple[PlayState, int]:
+        order = state.order
+        seats = list(range(1, len(order) + 1))
+
+        while len(self.keys) <= len(order):
+            self.keys.append([self.rng.getrandbits(64) for _ in range(NUM_RANKS)])
+
+        hands = {seat: list(hands[id]) for (seat, id) in zip(seats, order)}
+        hash = 0
+        for seat in seats:
+            keys = self.keys[seat]
+            for (i, count) in enumerate(hands[seat]):
+                hash += count * keys[i]
+
+        turn = state.turn if player is None else order.index(player)
+        owner = order.index(state.table_owner) + 1 if state.table_owner != 0 else 0
+
+        position = PlayState(
+            seats,
+            hands,
+            state.table_rank,
+            state.table_count,
+            owner,
+            turn,
+            [order.index(id) + 1 for id in state.finish_order]
+        )
+
+        return (position, hash & HASH_MASK)
+
+    def __search(self, state: PlayState, hash: int) -> Outcome:
+        """The order in which the players holding cards in ``state`` finish."""
+        if state.is_over():
+            return ()
+
+        self.nodes += 1
+        table = self.table
+        key = (hash, state.num_players, state.turn, state.table_rank,
+            state.table_count, state.table_owner)
+
+        outcome = table.get(key)
+        if outcome is not None:
+            table.move_to_end(key)
+            self.hits += 1
+            return outcome
+
+        (outcome, _) = self.__best(state, hash)
+
+        table[key] = outcome
+        if len(table) > self.max_entries:
+            table.popitem(last=False)
+            self.evictions += 1
+
+        return outcome
+
+    def __best(self, state: PlayState, hash: int) -> Tuple[Outcome, Play]:
+        seat = state.player
+        keys = self.keys[seat]
+        base = len(state.finish_order)
+
+        best = None
+        best_play = PASS
+        best_place = math.inf
+
+        for play in ordered_plays(tuple(state.hands[seat]), state.table_rank, state.table_count):
+            outcome = self.__after(state, hash, keys, base, play)
+            place = outcome.index(seat)
+
+            if place < best_place:
+                (best, best_play, best_place) = (outcome, play, place)
+
+                # Nobody left can finish before the player who finishes next
+                if place == 0:
+                    break
+
+        return (best, best_play)
+
+    def __after(
+        self,
+        state: PlayState,
+        hash: int,
+        keys: List[int],
+        base: int,
+        play: Play
+    ) -> Outcome:
+        for card in play:
+            hash -= keys[card - 1]
+
+        state.make(play)
+        outcome = tuple(state.finish_order[base:]) + self.__search(state, hash & HASH_MASK)
+        state.unmake()
+
+        return outcome
+
+    def __count(self, start: float):
+        self.solved += 1
+        self.seconds += time.perf_counter() - start
+
+        return
+
+    pass
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Solves the end of the rounds of a game journal and points out the mistakes.'
+    )
+
+    parser.add_argument('journal', help='journal file')
+    parser.add_argument(
+        '-c',
+        '--cards',
+        type=int,
+        default=SOLVE_CARDS,
+        help='solve once this many cards are left in the hands'
+    )
+
+    return parser.parse_args()
+
+
+def analyze(entries: list, cards: int):
+    replay = Replay(entries)
+    solver = Solver()
+    shown = False
+
+    for (i, entry) in enumerate(entries):
+        (event, player, _, played) = entry
+        state = replay.state
+
+        # Players who are out are still journaled passing their turns
+        if (event in (JournalEvent.PLAY_CARDS.value, JournalEvent.PASS.value)
+                and state.num_cards[player] != 0
+                and sum(state.num_cards.values()) <= cards):
+            results = solver.evaluate(state, player)
+            places = [outcome.index(player) for (_, outcome) in results]
+            best = min(places)
+
+            if not shown:
+                (_, outcome) = results[places.index(best)]
+                print(f'{i:>6}  solved with {sum(state.num_cards.values())} cards left, '
+                    f'finish order {state.finish_order + outcome}')
+                shown = True
+
+            place = places[[play for (play, _) in results].index(sorted(played))]
+            if place > best:
+                (play, _) = results[places.index(best)]
+                print(f'{i:>6}  player {player} played {list(played)} '
+                    f'and lost {place - best} places, {play} was best')
+        elif event == JournalEvent.SETUP.value:
+            shown = False
+
+        replay.step()
+
+    print(f'{solver.solved} positions, {solver.nodes} nodes, {solver.hits} table hits '
+        f'in {solver.seconds:.3f}s')
+    return
+
+
+def main():
+    args = get_args()
+
+    # Stop quietly when the output is piped into e.g. head
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+    analyze(read_journal(args.journal), args.cards)
+    return
+
+
+if __name__ == '__main__':
+    main()
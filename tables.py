@@ -0,0 +1,181 @@
+import logging
+import queue
+import struct
+import threading
+
+from random import Random
+from typing import Dict, List
+
+from engine import Policy
+from game import Game
+from interface import Interface
+from ring import Message, Ring, SOCKET_TIMEOUT
+
+
+class TableRing(Ring):
+    """The view of one table on a ring shared through a ``Dispatcher``.
+
+    It has the token, sequence numbers and send window of its own table,
+    sends through the shared ring and receives the frames the dispatcher
+    routed to it, so a ``Game`` runs on it unchanged.
+    """
+
+    def __init__(self, dispatcher: 'Dispatcher', table: int, inbox: queue.Queue):
+        ring = dispatcher.ring
+
+        super().__init__(
+            ring.num_machines,
+            ring.machine_id,
+            ring.send_port,
+            ring.recv_port,
+            ring.send_address,
+            ring.recv_address,
+            ring.window,
+            table,
+            ring.token_timeout,
+            ring.fixed_rto
+        )
+
+        self.dispatcher = dispatcher
+        self.inbox = inbox
+        pass
+
+    def setup(self):
+        return
+
+    def cleanup(self):
+        self.dispatcher.close_table(self.table)
+        return
+
+    def send(self, data):
+        self.dispatcher.ring.send(data)
+        return
+
+    def recv_frame(self, timeout: float = SOCKET_TIMEOUT):
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    pass
+
+
+class Dispatcher():
+    """Routes the frames of a set up ``Ring`` to one ``TableRing`` per table.
+
+    A thread reads every frame from the shared sockets and queues it for
+    its table by the id in the header. Frames of a table that was not
+    opened yet wait for ``open_table``, so machines may open tables in any
+    order, and frames of closed tables are dropped.
+    """
+
+    def __init__(self, ring: Ring):
+        self.ring = ring
+
+        self.inboxes: Dict[int, queue.Queue] = {}
+        self.closed = set()
+        self.lock = threading.Lock()
+
+        self.running = False
+        self.thread = threading.Thread(target=self.__dispatch, daemon=True)
+
+        pass
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+        return
+
+    def stop(self):
+        self.running = False
+        return
+
+    def join(self):
+        # The thread notices it was stopped once its receive times out
+        self.thread.join()
+        return
+
+    def open_table(self, table: int) -> TableRing:
+        return TableRing(self, table, self.__inbox(table))
+
+    def close_table(self, table: int):
+        with self.lock:
+            self.inboxes.pop(table, None)
+            self.closed.add(table)
+
+        return
+
+    def __inbox(self, table: int) -> queue.Queue:
+        with self.lock:
+            if table not in self.inboxes:
+                self.inboxes[table] = queue.Queue()
+
+            return self.inboxes[table]
+
+    def __dispatch(self):
+        while self.running:
+            data = self.ring.recv_frame()
+            if data is None:
+                continue
+
+            try:
+                table = Message.peek_table(data)
+            except (ValueError, struct.error) as e:
+                logging.warning(f'[DISPATCH] Discarding invalid frame: {e}')
+                continue
+
+            if table in self.closed:
+                logging.debug(f'[DISPATCH] Dropping frame of closed table {table}')
+                continue
+
+            # The ring reuses its receive buffer for the next frame
+            self.__inbox(table).put(bytes(data))
+
+        return
+
+    pass
+
+
+def play_tables(
+    dispatchers: List[Dispatcher],
+    tables: List[int],
+    policies: Dict[int, Policy],
+    seed: int = None
+) -> Dict[int, Dict[int, Game]]:
+    """Plays one bot ``Game`` per table at once over the same rings.
+
+    ``dispatchers`` holds the started dispatchers of the machines run by
+    this process, all of them or just one. Returns the games of every table
+    by table id and then by machine id.
+    """
+    games = {table: {} for table in tables}
+    table_rings = []
+    threads = []
+
+    for table in tables:
+        for dispatcher in dispatchers:
+            ring = dispatcher.open_table(table)
+            table_rings.append(ring)
+            id = ring.machine_id
+
+            games[table][id] = Game(
+                ring,
+                ring.num_machines,
+                policy=policies[id],
+                interface=Interface(id, enabled=False),
+                rng=Random(None if seed is None else seed + table)
+            )
+
+            threads.append(threading.Thread(target=games[table][id].run, daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    for ring in table_rings:
+        ring.cleanup()
+
+    return games
@@ -0,0 +1,47 @@
+import pytest
+
+from batch import BatchSimulator
+from engine import Phase, Round
+from policy import make_policy
+
+
+NUM_GAMES = 200
+
+
+def engine_finish_orders(simulator: BatchSimulator, policy: str) -> list:
+    """Plays every deal of ``simulator`` with ``engine.Round``, ids in seat order."""
+    p = simulator.num_players
+    orders = []
+
+    for hands in simulator.hands.tolist():
+        round = Round(p, {id: make_policy(policy) for id in range(1, p + 1)}, order=list(range(1, p + 1)))
+        round.step()
+        round.step()
+
+        round.state.hands = {i + 1: hand for (i, hand) in enumerate(hands)}
+        round.state.num_cards = {id: sum(hand) for (id, hand) in round.state.hands.items()}
+
+        while round.phase != Phase.FINISHED:
+            round.step()
+
+        # A great revolution reverses the order, and the batch seats with it
+        position = {id: i for (i, id) in enumerate(round.state.order)}
+        orders.append([position[id] for id in round.state.finish_order])
+
+    return orders
+
+
+@pytest.mark.parametrize('policy', ['greedy', 'pass'])
+@pytest.mark.parametrize('num_players', [4, 5, 7])
+def test_batch_plays_like_the_engine(policy, num_players):
+    simulator = BatchSimulator(NUM_GAMES, num_players, policy, seed=num_players)
+    simulator.deal()
+
+    expected = engine_finish_orders(simulator, policy)
+
+    simulator.check_revolution()
+    simulator.pay_taxes()
+    while simulator.active.any():
+        simulator.step()
+
+    assert simulator.finish_order.tolist() == expected
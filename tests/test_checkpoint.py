@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+from checkpoint import Checkpoint, Checkpointer, game_id_of, read_checkpoint
+from engine import Phase
+from game import Game
+from interface import Interface
+from localring import make_local_ring
+
+
+def make_checkpoint(game_id: int = 0x1234abcd) -> Checkpoint:
+    checkpoint = Checkpoint(2, 4)
+    checkpoint.game_id = game_id
+    checkpoint.phase = Phase.PLAY.value
+    checkpoint.table = 3
+    checkpoint.seq = 17
+    checkpoint.expected = {1: 9, 2: 1, 3: 12, 4: 65535}
+    checkpoint.generation = 200
+    checkpoint.token_holder = 4
+
+    checkpoint.player_order = [3, 1, 4, 2]
+    checkpoint.had_revolution = False
+    checkpoint.taxes_paid = True
+    checkpoint.pending = [1, 2]
+    checkpoint.table_owner = 4
+    checkpoint.table_cards = [7, 7, 13]
+    checkpoint.finish_order = [3]
+    checkpoint.current_player_index = 2
+    checkpoint.hand = [0, 1, 0, 2, 0, 0, 1, 0, 0, 3, 0, 0, 1]
+    checkpoint.hands = {id: [id] * 13 for id in range(1, 5)}
+
+    return checkpoint
+
+
+def make_game(machine_id: int = 2, num_players: int = 4) -> Game:
+    ring = make_local_ring(num_players)[machine_id - 1]
+    return Game(ring, num_players, interface=Interface(machine_id, enabled=False))
+
+
+def test_round_trip():
+    checkpoint = make_checkpoint()
+    decoded = Checkpoint.decode(checkpoint.encode())
+
+    assert vars(decoded) == vars(checkpoint)
+
+
+@pytest.mark.parametrize('data, error', [
+    (b'', 'No round'),
+    (b'DLCP\x02', 'too short'),
+    (b'XXXX' + make_checkpoint().encode()[4:], 'Not a checkpoint'),
+    (make_checkpoint().encode()[:-1], 'expected'),
+])
+def test_decode_rejects_malformed(data, error):
+    with pytest.raises(ValueError, match=error):
+        Checkpoint.decode(data)
+
+
+def test_checkpointer_keeps_only_the_current_round(tmp_path):
+    path = str(tmp_path / 'node2.checkpoint')
+
+    checkpointer = Checkpointer(path)
+    checkpointer.save(make_checkpoint())
+    checkpointer.close()
+
+    assert read_checkpoint(path).game_id == 0x1234abcd
+
+    # Opening again starts the file over, and a round over leaves nothing
+    checkpointer = Checkpointer(path)
+    with pytest.raises(ValueError, match='No round'):
+        read_checkpoint(path)
+
+    checkpointer.save(make_checkpoint())
+    checkpointer.clear()
+    checkpointer.close()
+
+    with pytest.raises(ValueError, match='No round'):
+        read_checkpoint(path)
+
+
+def test_checkpointer_replaces_a_longer_checkpoint(tmp_path):
+    path = str(tmp_path / 'node2.checkpoint')
+    checkpointer = Checkpointer(path)
+
+    checkpointer.save(make_checkpoint())
+
+    shorter = make_checkpoint()
+    shorter.table_cards = []
+    shorter.pending = []
+    checkpointer.save(shorter)
+
+    assert vars(read_checkpoint(path)) == vars(shorter)
+    assert not os.path.exists(checkpointer.tmp)
+
+
+def test_game_id_depends_on_the_deal():
+    deal = [(3, [1, 2, 13]), (1, [4, 4]), (2, [5]), (4, [6, 6])]
+    other = [(3, [1, 2, 13]), (1, [4, 5]), (2, [4]), (4, [6, 6])]
+
+    assert game_id_of([3, 1, 2, 4], deal) == game_id_of([3, 1, 2, 4], deal)
+    assert game_id_of([3, 1, 2, 4], deal) != game_id_of([3, 1, 2, 4], other)
+    assert game_id_of([3, 1, 2, 4], deal) != game_id_of([1, 3, 2, 4], deal)
+
+
+def test_restore_takes_up_the_round():
+    game = make_game()
+    game.restore_state(make_checkpoint(), 0x1234abcd)
+
+    # The table is the one of the ring, not taken from the checkpoint
+    expected = make_checkpoint()
+    expected.table = 0
+
+    assert game.get_game_id() == 0x1234abcd
+    assert game.checkpoint_state().encode() == expected.encode()
+
+
+def test_restore_refuses_another_game():
+    game = make_game()
+
+    with pytest.raises(ValueError, match='not of game'):
+        game.restore_state(make_checkpoint(0x1234abcd), 0x0badf00d)
+
+
+def test_restore_refuses_another_machine():
+    game = make_game(machine_id=3)
+
+    with pytest.raises(ValueError, match='machine 2 given to machine 3'):
+        game.restore_state(make_checkpoint())
+
+
+def test_restore_refuses_a_round_not_dealt():
+    checkpoint = make_checkpoint()
+    checkpoint.phase = Phase.SETUP.value
+
+    with pytest.raises(ValueError, match='cannot be resumed'):
+        make_game().restore_state(checkpoint)
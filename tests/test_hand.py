@@ -0,0 +1,63 @@
+from random import Random
+
+import pytest
+
+from cards import Card
+from game import CountHand, Hand
+
+
+CARDS = [Card.JESTER, Card.COOK, Card.DALMUTI, Card.COOK, Card.ABBESS, Card.JESTER]
+
+
+def test_cards_are_added_used_and_counted():
+    hand = CountHand()
+    hand.add_cards(CARDS)
+
+    assert hand.get_num_cards() == 6
+    assert hand.count(Card.COOK) == 2
+    assert hand.count(Card.JESTER.value) == 2
+    assert hand.has_two_jesters()
+    assert not hand.has_card(Card.PEASANT)
+
+    hand.use_cards([Card.COOK, Card.JESTER])
+
+    assert hand.get_num_cards() == 4
+    assert hand.count(Card.COOK) == 1
+    assert not hand.has_two_jesters()
+
+    # Cards the hand does not hold are left alone
+    hand.use_card(Card.PEASANT.value)
+    assert hand.get_num_cards() == 4
+
+
+def test_cards_are_kept_in_order():
+    hand = CountHand.from_cards(CARDS)
+
+    assert hand.get_cards() == sorted(CARDS)
+    assert hand.get_counts()[Card.COOK.value - 1] == 2
+    assert hand.use_card_on_index(1) == Card.ABBESS
+
+    with pytest.raises(IndexError):
+        hand.use_card_on_index(5)
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 3, 6, 7])
+def test_best_cards_are_the_lowest_values(n):
+    hand = CountHand.from_cards(CARDS)
+
+    assert hand.get_n_best_cards(n) == sorted(CARDS)[:n]
+
+
+def test_round_trips_through_hand():
+    rng = Random(3)
+
+    for _ in range(50):
+        cards = [Card(rng.randint(1, 13)) for _ in range(rng.randint(0, 20))]
+
+        hand = CountHand.from_cards(cards).to_hand()
+        assert isinstance(hand, Hand)
+        assert hand.get_cards() == sorted(cards)
+
+        back = CountHand.from_cards(hand.get_cards())
+        assert back.get_cards() == hand.get_cards()
+        assert back.get_n_best_cards(3) == hand.get_n_best_cards(3)
@@ -0,0 +1,51 @@
+from argparse import Namespace
+
+from journal import Journal, JournalEvent, Replay, read_journal, show_journal
+
+
+def write_journal(path):
+    journal = Journal(str(path))
+    journal.start(1, 4)
+    journal.append(JournalEvent.SETUP, cards=[3, 1, 4, 2])
+    journal.append(JournalEvent.DEAL, 3, [1, 2, 2, 13])
+    journal.append(JournalEvent.DEAL, 1, [5, 5, 6])
+    journal.append(JournalEvent.DEAL, 4, [7, 8])
+    journal.append(JournalEvent.DEAL, 2, [9, 9, 9])
+    journal.append(JournalEvent.PLAY_CARDS, 3, [2, 2])
+    journal.close()
+
+    return path
+
+
+def test_replay_applies_every_entry(tmp_path):
+    entries = read_journal(str(write_journal(tmp_path / 'node1.journal')))
+
+    replay = Replay(entries)
+    replay.run()
+
+    assert replay.state.order == [3, 1, 4, 2]
+    assert replay.state.num_cards == {3: 2, 1: 3, 4: 2, 2: 3}
+    assert replay.state.table_rank == 2
+    assert replay.state.table_count == 2
+
+
+def test_show_seeks_into_the_deal(tmp_path, capsys):
+    path = write_journal(tmp_path / 'node1.journal')
+
+    # Only the Greater Dalmuti has been dealt after the first DEAL entry
+    show_journal(Namespace(journal=str(path), seek=3))
+    out = capsys.readouterr().out
+
+    assert 'Player 3: 4 cards' in out
+    assert 'Player 1: not dealt' in out
+    assert 'Player 2: not dealt' in out
+
+
+def test_show_seeks_before_the_deal(tmp_path, capsys):
+    path = write_journal(tmp_path / 'node1.journal')
+
+    show_journal(Namespace(journal=str(path), seek=2))
+    out = capsys.readouterr().out
+
+    assert 'Order: [3, 1, 4, 2]' in out
+    assert out.count('not dealt') == 4
@@ -0,0 +1,83 @@
+import logging
+
+import pytest
+
+from localring import play_with_restart
+
+
+NUM_MACHINES = 5
+SEED = 7
+
+# Seconds from the restart until every machine finished the round, well
+# above what a token claim and the rest of a greedy round take
+RECOVERY_LIMIT = 5.0
+
+
+def finish_orders(result: dict) -> set:
+    return {tuple(game.get_finish_order()) for game in result['games'].values()}
+
+
+@pytest.fixture(scope='module')
+def uncrashed(tmp_path_factory) -> tuple:
+    directory = str(tmp_path_factory.mktemp('uncrashed'))
+    result = play_with_restart(NUM_MACHINES, 1, None, 0.0, 0.5, 'greedy', SEED, directory)
+
+    (order,) = finish_orders(result)
+    return order
+
+
+@pytest.mark.parametrize('victim, crash_at, after', [
+    (1, 'wait', 60),
+    (3, 'wait', 120),
+    (2, 'play', 40),
+    (4, 'play', 120),
+    (1, 'handoff', 60),
+    (5, 'handoff', 120),
+])
+def test_round_survives_a_crash(tmp_path, uncrashed, victim, crash_at, after):
+    result = play_with_restart(
+        NUM_MACHINES,
+        victim,
+        after,
+        0.1,
+        0.5,
+        'greedy',
+        SEED,
+        str(tmp_path),
+        crash_at
+    )
+
+    assert 'restore' in result, 'the machine did not crash before the round was over'
+
+    # Nothing was played twice or lost, so the round ends as if it never went down
+    assert finish_orders(result) == {uncrashed}
+    assert result['recovery'] < RECOVERY_LIMIT
+
+
+@pytest.mark.parametrize('seed, victim, crash_at', [
+    (0, 1, 'play'),
+    (2, 3, 'play'),
+    (5, 1, 'handoff'),
+    (8, 4, 'handoff'),
+])
+def test_restart_resends_what_it_decided(tmp_path, caplog, seed, victim, crash_at):
+    # A random bot decides something else once restarted, so only the frames
+    # saved before they went out keep the other machines in step with it
+    with caplog.at_level(logging.ERROR):
+        result = play_with_restart(
+            NUM_MACHINES,
+            victim,
+            40,
+            0.1,
+            0.5,
+            'random',
+            seed,
+            str(tmp_path),
+            crash_at
+        )
+
+    assert 'restore' in result, 'the machine did not crash before the round was over'
+
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+    assert len(finish_orders(result)) == 1
+    assert result['recovery'] < RECOVERY_LIMIT
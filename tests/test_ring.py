@@ -0,0 +1,161 @@
+from random import Random
+
+import pytest
+
+import ring
+
+from localring import LossyLocalRing, make_local_ring, play_local_game
+from policy import make_policy
+from ring import END_MARKER, HEADER, Message, MessageType, Reorderer, ResyncError, SEQ_SPACE, next_seq
+
+
+def frame(origin: int, seq: int, type: MessageType = MessageType.PASS) -> Message:
+    return Message(origin, type, seq=seq)
+
+
+def test_wire_round_trip():
+    message = Message(3, MessageType.PLAY_CARDS, [(3, [7, 7, 13]), (5, [])], seq=41, table=2)
+    message.recv_confirm = 0b1011
+
+    decoded = Message.decode(message.encode())
+
+    assert decoded.origin == 3
+    assert decoded.type == MessageType.PLAY_CARDS.value
+    assert decoded.seq == 41
+    assert decoded.table == 2
+    assert decoded.recv_confirm == 0b1011
+    assert decoded.move == [(3, [7, 7, 13]), (5, [])]
+
+
+def test_wire_round_trip_of_a_large_ring():
+    message = Message(64, MessageType.SETUP, [(id, [id % 13 + 1]) for id in range(1, 65)], seq=SEQ_SPACE)
+    message.recv_confirm = (1 << 64) - 1
+
+    decoded = Message.decode(bytearray(message.encode()))
+
+    assert decoded.recv_confirm == message.recv_confirm
+    assert decoded.move == message.move
+
+
+def corrupt(data: bytes, offset: int, value: int) -> bytes:
+    data = bytearray(data)
+    data[offset] = value
+    return bytes(data)
+
+
+VALID = Message(2, MessageType.PLAY_CARDS, [(2, [4, 4])], seq=1).encode()
+
+
+@pytest.mark.parametrize('data, error', [
+    (b'', 'too short'),
+    (VALID[:HEADER.size], 'too short'),
+    (corrupt(VALID, 0, 0), 'start marker'),
+    (corrupt(VALID, 1, 99), 'version'),
+    (VALID[:-3] + VALID[-2:], 'does not match'),
+    (VALID[:-2] + b'\x00' + VALID[-2:], 'does not match'),
+    (corrupt(VALID, HEADER.size - 1, 2), 'does not match'),
+    (VALID[:-2] + (END_MARKER + 1).to_bytes(2, 'big'), 'end marker'),
+])
+def test_wire_rejects_malformed_frames(data, error):
+    with pytest.raises(ValueError, match=error):
+        Message.decode(data)
+
+
+def test_reorderer_holds_frames_until_the_gap_is_filled():
+    reorderer = Reorderer()
+
+    assert reorderer.push(frame(1, 2)) == []
+    assert reorderer.push(frame(1, 3)) == []
+
+    ready = reorderer.push(frame(1, 1))
+    assert [m.seq for m in ready] == [1, 2, 3]
+    assert reorderer.expected[1] == 4
+    assert reorderer.held[1] == {}
+
+
+def test_reorderer_keeps_origins_apart():
+    reorderer = Reorderer()
+
+    assert reorderer.push(frame(1, 2)) == []
+    assert [m.seq for m in reorderer.push(frame(2, 1))] == [1]
+    assert [m.seq for m in reorderer.push(frame(1, 1))] == [1, 2]
+
+
+def test_reorderer_drops_duplicates():
+    reorderer = Reorderer()
+
+    reorderer.push(frame(1, 1))
+    reorderer.push(frame(1, 2))
+
+    assert reorderer.push(frame(1, 1)) is None
+    assert reorderer.push(frame(1, 2)) is None
+
+
+def test_reorderer_wraps_around():
+    reorderer = Reorderer()
+    reorderer.expected[1] = SEQ_SPACE
+
+    assert reorderer.push(frame(1, 1)) == []
+
+    ready = reorderer.push(frame(1, SEQ_SPACE))
+    assert [m.seq for m in ready] == [SEQ_SPACE, 1]
+    assert reorderer.expected[1] == next_seq(1)
+
+    # Just behind after wrapping is old, not far ahead
+    assert reorderer.push(frame(1, SEQ_SPACE)) is None
+
+
+def test_reorderer_delivers_unsequenced_frames():
+    reorderer = Reorderer()
+    token = Message(1, MessageType.TOKEN, [(2, [1])])
+
+    assert reorderer.push(token) == [token]
+    assert reorderer.push(token) == [token]
+
+
+def test_lost_tokens_are_regenerated():
+    num_machines = 5
+
+    rings = make_local_ring(
+        num_machines,
+        cls=LossyLocalRing,
+        token_timeout=0.2,
+        loss=0.1,
+        types=[MessageType.TOKEN.value],
+        rng=Random(3)
+    )
+    policies = {id: make_policy('greedy') for id in range(1, num_machines + 1)}
+
+    games = play_local_game(num_machines, policies, seed=3, rings=rings)
+    orders = {tuple(game.get_finish_order()) for game in games.values()}
+
+    assert sum(r.dropped for r in rings) > 0
+    assert sum(r.metrics.tokens_regenerated for r in rings) > 0
+    assert len(orders) == 1
+    assert sorted(orders.pop()) == list(range(1, num_machines + 1))
+
+
+def test_restored_ring_gives_up_on_lost_frames(monkeypatch):
+    monkeypatch.setattr(ring, 'RESYNC_TIMEOUT', 0.0)
+
+    machine = make_local_ring(3)[1]
+    machine.restore(4, {1: 5, 2: 1, 3: 1}, 0, 1)
+
+    # Frame 5 of machine 1 was passed on before machine 2 went down
+    machine.inbox.put(frame(1, 6).encode())
+    machine.inbox.put(frame(1, 7).encode())
+
+    with pytest.raises(ResyncError, match='machine 1 from 5 on'):
+        machine.recv_message()
+
+
+def test_restored_ring_waits_for_frames_still_in_flight():
+    machine = make_local_ring(3)[1]
+    machine.restore(4, {1: 5, 2: 1, 3: 1}, 0, 1)
+
+    machine.inbox.put(frame(1, 6).encode())
+    machine.inbox.put(frame(1, 5).encode())
+
+    assert machine.recv_message().seq == 5
+    assert machine.recv_message().seq == 6
+    assert machine.gaps == {}
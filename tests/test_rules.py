@@ -0,0 +1,203 @@
+import pytest
+
+from engine import Phase, Policy, Round, worst_cards
+from moves import EMPTY_TABLE, JESTER, counts_of, is_legal_play, legal_plays, validate_play
+from policy import GreedyPolicy, PassPolicy
+
+
+def hand_of(*cards: int) -> list:
+    return counts_of(cards)
+
+
+def test_jesters_stand_in_for_the_rank_played():
+    hand = hand_of(5, 13, 13)
+
+    assert validate_play(hand, [5, 13, 13], EMPTY_TABLE, 0) is None
+    assert validate_play(hand, [13, 5], 6, 2) is None
+    assert validate_play(hand, [13, 13], EMPTY_TABLE, 0) is None
+
+
+def test_only_one_rank_is_played_at_once():
+    hand = hand_of(4, 5, 13)
+
+    assert validate_play(hand, [4, 5], EMPTY_TABLE, 0) is not None
+    assert validate_play(hand, [4, 13, 5], EMPTY_TABLE, 0) is not None
+
+
+def test_only_cards_in_the_hand_are_played():
+    hand = hand_of(4, 13)
+
+    assert validate_play(hand, [4, 4], EMPTY_TABLE, 0) is not None
+    assert validate_play(hand, [4, 13, 13], EMPTY_TABLE, 0) is not None
+    assert validate_play(hand, [14], EMPTY_TABLE, 0) is not None
+
+
+def test_a_follow_matches_the_count_on_the_table():
+    hand = hand_of(3, 3, 3)
+
+    assert validate_play(hand, [3, 3], 8, 2) is None
+    assert validate_play(hand, [3], 8, 2) is not None
+    assert validate_play(hand, [3, 3, 3], 8, 2) is not None
+
+
+def test_a_follow_needs_a_lower_rank():
+    hand = hand_of(7, 8, 9)
+
+    assert validate_play(hand, [7], 8, 1) is None
+    assert validate_play(hand, [8], 8, 1) is not None
+    assert validate_play(hand, [9], 8, 1) is not None
+
+    # Jesters alone are worth 13, higher than any natural card
+    assert validate_play(hand_of(13), [13], 12, 1) is not None
+
+
+def test_passing_is_only_allowed_when_following():
+    hand = hand_of(7)
+
+    assert validate_play(hand, [], EMPTY_TABLE, 0) is not None
+    assert validate_play(hand, [], 3, 1) is None
+
+
+def test_legal_plays_agree_with_validate_play():
+    hand = hand_of(2, 2, 6, 11, 13)
+
+    for (table_rank, table_count) in [(EMPTY_TABLE, 0), (12, 1), (7, 2), (3, 3), (12, 4)]:
+        plays = set(legal_plays(hand, table_rank, table_count))
+
+        for play in plays:
+            assert is_legal_play(hand, play, table_rank, table_count)
+
+        # Every legal play of up to four cards, in its canonical order
+        candidates = set()
+        for rank in range(1, JESTER):
+            for naturals in range(1, 5):
+                for jesters in range(0, 2):
+                    candidates.add(naturals * (rank,) + jesters * (JESTER,))
+
+        candidates.add((JESTER,))
+
+        legal = {c for c in candidates if is_legal_play(hand, c, table_rank, table_count)}
+        assert plays == legal
+
+
+def test_legal_plays_split_jesters_every_way():
+    assert set(legal_plays(hand_of(4, 4, 13), 9, 2)) == {(4, 4), (4, 13)}
+    assert set(legal_plays(hand_of(4, 13, 13), EMPTY_TABLE, 0)) == {
+        (4,), (4, 13), (4, 13, 13), (13,), (13, 13),
+    }
+
+
+class ScriptedPolicy(GreedyPolicy):
+    """Greedy, but calls a revolution only when told to."""
+
+    def __init__(self, revolt: bool = False):
+        self.revolt = revolt
+
+    def revolution(self, state, player):
+        return self.revolt
+
+
+def dealt_round(hands: dict, policies: dict = None) -> Round:
+    """A round in REVOLUTION with ids in seat order and ``hands`` dealt."""
+    num_players = len(hands)
+    if policies is None:
+        policies = {id: ScriptedPolicy() for id in hands}
+
+    round = Round(num_players, policies, order=list(range(1, num_players + 1)))
+    round.step()
+    round.step()
+
+    round.state.hands = {id: hand_of(*cards) for (id, cards) in hands.items()}
+    round.state.num_cards = {id: len(cards) for (id, cards) in hands.items()}
+    assert round.phase == Phase.REVOLUTION
+
+    return round
+
+
+HANDS = {
+    1: [1, 5, 9, 12, 13],
+    2: [2, 6, 10, 11],
+    3: [3, 7, 8, 12],
+    4: [4, 4, 11, 12],
+}
+
+
+def test_taxes_trade_two_cards_then_one():
+    round = dealt_round(HANDS)
+    round.step()
+    round.step()
+
+    assert round.phase == Phase.PLAY
+    assert round.transfers == [
+        (4, 1, [4, 4]),
+        (3, 2, [3]),
+        (1, 4, [12, 9]),
+        (2, 3, [11]),
+    ]
+
+    hands = round.state.hands
+    assert hands[1] == hand_of(1, 4, 4, 5, 13)
+    assert hands[2] == hand_of(2, 3, 6, 10)
+    assert hands[3] == hand_of(7, 8, 11, 12)
+    assert hands[4] == hand_of(9, 11, 12, 12)
+
+
+def test_taxes_keep_jesters_unless_nothing_else_is_left():
+    assert worst_cards(hand_of(2, 7, 13, 13), 2) == [7, 2]
+    assert worst_cards(hand_of(3, 13, 13), 2) == [3, 13]
+    assert worst_cards(hand_of(13), 1) == [13]
+
+
+def test_a_revolution_skips_the_taxes():
+    hands = dict(HANDS)
+    hands[2] = [2, 6, 13, 13]
+    hands[1] = [1, 5, 9, 12]
+
+    policies = {id: ScriptedPolicy(revolt=id == 2) for id in hands}
+    round = dealt_round(hands, policies)
+    round.step()
+
+    assert round.revolution == 2
+    assert not round.great_revolution
+    assert round.phase == Phase.PLAY
+    assert round.state.order == [1, 2, 3, 4]
+    assert round.state.hands[2] == hand_of(2, 6, 13, 13)
+
+
+def test_a_great_revolution_reverses_the_order():
+    hands = dict(HANDS)
+    hands[4] = [4, 11, 13, 13]
+    hands[1] = [1, 5, 9, 12]
+
+    policies = {id: ScriptedPolicy(revolt=True) for id in hands}
+    round = dealt_round(hands, policies)
+    round.step()
+
+    assert round.revolution == 4
+    assert round.great_revolution
+    assert round.phase == Phase.PLAY
+    assert round.state.order == [4, 3, 2, 1]
+
+
+def test_a_round_ends_with_every_player_ranked():
+    round = dealt_round(HANDS, {id: PassPolicy() for id in HANDS})
+
+    while round.phase != Phase.FINISHED:
+        round.step()
+
+    assert sorted(round.state.finish_order) == [1, 2, 3, 4]
+    assert all(round.state.num_cards[id] == 0 for id in round.state.finish_order[:-1])
+
+
+class IllegalPolicy(Policy):
+    def play(self, state, player):
+        return [1, 1, 1]
+
+
+def test_a_round_rejects_an_illegal_play():
+    round = dealt_round(HANDS, {id: IllegalPolicy() for id in HANDS})
+    round.step()
+    round.step()
+
+    with pytest.raises(ValueError):
+        round.step()
@@ -0,0 +1,145 @@
+import time
+
+from random import Random
+
+import pytest
+
+from engine import Phase, PlayState, Round, RoundState, has_cards
+from mcts import MCTSPolicy
+from moves import EMPTY_TABLE, JESTER, counts_of, is_legal_play, tax_tiers
+from policy import GreedyPolicy
+from solver import Solver, ordered_plays
+
+
+BUDGET = 0.02
+
+# A decision may run one playout past its budget, and the test machine may be slow
+BUDGET_SLACK = 0.25
+
+
+def brute_force(state: PlayState) -> tuple:
+    """Max^n without pruning or a table: every player picks what finishes them soonest."""
+    if state.is_over():
+        return ()
+
+    player = state.player
+    base = len(state.finish_order)
+    best = None
+
+    # Ties go to the first play in the order the solver tries them
+    for play in ordered_plays(tuple(state.hands[player]), state.table_rank, state.table_count):
+        state.make(play)
+        outcome = tuple(state.finish_order[base:]) + brute_force(state)
+        state.unmake()
+
+        if best is None or outcome.index(player) < best.index(player):
+            best = outcome
+
+    return best
+
+
+def random_position(rng: Random, max_players: int, max_cards: int) -> RoundState:
+    num_players = rng.randint(2, max_players)
+    state = RoundState(num_players)
+    state.order = rng.sample(range(1, num_players + 1), num_players)
+
+    ranks = rng.sample(range(1, JESTER + 1), 4)
+    for id in state.order:
+        cards = [rng.choice(ranks) for _ in range(rng.randint(1, max_cards))]
+        state.hands[id] = counts_of(cards)
+        state.num_cards[id] = len(cards)
+
+    state.table_rank = EMPTY_TABLE
+    state.turn = rng.randrange(num_players)
+
+    return state
+
+
+def positions(count: int, seed: int, max_players: int = 4, max_cards: int = 4) -> list:
+    rng = Random(seed)
+    return [random_position(rng, max_players, max_cards) for _ in range(count)]
+
+
+def test_solver_matches_brute_force():
+    solver = Solver()
+
+    # Small enough for the search without pruning to finish quickly
+    for state in positions(200, 1, 3, 3):
+        seats = list(range(1, len(state.order) + 1))
+        hands = {seat: list(state.hands[id]) for (seat, id) in zip(seats, state.order)}
+        expected = brute_force(PlayState(seats, hands, turn=state.turn))
+
+        assert solver.solve(state) == [state.order[seat - 1] for seat in expected]
+
+
+def test_transposition_table_stays_within_its_size():
+    small = Solver(max_entries=32)
+    unbounded = Solver()
+
+    for state in positions(100, 2):
+        assert small.solve(state) == unbounded.solve(state)
+        assert len(small.table) <= small.max_entries
+
+    assert small.evictions > 0
+
+
+def round_states(seed: int):
+    """Every turn of a greedy round, with the player about to move."""
+    round = Round(5, {id: GreedyPolicy() for id in range(1, 6)}, Random(seed))
+
+    while round.phase != Phase.PLAY:
+        if round.phase == Phase.TAXES:
+            yield ('taxes', round.state)
+
+        round.step()
+
+    while round.phase != Phase.FINISHED:
+        state = round.state
+        player = state.order[state.turn]
+
+        if state.table_owner == player:
+            state.clear_table()
+
+        if state.num_cards[player] != 0:
+            yield ('play', state)
+
+        round.step()
+
+    return
+
+
+@pytest.mark.parametrize('seed', [3, 4])
+def test_mcts_decides_legally_within_its_budget(seed):
+    policy = MCTSPolicy(Random(seed), BUDGET)
+    decisions = 0
+
+    for (phase, state) in round_states(seed):
+        if phase == 'taxes':
+            for (tier, n) in enumerate(tax_tiers(state.num_players)):
+                dalmuti = state.order[tier]
+
+                start = time.perf_counter()
+                if tier == 0:
+                    cards = policy.gd_taxes(state, dalmuti)
+                else:
+                    cards = policy.ld_taxes(state, dalmuti)
+
+                assert time.perf_counter() - start < BUDGET + BUDGET_SLACK
+                assert len(cards) == n
+                assert has_cards(state.hands[dalmuti], cards)
+
+            continue
+
+        player = state.order[state.turn]
+
+        start = time.perf_counter()
+        cards = policy.play(state, player)
+
+        assert time.perf_counter() - start < BUDGET + BUDGET_SLACK
+        assert is_legal_play(state.hands[player], cards, state.table_rank, state.table_count)
+
+        decisions += 1
+        if decisions == 30:
+            break
+
+    assert decisions > 0
@@ -0,0 +1,304 @@
+import argparse
+import json
+import math
+import os
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from random import Random
+from typing import Dict, List
+
+from config import MIN_MACHINES
+from engine import Round
+from policy import POLICIES, make_policy
+from ring import MAX_MACHINES
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Play seeded headless games between bot policies.'
+    )
+
+    parser.add_argument(
+        'policies',
+        nargs='+',
+        choices=list(POLICIES),
+        help=f'policy of each seat, between {MIN_MACHINES} and {MAX_MACHINES} of them'
+    )
+    parser.add_argument(
+        '-n',
+        '--games',
+        type=int,
+        default=10000,
+        help='number of games, each one made of several rounds'
+    )
+    parser.add_argument(
+        '-r',
+        '--rounds',
+        type=int,
+        default=4,
+        help='rounds per game, the finish order of a round ranks the next'
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='number of worker processes'
+    )
+    parser.add_argument(
+        '-c',
+        '--chunk',
+        type=int,
+        default=500,
+        help='games played by a worker per task'
+    )
+    parser.add_argument(
+        '-s',
+        '--seed',
+        type=int,
+        default=0,
+        help='base seed, game i is always played with the same cards'
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        help='append partial results to this file as JSON lines'
+    )
+    parser.add_argument(
+        '-i',
+        '--interval',
+        type=float,
+        default=5.0,
+        help='seconds between partial reports'
+    )
+
+    return parser.parse_args()
+
+
+class PolicyStats():
+    """Running totals for every seat played by one policy.
+
+    The rounds of a game are chained by their finish orders, so they are
+    not independent samples: confidence intervals are taken over the win
+    rate and average position of every game instead, added by ``add_game``.
+    """
+
+    def __init__(self):
+        self.rounds = 0
+        self.wins = 0
+        self.position_sum = 0
+        self.games = 0
+        self.win_rate_sum = 0.0
+        self.win_rate_sq_sum = 0.0
+        self.position_mean_sum = 0.0
+        self.position_mean_sq_sum = 0.0
+        self.taxes_paid = 0
+        self.taxes_received = 0
+        self.tax_balance = 0
+
+    def add_finish(self, position: int):
+        self.rounds += 1
+        self.position_sum += position
+
+        if position == 1:
+            self.wins += 1
+
+        return
+
+    def add_taxes(self, cards: List[int], paid: bool):
+        # Lower card values are better cards, so count their strength
+        strength = sum(14 - card for card in cards)
+
+        if paid:
+            self.taxes_paid += len(cards)
+            self.tax_balance -= strength
+        else:
+            self.taxes_received += len(cards)
+            self.tax_balance += strength
+
+        return
+
+    def add_game(self, game: 'PolicyStats'):
+        """Adds the rounds of one game, whose means are one sample of the CIs."""
+        self.merge(game)
+
+        win_rate = game.wins / game.rounds
+        position = game.position_sum / game.rounds
+
+        self.games += 1
+        self.win_rate_sum += win_rate
+        self.win_rate_sq_sum += win_rate * win_rate
+        self.position_mean_sum += position
+        self.position_mean_sq_sum += position * position
+
+        return
+
+    def merge(self, other: 'PolicyStats'):
+        for key, value in vars(other).items():
+            setattr(self, key, getattr(self, key) + value)
+
+        return
+
+    def summary(self) -> dict:
+        n = max(self.rounds, 1)
+        games = max(self.games, 1)
+
+        def ci(sum: float, sq_sum: float) -> float:
+            mean = sum / games
+            variance = max(sq_sum / games - mean * mean, 0.0)
+            return 1.96 * math.sqrt(variance / games)
+
+        return {
+            'games': self.games,
+            'rounds': self.rounds,
+            'win_rate': self.wins / n,
+            'win_rate_ci': ci(self.win_rate_sum, self.win_rate_sq_sum),
+            'avg_position': self.position_sum / n,
+            'avg_position_ci': ci(self.position_mean_sum, self.position_mean_sq_sum),
+            'taxes_paid': self.taxes_paid,
+            'taxes_received': self.taxes_received,
+            'tax_balance_per_round': self.tax_balance / n,
+        }
+
+
+def play_games(
+    names: List[str],
+    first: int,
+    count: int,
+    rounds: int,
+    seed: int
+) -> Dict[str, PolicyStats]:
+    """Plays games ``first`` to ``first + count`` and returns their totals.
+
+    Seats rotate with the game number so every policy plays from every
+    machine id, and within a game each round is ranked by the finish order
+    of the previous one.
+    """
+    num_players = len(names)
+    stats = {name: PolicyStats() for name in names}
+
+    for game in range(first, first + count):
+        rng = Random(seed * 2 ** 32 + game)
+
+        seats = {
+            id: names[(id - 1 + game) % num_players]
+            for id in range(1, num_players + 1)
+        }
+        policies = {id: make_policy(name, rng) for id, name in seats.items()}
+        game_stats = {name: PolicyStats() for name in names}
+
+        order = None
+        for _ in range(rounds):
+            round = Round(num_players, policies, rng, order)
+            order = round.run()
+
+            for (position, id) in enumerate(order):
+                game_stats[seats[id]].add_finish(position + 1)
+
+            for (giver, receiver, cards) in round.transfers:
+                game_stats[seats[giver]].add_taxes(cards, paid=True)
+                game_stats[seats[receiver]].add_taxes(cards, paid=False)
+
+        for name in game_stats:
+            stats[name].add_game(game_stats[name])
+
+    return stats
+
+
+def report(stats: Dict[str, PolicyStats], games: int, elapsed: float, show: bool = True) -> dict:
+    summaries = {name: policy_stats.summary() for name, policy_stats in stats.items()}
+    line = {'games': games, 'elapsed': elapsed, 'policies': summaries}
+
+    if not show:
+        return line
+
+    print(f'--- {games} games in {elapsed:.1f}s ({games / elapsed:,.0f} games/s)')
+    print(f'{"policy":<10}{"win rate":>18}{"avg position":>20}{"tax balance":>14}')
+
+    for name, s in summaries.items():
+        print(f'{name:<10}'
+            f'{s["win_rate"]:>10.4f} ± {s["win_rate_ci"]:.4f}'
+            f'{s["avg_position"]:>12.4f} ± {s["avg_position_ci"]:.4f}'
+            f'{s["tax_balance_per_round"]:>14.3f}'
+        )
+
+    return line
+
+
+def run_tournament(args, show: bool = True) -> Dict[str, PolicyStats]:
+    """Plays ``args.games`` games on ``args.workers`` processes.
+
+    Partial results are reported every ``args.interval`` seconds, printed
+    unless ``show`` is False and appended to ``args.output`` when given.
+    """
+    if len(args.policies) < MIN_MACHINES or len(args.policies) > MAX_MACHINES:
+        print(f'O número de jogadores deve estar entre {MIN_MACHINES} e {MAX_MACHINES}')
+        exit(1)
+
+    # The same policy may sit more than once, its seats are pooled
+    stats = {name: PolicyStats() for name in args.policies}
+    output = open(args.output, 'a') if args.output else None
+
+    start = time.perf_counter()
+    last_report = start
+    done = 0
+
+    with ProcessPoolExecutor(args.workers) as executor:
+        next_game = 0
+        pending = set()
+        sizes = {}
+
+        while next_game < args.games or pending:
+            # Keep a couple of tasks queued per worker, no more, so results
+            # stream in as the run goes instead of piling up at the end
+            while next_game < args.games and len(pending) < 2 * args.workers:
+                count = min(args.chunk, args.games - next_game)
+                future = executor.submit(
+                    play_games,
+                    args.policies,
+                    next_game,
+                    count,
+                    args.rounds,
+                    args.seed
+                )
+
+                pending.add(future)
+                sizes[future] = count
+                next_game += count
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                for name, chunk_stats in future.result().items():
+                    stats[name].merge(chunk_stats)
+
+                done += sizes.pop(future)
+
+            now = time.perf_counter()
+            last = next_game >= args.games and not pending
+
+            if now - last_report >= args.interval or last:
+                last_report = now
+
+                line = report(stats, done, now - start, show)
+
+                if output:
+                    output.write(json.dumps(line) + '\n')
+                    output.flush()
+
+    if output:
+        output.close()
+
+    return stats
+
+
+def main():
+    args = get_args()
+    run_tournament(args)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
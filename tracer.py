@@ -0,0 +1,223 @@
+import argparse
+import atexit
+import glob
+import heapq
+import json
+import signal
+import struct
+import sys
+import threading
+import time
+
+from enum import Enum
+from typing import Iterator, List
+
+from messages import MessageType
+
+
+# Event layout (little endian):
+#   time_ns u64 | node u8 | event u8 | type u8 | origin u8 | table u16 |
+#   seq u16 | recv_confirm u64
+EVENT = struct.Struct('<QBBBBHHQ')
+
+# File layout: magic | version u8 | node u8 | num_events u32 | events...
+MAGIC = b'DLMT'
+FILE_HEADER = struct.Struct('<4sBBI')
+TRACE_VERSION = 2
+
+DEFAULT_CAPACITY = 1 << 16
+
+
+# For TOKEN_IN and TOKEN_OUT the origin is the machine the token came from
+# or was given to, for REGENERATE the one it was regenerated for
+class Event(Enum):
+    SEND = 1
+    RECV = 2
+    FORWARD = 3
+    RESEND = 4
+    CIRCUIT = 5
+    DUPLICATE = 6
+    TIMEOUT = 7
+    INVALID = 8
+    TOKEN_IN = 9
+    TOKEN_OUT = 10
+    CLAIM = 11
+    REGENERATE = 12
+    STALE_TOKEN = 13
+
+
+EVENT_NAMES = {event.value: event.name for event in Event}
+
+
+class Tracer():
+    """Records fixed-size binary events of one node in a preallocated ring.
+
+    Once ``capacity`` events were recorded the oldest ones are overwritten,
+    so recording never allocates. Code that may trace keeps a ``tracer``
+    that is None while tracing is off, which makes a disabled tracer cost a
+    single comparison. ``dump`` writes the events to a file, oldest first.
+    """
+
+    def __init__(self, node: int, capacity: int = DEFAULT_CAPACITY):
+        self.node = node
+        self.capacity = capacity
+
+        self.buffer = bytearray(capacity * EVENT.size)
+        self.count = 0
+        self.lock = threading.Lock()
+
+        pass
+
+    def record(
+        self,
+        event: Event,
+        type: int,
+        origin: int = 0,
+        seq: int = 0,
+        recv_confirm: int = 0,
+        table: int = 0
+    ):
+        with self.lock:
+            offset = (self.count % self.capacity) * EVENT.size
+            self.count += 1
+
+        EVENT.pack_into(
+            self.buffer,
+            offset,
+            time.time_ns(),
+            self.node,
+            event.value,
+            type,
+            origin,
+            table,
+            seq,
+            recv_confirm
+        )
+
+        return
+
+    def events(self) -> bytes:
+        if self.count <= self.capacity:
+            return bytes(self.buffer[:self.count * EVENT.size])
+
+        # The ring wrapped, the oldest event is the next one to be replaced
+        split = (self.count % self.capacity) * EVENT.size
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+    def dump(self, path: str):
+        events = self.events()
+
+        with open(path, 'wb') as f:
+            f.write(FILE_HEADER.pack(
+                MAGIC,
+                TRACE_VERSION,
+                self.node,
+                len(events) // EVENT.size
+            ))
+            f.write(events)
+
+        return
+
+    def dump_on_exit(self, path: str):
+        """Dumps to ``path`` when the process exits, crashes or is terminated."""
+        atexit.register(self.dump, path)
+
+        # SIGTERM skips atexit unless it is turned into a normal exit
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+        return
+
+    pass
+
+
+def read_trace(path: str) -> List[tuple]:
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    (magic, version, node, num_events) = FILE_HEADER.unpack_from(data, 0)
+
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a trace')
+
+    if version != TRACE_VERSION:
+        raise ValueError(f'Unsupported trace version {version} in {path}')
+
+    return list(EVENT.iter_unpack(data[FILE_HEADER.size:][:num_events * EVENT.size]))
+
+
+def merge_traces(paths: List[str]) -> Iterator[tuple]:
+    """Events of every trace in one timeline, ordered by their timestamp."""
+    return heapq.merge(*(read_trace(path) for path in paths))
+
+
+def format_event(event: tuple, start: int, type_names: dict) -> str:
+    (time_ns, node, kind, type, origin, table, seq, recv_confirm) = event
+
+    return (f'{(time_ns - start) / 1e3:>12.1f}us  node {node}  '
+        f'{EVENT_NAMES.get(kind, kind):<10}'
+        f'{type_names.get(type, type):<15}'
+        f'origin {origin}  table {table}  seq {seq:<5}  '
+        f'confirm {format(recv_confirm, "b")}'
+    )
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description='Merges the traces of every node into one timeline.'
+    )
+
+    parser.add_argument(
+        'traces',
+        nargs='+',
+        help='trace files or glob patterns, one per node'
+    )
+    parser.add_argument(
+        '-j',
+        '--json',
+        action='store_true',
+        help='print one JSON object per event instead of text'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    type_names = {type.value: type.name for type in MessageType}
+
+    paths = []
+    for pattern in args.traces:
+        paths += sorted(glob.glob(pattern)) or [pattern]
+
+    events = list(merge_traces(paths))
+    if not events:
+        return
+
+    start = events[0][0]
+
+    # Stop quietly when the output is piped into e.g. head
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+    for event in events:
+        if args.json:
+            (time_ns, node, kind, type, origin, table, seq, recv_confirm) = event
+            print(json.dumps({
+                'time_ns': time_ns,
+                'node': node,
+                'event': EVENT_NAMES.get(kind, kind),
+                'type': type_names.get(type, type),
+                'origin': origin,
+                'table': table,
+                'seq': seq,
+                'recv_confirm': recv_confirm,
+            }))
+        else:
+            print(format_event(event, start, type_names))
+
+    return
+
+
+if __name__ == '__main__':
+    main()